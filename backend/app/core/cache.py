@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache ในหน่วยความจำแบบ LRU + TTL ใช้ได้จากหลาย thread
+    - แต่ละ entry มีเวลาหมดอายุของตัวเอง (epoch seconds) หรือใช้ ttl ตั้งต้นของ cache
+    - เมื่อเต็ม maxsize จะไล่ entry ที่ใช้ล่าสุดนานที่สุดออก
+    - maxsize <= 0 คือปิด cache (get คืน default เสมอ)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None, expires_at: float = None):
+        if self.maxsize <= 0:
+            return
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+_redis_client = None
+
+
+def get_redis_client():
+    """
+    Redis client (redis.asyncio) สำหรับ cache ที่ต้องแชร์ระหว่างหลาย worker
+    import แบบ lazy เพราะ redis เป็น dependency เสริม ใช้เฉพาะเมื่อตั้ง backend เป็น redis
+    """
+    global _redis_client
+    if _redis_client is None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The 'redis' package is required for the redis cache backend (pip install redis)") from e
+        _redis_client = redis.from_url(REDIS_URL)
+    return _redis_client
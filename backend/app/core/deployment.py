@@ -0,0 +1,34 @@
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# จำนวน worker ของ uvicorn/gunicorn (ทั้งคู่ใช้ WEB_CONCURRENCY เป็นค่าเริ่มต้นของ --workers)
+# ถ้า start ด้วย --workers N ให้ตั้ง WEB_CONCURRENCY=N แทน ไม่อย่างนั้นการตรวจด้านล่างจะไม่รู้ว่ามีหลาย worker
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# true = ยอมให้ start หลาย worker กับ backend ในหน่วยความจำ (เช่นมี sticky routing) แค่ log warning
+ALLOW_PROCESS_LOCAL_STATE = os.getenv("ALLOW_PROCESS_LOCAL_STATE", "false").lower() == "true"
+
+
+class DeploymentConfigError(RuntimeError):
+    pass
+
+
+def require_shared_backend(setting: str, value: str, local_values: tuple, consequence: str):
+    """
+    เรียกตอน start: ถ้ารันหลาย worker แต่ setting ยังเป็น backend ในหน่วยความจำของ process
+    จะไม่ยอม start (หรือ log warning ถ้า ALLOW_PROCESS_LOCAL_STATE=true)
+    """
+    if WEB_CONCURRENCY <= 1 or value not in local_values:
+        return
+    message = (
+        f"{setting}={value} keeps state inside each worker but WEB_CONCURRENCY={WEB_CONCURRENCY}: "
+        f"{consequence}. Configure a shared backend or run a single worker."
+    )
+    if ALLOW_PROCESS_LOCAL_STATE:
+        logger.warning(message)
+        return
+    raise DeploymentConfigError(message)
@@ -0,0 +1,198 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .metrics import CounterFamily, Histogram, HistogramFamily, render_histogram
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ปิดทั้งหมดได้ด้วย METRICS_ENABLED=false, SLOW_REQUEST_MS > 0 เปิด log SQL ของ request ที่ช้ากว่านั้น
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_MAX_STATEMENTS = int(os.getenv("SLOW_REQUEST_MAX_STATEMENTS", "50"))
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_seconds = HistogramFamily(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route"),
+)
+requests_total = CounterFamily(
+    "http_requests_total", "Requests by route and status code", ("method", "route", "status"),
+)
+request_db_queries = HistogramFamily(
+    "http_request_db_queries", "DB queries executed per request", ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+request_db_seconds = CounterFamily(
+    "http_request_db_seconds_total", "Time spent in DB queries by route", ("method", "route"),
+)
+request_pool_wait_seconds = CounterFamily(
+    "http_request_db_pool_wait_seconds_total", "Time spent waiting for a pooled connection by route", ("method", "route"),
+)
+request_password_hash_seconds = CounterFamily(
+    "http_request_password_hash_seconds_total", "Time spent hashing/verifying passwords by route", ("method", "route"),
+)
+request_jwt_seconds = CounterFamily(
+    "http_request_jwt_verify_seconds_total", "Time spent verifying JWTs by route", ("method", "route"),
+)
+db_query_seconds = Histogram()
+db_pool_wait_seconds = Histogram()
+jwt_verify_seconds = Histogram()
+
+FAMILIES = (
+    request_seconds,
+    requests_total,
+    request_db_queries,
+    request_db_seconds,
+    request_pool_wait_seconds,
+    request_password_hash_seconds,
+    request_jwt_seconds,
+)
+
+
+class RequestStats:
+    """ตัวนับของ request ปัจจุบัน (ผูกกับ contextvar ส่งต่อไปถึง greenlet ของ SQLAlchemy และ threadpool)"""
+
+    __slots__ = ("db_queries", "db_seconds", "pool_wait_seconds", "hash_seconds", "jwt_seconds", "statements")
+
+    def __init__(self, capture_statements: bool = False):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.jwt_seconds = 0.0
+        self.statements = [] if capture_statements else None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_password_hash(elapsed: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.hash_seconds += elapsed
+
+
+def record_jwt_verify(elapsed: float):
+    if not METRICS_ENABLED:
+        return
+    jwt_verify_seconds.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.jwt_seconds += elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_query_seconds.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None and len(stats.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+            stats.statements.append((elapsed, statement))
+
+
+def instrument_engine(engine):
+    """นับจำนวน/เวลาของ query ทุกครั้งที่ผ่าน engine (AsyncEngine ให้ส่ง .sync_engine)"""
+    if not METRICS_ENABLED:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class _CheckoutTimingMixin:
+    # SQLAlchemy ไม่มี event ก่อน checkout จึงจับเวลาที่ _do_get (รวมเวลารอ slot และเปิด connection ใหม่)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            db_pool_wait_seconds.observe(elapsed)
+            stats = _current.get()
+            if stats is not None:
+                stats.pool_wait_seconds += elapsed
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware เก็บ latency, จำนวน/เวลา query, เวลารอ pool, bcrypt และ JWT ต่อ route
+    ใช้ route template (เช่น /boards/{board_id}) เป็น label เพื่อไม่ให้จำนวน series โตตาม id
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(capture_statements=SLOW_REQUEST_MS > 0)
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            self._record(scope, status_code, elapsed, stats)
+
+    def _record(self, scope, status_code: int, elapsed: float, stats: RequestStats):
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        labels = (scope["method"], route)
+        request_seconds.labels(*labels).observe(elapsed)
+        requests_total.inc((*labels, str(status_code)))
+        request_db_queries.labels(*labels).observe(stats.db_queries)
+        request_db_seconds.inc(labels, stats.db_seconds)
+        request_pool_wait_seconds.inc(labels, stats.pool_wait_seconds)
+        request_password_hash_seconds.inc(labels, stats.hash_seconds)
+        request_jwt_seconds.inc(labels, stats.jwt_seconds)
+
+        if stats.statements is not None and elapsed * 1000 >= SLOW_REQUEST_MS:
+            logger.warning(
+                "slow request %s %s %.1fms status=%s queries=%d db=%.1fms pool_wait=%.1fms hash=%.1fms jwt=%.1fms\n%s",
+                scope["method"], scope["path"], elapsed * 1000, status_code, stats.db_queries,
+                stats.db_seconds * 1000, stats.pool_wait_seconds * 1000,
+                stats.hash_seconds * 1000, stats.jwt_seconds * 1000,
+                "\n".join(f"  {query_elapsed * 1000:.1f}ms {statement}" for query_elapsed, statement in stats.statements),
+            )
+
+
+def render_request_metrics(lines: list):
+    for family in FAMILIES:
+        family.render(lines)
+    for name, documentation, histogram in (
+        ("db_query_duration_seconds", "Duration of every DB query", db_query_seconds),
+        ("db_pool_checkout_wait_seconds", "Time to check out a pooled connection", db_pool_wait_seconds),
+        ("jwt_verify_duration_seconds", "Duration of verify_token", jwt_verify_seconds),
+    ):
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} histogram")
+        render_histogram(lines, name, {}, histogram.snapshot())
@@ -1,11 +1,16 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import time
+import uuid
 from jose import jwt
 from jose.exceptions import ExpiredSignatureError, JWTError
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 from dotenv import load_dotenv
+from .cache import TTLCache
+from .instrumentation import record_jwt_verify
 
 load_dotenv()
 
@@ -15,7 +20,13 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# cache ของ token ที่ verify แล้ว (key = sha256 ของ token) ตั้งเป็น 0 เพื่อปิด
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+# user id (คั่นด้วย comma) ที่เรียก endpoint สำหรับผู้ดูแลได้ ว่าง = ปิด endpoint เหล่านั้นทั้งหมด
+ADMIN_USER_IDS = {int(value) for value in os.getenv("ADMIN_USER_IDS", "").split(",") if value.strip()}
+
 security = HTTPBearer()
+token_cache = TTLCache(maxsize=JWT_CACHE_SIZE)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """สร้าง JWT access token"""
@@ -33,11 +44,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def create_refresh_token(data: dict):
-    """สร้าง JWT refresh token"""
+def create_refresh_token(data: dict, family: Optional[str] = None):
+    """
+    สร้าง JWT refresh token
+    jti ใช้ได้ครั้งเดียว (rotate ทุกครั้งที่ refresh) ส่วน fam คงเดิมตลอดสายของ token ที่ rotate ต่อกันมา
+    """
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    now = datetime.utcnow()
+    expire = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({
+        "exp": expire,
+        "iat": now,
+        "type": "refresh",
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex,
+    })
 
     if "sub" in to_encode:
         to_encode["sub"] = str(to_encode["sub"])
@@ -46,18 +67,10 @@ def create_refresh_token(data: dict):
     
     return encoded_jwt
 
-def verify_token(token: str, token_type: str = "access"):
-    """ตรวจสอบ JWT token"""
+def decode_token(token: str):
+    """decode และตรวจ signature/exp ของ JWT token (ไม่ผ่าน cache)"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-
-        if payload.get("type") != token_type:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token type"
-            )
-
-        return payload
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,6 +82,30 @@ def verify_token(token: str, token_type: str = "access"):
             detail="Invalid token"
         )
 
+def verify_token(token: str, token_type: str = "access"):
+    """ตรวจสอบ JWT token"""
+    # cache เก็บเฉพาะ token ที่ verify ผ่านแล้ว และหมดอายุพร้อม exp ของ token
+    # token ที่หมดอายุหรือไม่ถูกต้องจะตกไปที่ decode_token ซึ่งคืน error แบบเดิม
+    start = time.perf_counter()
+    try:
+        cache_key = hashlib.sha256(token.encode()).digest()
+        payload = token_cache.get(cache_key)
+        if payload is None:
+            payload = decode_token(token)
+            exp = payload.get("exp")
+            if isinstance(exp, (int, float)):
+                token_cache.set(cache_key, payload, expires_at=exp)
+    finally:
+        record_jwt_verify(time.perf_counter() - start)
+
+    if payload.get("type") != token_type:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token type"
+        )
+
+    return dict(payload)
+
 def get_current_user(request: Request):
     token = request.cookies.get("access_token") 
     if not token:
@@ -85,4 +122,11 @@ def get_current_user(request: Request):
         "id": user_id,
         "email": payload.get("email"),
         "display_name": payload.get("display_name")
-    }
\ No newline at end of file
+    }
+
+
+def require_admin(current_user: dict = Depends(get_current_user)):
+    """dependency ของ endpoint สำหรับผู้ดูแล (id อยู่ใน ADMIN_USER_IDS)"""
+    if current_user["id"] not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
@@ -0,0 +1,115 @@
+import bisect
+import threading
+
+# bucket (วินาที) สำหรับ latency ที่ใช้ร่วมกันในทุก module
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histogram แบบ cumulative bucket (รูปแบบเดียวกับ Prometheus) ใช้ได้จากหลาย thread"""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = count
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+
+class HistogramFamily:
+    """Histogram หลายชุดแยกตาม label (เช่น method, route)"""
+
+    def __init__(self, name: str, documentation: str, labelnames, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for values, child in list(self._children.items()):
+            render_histogram(lines, self.name, dict(zip(self.labelnames, values)), child.snapshot())
+
+
+class CounterFamily:
+    """Counter แยกตาม label ค่าเพิ่มขึ้นอย่างเดียว"""
+
+    def __init__(self, name: str, documentation: str, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, values: tuple, amount: float = 1.0):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} counter")
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, values)))} {value}")
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def render_histogram(lines: list, name: str, labels: dict, snapshot: dict):
+    for bound, count in snapshot["buckets"].items():
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+
+
+def render_stats(lines: list, prefix: str, stats: dict):
+    """
+    แปลง dict จาก stats() ของแต่ละ module เป็น Prometheus text format
+    ค่าตัวเลขออกเป็น untyped, ค่าที่เป็น Histogram.snapshot() ออกเป็น histogram, ค่าอื่นข้าม
+    """
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict) and "buckets" in value:
+            lines.append(f"# TYPE {name} histogram")
+            render_histogram(lines, name, {}, value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# TYPE {name} untyped")
+            lines.append(f"{name} {value}")
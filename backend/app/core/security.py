@@ -1,16 +1,193 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer
 from passlib.context import CryptContext
 import re
+from dotenv import load_dotenv
+from .instrumentation import record_password_hash
+from .metrics import Histogram
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+load_dotenv()
+
+# scheme แรกใช้สร้าง hash ใหม่ scheme ที่เหลือยัง verify ได้แต่จะถูก rehash หลัง login สำเร็จ
+# ค่า cost หาได้จาก scripts/calibrate_password_hash.py บนเครื่องที่ deploy จริง
+PASSWORD_SCHEMES = [scheme.strip() for scheme in os.getenv("PASSWORD_SCHEMES", "bcrypt").split(",") if scheme.strip()]
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+PASSWORD_ARGON2_MEMORY_KIB = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", "65536"))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "4"))
+
+SUPPORTED_PASSWORD_SCHEMES = ("bcrypt", "argon2")
+
+def build_password_context(
+    schemes=("bcrypt",),
+    bcrypt_rounds: int = PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost: int = PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_kib: int = PASSWORD_ARGON2_MEMORY_KIB,
+    argon2_parallelism: int = PASSWORD_ARGON2_PARALLELISM,
+) -> CryptContext:
+    """
+    CryptContext ตาม scheme/cost ที่กำหนด
+    ตั้ง min_rounds เท่ากับค่าปัจจุบันเพื่อให้ needs_update จับ hash ที่ cost ต่ำกว่าเดิมด้วย
+    """
+    unsupported = [scheme for scheme in schemes if scheme not in SUPPORTED_PASSWORD_SCHEMES]
+    if not schemes or unsupported:
+        raise ValueError(f"Unsupported PASSWORD_SCHEMES: {', '.join(unsupported) or '(empty)'}")
+
+    settings = {}
+    if "bcrypt" in schemes:
+        settings.update(bcrypt__rounds=bcrypt_rounds, bcrypt__min_rounds=bcrypt_rounds)
+    if "argon2" in schemes:
+        settings.update(
+            argon2__time_cost=argon2_time_cost,
+            argon2__min_rounds=argon2_time_cost,
+            argon2__memory_cost=argon2_memory_kib,
+            argon2__parallelism=argon2_parallelism,
+        )
+    context = CryptContext(schemes=list(schemes), deprecated="auto", **settings)
+    if "argon2" in schemes and not context.handler("argon2").has_backend():
+        raise RuntimeError("The 'argon2-cffi' package is required for the argon2 password scheme (pip install argon2-cffi)")
+    return context
+
+pwd_context = build_password_context(PASSWORD_SCHEMES)
 security = HTTPBearer()
 
+# Password hashing pool configuration
+# "thread" พอสำหรับ bcrypt (ปล่อย GIL ระหว่าง hash), "process" สำหรับ scheme ที่ไม่ปล่อย GIL
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", PASSWORD_HASH_WORKERS * 4))
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def password_needs_update(hashed_password: str) -> bool:
+    """hash ใช้ scheme/cost เก่ากว่าที่ตั้งไว้หรือไม่ (แค่ parse hash ไม่ได้คำนวณใหม่)"""
+    return pwd_context.needs_update(hashed_password)
+
+def _timed_call(fn, *args):
+    # รันใน worker: คืนผลลัพธ์พร้อมเวลาที่ใช้ hash จริง (ไม่รวมเวลารอคิว)
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+class PasswordHashPool:
+    """
+    Worker pool สำหรับงาน hash password ที่กิน CPU ไม่ให้รันบน event loop
+    - จำกัดงานที่รอได้ไม่เกิน max_queue ถ้าเต็มจะตอบ 503 ทันที (load shedding)
+    - เก็บ queue depth, จำนวนงานที่ถูกปฏิเสธ และ latency ไว้ดูผ่าน metrics
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 1, max_queue: int = 4):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported PASSWORD_HASH_EXECUTOR: {kind}")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.hash_seconds = Histogram()
+        self.wait_seconds = Histogram()
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.workers)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(self._get_executor(), _timed_call, fn, *args)
+        finally:
+            self._pending -= 1
+
+        self.completed += 1
+        self.hash_seconds.observe(elapsed)
+        record_password_hash(elapsed)
+        self.wait_seconds.observe(max(0.0, time.perf_counter() - start - elapsed))
+        return result
+
+    async def map(self, fn, items, concurrency: int = None):
+        """
+        รันงานจำนวนมาก (เช่น bulk import) โดยส่งเข้า executor ครั้งละไม่เกิน concurrency งาน
+        ตัวเองไม่ถูกปฏิเสธ แต่นับรวมใน _pending เพื่อให้ admission control ของ run() เห็นงานที่ค้างอยู่
+        login/signup ระหว่าง import จึงได้ 503 แทนการรอคิวนานไม่จำกัด
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        semaphore = asyncio.Semaphore(concurrency or self.workers)
+
+        async def _run(args):
+            async with semaphore:
+                self._pending += 1
+                try:
+                    result, elapsed = await loop.run_in_executor(executor, _timed_call, fn, *args)
+                finally:
+                    self._pending -= 1
+            self.completed += 1
+            self.hash_seconds.observe(elapsed)
+            record_password_hash(elapsed)
+            return result
+
+        return await asyncio.gather(*(_run(args) for args in items))
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.workers),
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "hash_seconds": self.hash_seconds.snapshot(),
+            "queue_wait_seconds": self.wait_seconds.snapshot(),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+hash_pool = PasswordHashPool(
+    kind=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+)
+
+async def hash_password_async(password: str) -> str:
+    """hash password ใน worker pool (ไม่ block event loop)"""
+    return await hash_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """ตรวจ password ใน worker pool (ไม่ block event loop)"""
+    return await hash_pool.run(verify_password, plain_password, hashed_password)
+
 def validate_password(password: str) -> bool:
     """
     Validate password strength:
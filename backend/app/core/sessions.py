@@ -0,0 +1,200 @@
+import json
+import os
+import secrets
+from collections.abc import MutableMapping
+from typing import Optional
+from dotenv import load_dotenv
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection, Request
+from .cache import TTLCache, get_redis_client
+
+load_dotenv()
+
+# memory = LRU ใน process (worker เดียว), redis = แชร์ระหว่างหลาย worker
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(14 * 24 * 3600)))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_COOKIE = os.getenv("SESSION_COOKIE", "session")
+SESSION_SAME_SITE = os.getenv("SESSION_SAME_SITE", "lax")
+SESSION_HTTPS_ONLY = os.getenv("SESSION_HTTPS_ONLY", str(os.getenv("ENVIRONMENT") == "production")).lower() == "true"
+
+
+class MemorySessionStore:
+    """เก็บ session เป็น JSON ใน TTLCache (หมดอายุตาม ttl และไล่ตัวที่ไม่ได้ใช้นานสุดออกเมื่อเต็ม)"""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def load_nowait(self, session_id: str) -> Optional[dict]:
+        raw = self._cache.get(session_id)
+        return json.loads(raw) if raw is not None else None
+
+    async def load(self, session_id: str) -> Optional[dict]:
+        return self.load_nowait(session_id)
+
+    async def save(self, session_id: str, data: dict):
+        self._cache.set(session_id, json.dumps(data))
+
+    async def delete(self, session_id: str):
+        self._cache.delete(session_id)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisSessionStore:
+    def __init__(self, ttl: int, prefix: str = "collabboard:session:"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def load_nowait(self, session_id: str) -> Optional[dict]:
+        raise RuntimeError(
+            "request.session was used before it was loaded; add Depends(load_session) to the route "
+            "when SESSION_BACKEND=redis"
+        )
+
+    async def load(self, session_id: str) -> Optional[dict]:
+        raw = await get_redis_client().get(f"{self.prefix}{session_id}")
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def save(self, session_id: str, data: dict):
+        await get_redis_client().set(f"{self.prefix}{session_id}", json.dumps(data), ex=self.ttl)
+
+    async def delete(self, session_id: str):
+        await get_redis_client().delete(f"{self.prefix}{session_id}")
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def create_session_store():
+    if SESSION_BACKEND == "redis":
+        return RedisSessionStore(ttl=SESSION_TTL)
+    if SESSION_BACKEND == "memory":
+        return MemorySessionStore(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_TTL)
+    raise ValueError(f"Unsupported SESSION_BACKEND: {SESSION_BACKEND}")
+
+
+session_store = create_session_store()
+
+
+class LazySession(MutableMapping):
+    """
+    request.session ที่โหลดจาก store ครั้งแรกที่ถูกใช้ request ที่ไม่แตะ session จึงไม่ต้อง lookup เลย
+    บันทึกกลับเฉพาะเมื่อมีการ set/delete key (แก้ค่าข้างใน dict ที่อยู่ใน session จะไม่ถูกจับ)
+    """
+
+    def __init__(self, store, session_id: Optional[str]):
+        self.store = store
+        self.session_id = session_id
+        self.modified = False
+        self._data = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    def _set_loaded(self, data: Optional[dict]):
+        if data is None:
+            # id ที่ไม่มีใน store (หมดอายุหรือถูกปลอม) ไม่ใช้ต่อ จะได้ id ใหม่ตอนบันทึก
+            self.session_id = None
+        self._data = data or {}
+
+    async def load(self):
+        if self._data is None:
+            self._set_loaded(await self.store.load(self.session_id) if self.session_id else None)
+
+    def _ensure_loaded(self) -> dict:
+        if self._data is None:
+            self._set_loaded(self.store.load_nowait(self.session_id) if self.session_id else None)
+        return self._data
+
+    def __getitem__(self, key):
+        return self._ensure_loaded()[key]
+
+    def __setitem__(self, key, value):
+        self._ensure_loaded()[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self._ensure_loaded()[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self._ensure_loaded())
+
+    def __len__(self):
+        return len(self._ensure_loaded())
+
+    def data(self) -> dict:
+        return self._ensure_loaded()
+
+
+class ServerSessionMiddleware:
+    """
+    แทน SessionMiddleware ของ Starlette: cookie มีแค่ session id แบบสุ่ม (ไม่มีข้อมูล ไม่ต้อง sign/decode)
+    ข้อมูลอยู่ใน session_store และถูกเขียนกลับก่อนส่ง response เมื่อ session ถูกแก้ไขเท่านั้น
+    """
+
+    def __init__(
+        self,
+        app,
+        store=None,
+        cookie_name: str = SESSION_COOKIE,
+        max_age: int = SESSION_TTL,
+        same_site: str = SESSION_SAME_SITE,
+        https_only: bool = SESSION_HTTPS_ONLY,
+    ):
+        self.app = app
+        self.store = store or session_store
+        self.cookie_name = cookie_name
+        self.max_age = max_age
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        session_id = HTTPConnection(scope).cookies.get(self.cookie_name)
+        session = LazySession(self.store, session_id)
+        scope["session"] = session
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and session.modified:
+                headers = MutableHeaders(scope=message)
+                cookie = await self._commit(session)
+                if cookie:
+                    headers.append("Set-Cookie", cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _commit(self, session: LazySession) -> Optional[str]:
+        data = session.data()
+        if not data:
+            if session.session_id:
+                await self.store.delete(session.session_id)
+                return f"{self.cookie_name}=null; path=/; expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}"
+            return None
+
+        if not session.session_id:
+            session.session_id = secrets.token_urlsafe(32)
+        await self.store.save(session.session_id, data)
+        return f"{self.cookie_name}={session.session_id}; path=/; Max-Age={self.max_age}; {self.security_flags}"
+
+
+async def load_session(request: Request) -> LazySession:
+    """dependency สำหรับ route ที่ใช้ request.session: โหลดแบบ async ก่อน (จำเป็นเมื่อใช้ redis)"""
+    session = request.session
+    await session.load()
+    return session
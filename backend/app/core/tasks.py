@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# รอเท่านี้ก่อน start loop ใหม่หลังจากล้ม (กัน loop ที่ล้มทันทีวนกิน CPU)
+TASK_RESTART_DELAY = float(os.getenv("TASK_RESTART_DELAY", "5"))
+
+
+class SupervisedTask:
+    """
+    background loop ที่ต้องรันตลอดอายุของ process: ถ้าล้มหรือจบเองจะ log แล้ว start ใหม่หลัง restart_delay
+    (asyncio.create_task เฉย ๆ จะเงียบไปจนกว่า task ถูก garbage collect แล้ว log ว่า "never retrieved")
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Awaitable], restart_delay: float = TASK_RESTART_DELAY):
+        self.name = name
+        self.factory = factory
+        self.restart_delay = restart_delay
+        self.restarts = 0
+        self._task = None
+        self._restart_handle = None
+        self._stopping = False
+
+    def start(self):
+        # instance ระดับ module ใช้ซ้ำได้หลาย lifespan (เช่นใน test): start หลัง stop ได้
+        self._stopping = False
+        self._start()
+
+    def _start(self):
+        self._restart_handle = None
+        if self._stopping or self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self.factory(), name=self.name)
+        self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        if self._stopping or task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.error("background task %s crashed; restarting in %.0fs", self.name, self.restart_delay, exc_info=error)
+        else:
+            logger.warning("background task %s exited; restarting in %.0fs", self.name, self.restart_delay)
+        self.restarts += 1
+        self._restart_handle = asyncio.get_running_loop().call_later(self.restart_delay, self._start)
+
+    async def stop(self):
+        self._stopping = True
+        if self._restart_handle is not None:
+            self._restart_handle.cancel()
+            self._restart_handle = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                # ล้มไปแล้วก่อน stop และถูก log ใน _on_done แล้ว
+                pass
+            self._task = None
@@ -1,24 +1,90 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .database import engine, Base
-from starlette.middleware.sessions import SessionMiddleware
+from .database import (
+    DATABASE_REPLICA_URLS, DB_CREATE_ALL, DB_POOL_PREWARM, ReadYourWritesMiddleware, init_db, prewarm_pool,
+    dispose_engines, replica_monitor_task,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from .routes.auth import router as auth_router
-import os
+from .routes.users import router as users_router
+from .routes.rooms import router as rooms_router
+from .routes.boards import router as boards_router
+from .routes.files import router as files_router
+from .routes.search import router as search_router
+from .routes.stats import router as stats_router
+from .routes.metrics import router as metrics_router
+from .core.instrumentation import METRICS_ENABLED, MetricsMiddleware
+from .core.sessions import SESSION_BACKEND, ServerSessionMiddleware
+from .core.security import hash_pool
+from .core.deployment import require_shared_backend
+from .services.broadcast import BROADCAST_BACKEND, broadcast
+from .services.activity_log import activity_writer
+from .services.auth_service import password_rehash_writer
+from .services.board_service import compaction_task
+from .services.message_service import message_writer
+from .services.stats_service import reconcile_task
+from .services.oidc_metadata import oidc_refresh_task
+from .services.token_revocation import start_revocations, stop_revocations
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# สร้าง table ถ้ายังไม่มี
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # การเพิกถอน refresh token ไปถึง worker อื่นผ่าน broadcast เท่านั้น
+    require_shared_backend(
+        "BROADCAST_BACKEND", BROADCAST_BACKEND, ("memory",),
+        "refresh token revocations and room events do not reach the other workers, "
+        "so a rotated refresh token can still be replayed there",
+    )
+    # state/nonce ของ Google OAuth ต้องอ่านได้จาก worker ที่รับ callback
+    require_shared_backend(
+        "SESSION_BACKEND", SESSION_BACKEND, ("memory",),
+        "the OAuth state and nonce saved at /auth/google/login are missing when the callback "
+        "lands on another worker, so the login fails",
+    )
+    # สร้าง table ถ้ายังไม่มี (ปิดได้ด้วย DB_CREATE_ALL=false เพื่อให้ start เร็วขึ้น)
+    if DB_CREATE_ALL:
+        await init_db()
+    if DB_POOL_PREWARM > 0:
+        await prewarm_pool(DB_POOL_PREWARM)
+    await broadcast.connect()
+    await start_revocations()
+    background_tasks = [
+        compaction_task,
+        reconcile_task,
+        oidc_refresh_task,
+    ]
+    if DATABASE_REPLICA_URLS:
+        background_tasks.append(replica_monitor_task)
+    for task in background_tasks:
+        task.start()
+    message_writer.start()
+    password_rehash_writer.start()
+    activity_writer.start()
+    yield
+    for task in background_tasks:
+        await task.stop()
+    await message_writer.stop()
+    await password_rehash_writer.stop()
+    await activity_writer.stop()
+    await stop_revocations()
+    await broadcast.disconnect()
+    hash_pool.shutdown()
+    await dispose_engines()
 
 app = FastAPI(
     title="CollabBoard API",
     description="API for CollabBoard application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# Add session middleware for OAuth flow
-app.add_middleware(SessionMiddleware, secret_key=os.getenv("SESSION_SECRET"))
+# Add session middleware for OAuth flow (cookie มีแค่ session id ข้อมูลอยู่ใน SESSION_BACKEND)
+app.add_middleware(ServerSessionMiddleware)
+
+# ใส่ cookie read-your-writes ให้ response ของ request ที่เขียนฐานข้อมูล (ทุก worker อ่าน cookie เดียวกัน)
+app.add_middleware(ReadYourWritesMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -32,9 +98,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# เพิ่มเป็นตัวสุดท้ายเพื่อให้อยู่นอกสุด จับเวลารวม middleware อื่นด้วย
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# users router ต้องมาก่อน auth router เพื่อไม่ให้ /users/search ไปตรงกับ /users/{user_id}
+app.include_router(users_router)
 app.include_router(auth_router)
+app.include_router(rooms_router)
+app.include_router(boards_router)
+app.include_router(files_router)
+app.include_router(search_router)
+app.include_router(stats_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to CollabBoard backend 🎯"}
-
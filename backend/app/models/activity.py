@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
+from ..database import Base
+
+class UserActivity(Base):
+    """ประวัติ login/refresh/logout ของ user (เขียนเป็น batch จาก activity_writer ไม่ใช่ใน request)"""
+    __tablename__ = "user_activity"
+    __table_args__ = (
+        Index("ix_user_activity_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(20), nullable=False)
+    # เวลาที่เกิดเหตุการณ์จริง ไม่ใช่เวลาที่ flush
+    created_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from ..database import Base
+
+# JSONB บน PostgreSQL, JSON ธรรมดาบนฐานข้อมูลอื่น (เช่น SQLite ตอน dev/benchmark)
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+class Board(Base):
+    __tablename__ = "boards"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    head_seq = Column(BigInteger, nullable=False, default=0, server_default="0")      # seq ของ op ล่าสุด
+    snapshot_seq = Column(BigInteger, nullable=False, default=0, server_default="0")  # seq ของ snapshot ล่าสุด
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class BoardMember(Base):
+    __tablename__ = "board_members"
+
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    role = Column(String(20), nullable=False, default="editor")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class BoardOperation(Base):
+    """op log แบบ append-only เรียงตาม seq ต่อ board"""
+    __tablename__ = "board_operations"
+
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    op = Column(JSONType, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class BoardSnapshot(Base):
+    """state ของทุก element ณ seq หนึ่ง (ผลของการ compact op log)"""
+    __tablename__ = "board_snapshots"
+
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(BigInteger, primary_key=True)
+    elements = Column(JSONType, nullable=False)  # element_id -> element data
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
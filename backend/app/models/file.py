@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..database import Base
+
+class FileBlob(Base):
+    """เนื้อไฟล์บน disk แบบ content-addressed (ไฟล์ที่เนื้อหาเหมือนกันเก็บครั้งเดียว)"""
+    __tablename__ = "file_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SharedFile(Base):
+    __tablename__ = "shared_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=True, index=True)
+    name = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False, default="application/octet-stream")
+    sha256 = Column(String(64), ForeignKey("file_blobs.sha256"), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class FileUpload(Base):
+    """upload ที่ยังไม่เสร็จ (resume ได้) จำนวน byte ที่รับแล้วดูจากขนาดไฟล์ .part บน disk"""
+    __tablename__ = "file_uploads"
+
+    id = Column(String(32), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    board_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=True)
+    name = Column(String(255), nullable=False)
+    content_type = Column(String(255), nullable=False, default="application/octet-stream")
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, BigInteger, Text, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class Message(Base):
+    __tablename__ = "messages"
+    __table_args__ = (
+        # history เรียงด้วย (created_at, id) ต่อห้อง: keyset pagination เป็น index range scan ขนาด limit
+        # แล้วอ่าน heap เฉพาะแถวในหน้านั้น (ต้องการ body อยู่แล้ว index-only scan จึงไม่ได้ประโยชน์)
+        Index("ix_messages_room_created_id", "room_id", "created_at", "id"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    room_id = Column(Integer, ForeignKey("boards.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
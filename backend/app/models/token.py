@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime
+from ..database import Base
+
+class RevokedToken(Base):
+    """
+    refresh token ที่ถูกเพิกถอน (key = jti:<jti>, family:<fam> หรือ user:<id>)
+    token ที่ออกก่อนหรือเท่ากับ revoked_at ถือว่าใช้ไม่ได้ ลบได้เมื่อเลย expires_at (token หมดอายุเองแล้ว)
+    """
+    __tablename__ = "revoked_tokens"
+
+    key = Column(String(100), primary_key=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
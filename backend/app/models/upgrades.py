@@ -0,0 +1,25 @@
+# DDL ที่ create_all ไม่ทำให้กับ table ที่มีอยู่แล้ว (เช่น index หรือ column ที่เพิ่มทีหลัง)
+# ทุกคำสั่งต้องรันซ้ำได้ (IF NOT EXISTS) เพราะ init_db เรียกทุกครั้งที่ start
+POSTGRES_UPGRADES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_users_oauth_provider_oauth_id ON users (oauth_provider, oauth_id)",
+    # type-ahead: prefix search + keyset บน (lower(...) COLLATE "C", id)
+    # collation "C" ทำให้ LIKE 'abc%' ใช้ btree ได้แบบ text_pattern_ops และ ORDER BY ตามลำดับ index โดยไม่ต้อง sort
+    'CREATE INDEX IF NOT EXISTS ix_users_display_name_prefix ON users ((lower(display_name) COLLATE "C"), id)',
+    'CREATE INDEX IF NOT EXISTS ix_users_email_prefix ON users ((lower(email) COLLATE "C"), id)',
+    # fuzzy search: trigram GiST รองรับ ORDER BY display_name <-> :q (KNN) จาก index
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_users_display_name_trgm ON users USING gist (display_name gist_trgm_ops)",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login_at TIMESTAMPTZ",
+    # full-text search: tsvector แบบ generated column ถูกคำนวณใหม่เองทุก INSERT/UPDATE ของแถวนั้น
+    # ใช้ config 'simple' (ไม่ตัด stem) เพราะเนื้อหามีทั้งไทยและอังกฤษ ชื่อไฟล์แยกคำที่ . _ - ก่อน
+    # ครั้งแรกที่เพิ่ม column จะ rewrite ทั้ง table (lock) ควรรันนอกเวลาใช้งานบน table ที่ใหญ่แล้ว
+    "ALTER TABLE boards ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(name, ''))) STORED",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED",
+    "ALTER TABLE shared_files ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', translate(name, '._-', '   '))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_boards_search ON boards USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_search ON messages USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_shared_files_search ON shared_files USING gin (search_vector)",
+]
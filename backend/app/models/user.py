@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 from ..database import Base 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # lookup/upsert ตอน OAuth callback ใช้ (oauth_provider, oauth_id) เสมอ
+        Index("uq_users_oauth_provider_oauth_id", "oauth_provider", "oauth_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     oauth_provider = Column(String(20), nullable=True)
@@ -13,5 +17,7 @@ class User(Base):
     display_name = Column(String(100), nullable=False)
     avatar_url = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
+    # อัปเดตแบบ write-behind จาก activity_writer จึงอาจช้ากว่าการ login จริงเล็กน้อย
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
@@ -1,10 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from ..schemas.user import UserCreate, UserOut, LoginRequest
-from sqlalchemy.orm import Session
-from ..database import SessionLocal
-from ..core.security import validate_password,verify_password
-from ..services.auth_service import get_user_by_email, create_user,get_user_by_oauth_id, create_oauth_user
-from ..models.user import User
+from ..schemas.user import UserCreate, UserOut, LoginRequest, OAuthUserCreate
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import AsyncSessionLocal, get_async_db, get_read_db, is_replica_session
+from ..core.security import password_needs_update, validate_password, verify_password_async
+from ..services.auth_service import (
+    get_user_by_email_async,
+    create_user_async,
+    get_user_by_oauth_id_async,
+    upsert_oauth_user_async,
+    schedule_rehash,
+)
+from ..services.activity_log import ACTIVITY_LOGIN, ACTIVITY_LOGOUT, ACTIVITY_REFRESH, record_activity
+from ..services.oidc_metadata import oidc_cache
+from ..services.user_cache import get_user_profile
+from ..services.token_revocation import (
+    TOKEN_REUSED,
+    TOKEN_REVOKED,
+    announce_claim,
+    claim_refresh_token,
+    revoke_refresh_family,
+)
 from fastapi.responses import RedirectResponse, Response
 from authlib.integrations.starlette_client import OAuth
 from starlette.requests import Request
@@ -13,18 +28,12 @@ import os
 from dotenv import load_dotenv
 from authlib.common.security import generate_token
 from ..schemas.auth import TokenResponse, RefreshTokenRequest
+from ..core.sessions import load_session
 from ..core.jwt_auth import create_access_token, create_refresh_token, verify_token, get_current_user
 from fastapi.responses import JSONResponse
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 load_dotenv()
 config = Config() 
 oauth = OAuth(config)
@@ -34,17 +43,24 @@ config = Config(environ={
     "GOOGLE_CLIENT_SECRET": os.getenv("GOOGLE_CLIENT_SECRET"),
 })
 
+GOOGLE_METADATA_URL = os.getenv(
+    "OIDC_GOOGLE_METADATA_URL", "https://accounts.google.com/.well-known/openid-configuration"
+)
+
 oauth = OAuth(config)
 oauth.register(
     name="google",
     client_id=os.getenv("GOOGLE_CLIENT_ID"),
     client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
+    server_metadata_url=GOOGLE_METADATA_URL,
     client_kwargs={"scope": "openid email profile"},
 )
+# metadata/JWKS มาจาก cache ที่ prefetch และ refresh ใน background (ดู services/oidc_metadata.py)
+oidc_cache.register("google", GOOGLE_METADATA_URL)
+oidc_cache.attach("google", oauth.google)
 
 @router.post("/signup", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-async def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Register a new user
     try:
         # Validate password strength
@@ -55,7 +71,7 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
             )
         
         # Check if user already exists
-        existing_user = get_user_by_email(db, user.email)
+        existing_user = await get_user_by_email_async(db, user.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -63,7 +79,7 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
             )
         
         # Create new user
-        new_user = create_user(db, user)
+        new_user = await create_user_async(db, user)
 
         return UserOut(
             id=new_user.id,
@@ -85,18 +101,26 @@ async def signup(user: UserCreate, db: Session = Depends(get_db)):
         )
     
 @router.post("/login", response_model=TokenResponse)
-async def login(user: LoginRequest, db: Session = Depends(get_db)):
-    user_data = get_user_by_email(db, user.email)
+async def login(user: LoginRequest, db: AsyncSession = Depends(get_read_db)):
+    user_data = await get_user_by_email_async(db, user.email)
+    if not user_data and is_replica_session(db):
+        # user ที่เพิ่งสมัครอาจยังไม่ถูก replicate มา ลองที่ primary อีกครั้งก่อนตอบว่าไม่พบ
+        async with AsyncSessionLocal() as primary:
+            user_data = await get_user_by_email_async(primary, user.email)
     if not user_data:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
-    if not verify_password(user.password, user_data.password):
+    if not await verify_password_async(user.password, user_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
+    if password_needs_update(user_data.password):
+        # hash ยังเป็น scheme/cost เก่า: hash ใหม่ตอนนี้ ส่วน UPDATE เป็น batch ใน background
+        await schedule_rehash(user_data.id, user_data.password, user.password)
+    record_activity(user_data.id, ACTIVITY_LOGIN)
     user_id_str = str(user_data.id)
 
     # ส่ง user_data.id เป็น int ไปยัง create_access_token
@@ -127,9 +151,9 @@ async def login(user: LoginRequest, db: Session = Depends(get_db)):
     return response
     
 @router.get("/users/{user_id}", response_model=UserOut)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(user_id: int, db: AsyncSession = Depends(get_read_db)):
     # Get user by ID
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await get_user_profile(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -138,9 +162,9 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
     return user
 
 @router.get("/me", response_model=UserOut)
-async def get_current_user_info(current_user: dict = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_current_user_info(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
     """ดึงข้อมูล user ปัจจุบันจาก JWT token"""
-    user = db.query(User).filter(User.id == current_user["id"]).first()
+    user = await get_user_profile(db, current_user["id"])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -149,7 +173,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user),
     return user
 
 @router.post("/refresh", response_model=TokenResponse)
-async def refresh_token(request: Request, db: Session = Depends(get_db)):
+async def refresh_token(request: Request, db: AsyncSession = Depends(get_read_db)):
     """Refresh access token ด้วย refresh token"""
     refresh_token = request.cookies.get("refresh_token")
 
@@ -164,19 +188,35 @@ async def refresh_token(request: Request, db: Session = Depends(get_db)):
         user_id = int(user_id)
     except (ValueError, TypeError):
         raise HTTPException(status_code=401, detail="Invalid user ID")
-    
-    user = db.query(User).filter(User.id == user_id).first()
+
+    # ตรวจการเพิกถอนจากรายการในหน่วยความจำและ rotate token เดิมทิ้งทันที ก่อน await ใด ๆ
+    # (ถ้า consume หลัง await request ที่มาพร้อมกันด้วย token เดียวกันจะผ่านการตรวจทั้งคู่)
+    state, claim = claim_refresh_token(payload)
+    await announce_claim(claim)
+    if state == TOKEN_REUSED:
+        # token ที่ rotate ไปแล้วถูกใช้ซ้ำ: ถือว่ารั่ว เพิกถอนทั้ง family รวมถึง token ล่าสุดด้วย
+        await revoke_refresh_family(payload)
+        raise HTTPException(status_code=401, detail="Refresh token reuse detected")
+    if state == TOKEN_REVOKED:
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+
+    user = await get_user_profile(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="User is inactive")
+
+    # token ใหม่อยู่ใน family เดิม
+    record_activity(user.id, ACTIVITY_REFRESH)
     
     # สร้าง token ใหม่ - ส่ง user.id เป็น int ไปยัง create_access_token
     access_token = create_access_token(
         data={"sub": user.id, "email": user.email, "display_name": user.display_name}
     )
-    refresh_token = create_refresh_token(data={"sub": user.id})
+    refresh_token = create_refresh_token(data={"sub": user.id}, family=payload.get("fam"))
     
     response = JSONResponse(content={
         "message": "Token refreshed successfully",
@@ -207,15 +247,15 @@ async def refresh_token(request: Request, db: Session = Depends(get_db)):
     
     return response
 
-@router.get("/auth/google/login")
+@router.get("/auth/google/login", dependencies=[Depends(load_session)])
 async def google_login(request: Request):
     nonce = generate_token()
     request.session[f"{oauth.google.name}_nonce"] = nonce
     redirect_uri = request.url_for("google_callback")
     return await oauth.google.authorize_redirect(request, redirect_uri, nonce=nonce)
 
-@router.get("/auth/google/callback", name="google_callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
+@router.get("/auth/google/callback", name="google_callback", dependencies=[Depends(load_session)])
+async def google_callback(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         token = await oauth.google.authorize_access_token(request)
 
@@ -230,28 +270,26 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Nonce not found in session")
 
         user_info = await oauth.google.parse_id_token(token, nonce=nonce_from_session)
-        request.session["user"] = dict(user_info)
+        # เก็บเฉพาะ field ที่ใช้ต่อใน /auth/google/success (session อยู่ฝั่ง server แล้วแต่ไม่ต้องเก็บ claim ทั้งหมด)
+        request.session["user"] = {key: user_info.get(key) for key in ("sub", "email", "name", "picture")}
             
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Google authentication failed: {str(e)}"
         )
-    # ตรวจสอบว่าผู้ใช้เคย login ด้วย Google มาก่อนมั้ย
-    user = get_user_by_oauth_id(db, "google", user_info["sub"])
-
-    if not user:
-        user = create_oauth_user(
-            db,
-            UserCreate(
-                email=user_info["email"],
-                password="OauthGoogle123",       # ผ่าน validate_password
-                display_name=user_info["name"],
-                avatar_url=user_info["picture"],
-                oauth_provider="google",
-                oauth_id=user_info["sub"],
-            ),
-        )
+    # หา user ที่เคย login ด้วย Google หรือสร้างใหม่ใน query เดียว
+    user = await upsert_oauth_user_async(
+        db,
+        OAuthUserCreate(
+            email=user_info["email"],
+            display_name=user_info["name"],
+            avatar_url=user_info["picture"],
+            oauth_provider="google",
+            oauth_id=user_info["sub"],
+        ),
+    )
+    record_activity(user.id, ACTIVITY_LOGIN)
 
     access_token = create_access_token(
         data={"sub": user.id, "email": user.email, "display_name": user.display_name}
@@ -280,14 +318,14 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
     
     return response
 
-@router.get("/auth/google/success", response_model=TokenResponse)
-async def google_success(request: Request, db: Session = Depends(get_db)):
+@router.get("/auth/google/success", response_model=TokenResponse, dependencies=[Depends(load_session)])
+async def google_success(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Alternative: ส่งกลับ JSON response พร้อม tokens"""
     user_info = request.session.get("user")
     if not user_info:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    user = get_user_by_oauth_id(db, "google", user_info["sub"])
+    user = await get_user_by_oauth_id_async(db, "google", user_info["sub"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -308,7 +346,20 @@ async def google_success(request: Request, db: Session = Depends(get_db)):
     )
 
 @router.post("/logout")
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
+    refresh_token = request.cookies.get("refresh_token")
+    if refresh_token:
+        try:
+            payload = verify_token(refresh_token, "refresh")
+        except HTTPException:
+            payload = None
+        if payload:
+            # เพิกถอนทั้ง family เพื่อให้สำเนาของ refresh token ที่อาจหลุดไปใช้ต่อไม่ได้
+            await revoke_refresh_family(payload)
+            try:
+                record_activity(int(payload["sub"]), ACTIVITY_LOGOUT)
+            except (KeyError, ValueError, TypeError):
+                pass
     response.delete_cookie(key="access_token")
     response.delete_cookie(key="refresh_token")
     return {"message": "Logged out successfully"}
\ No newline at end of file
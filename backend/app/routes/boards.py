@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from ..core.jwt_auth import get_current_user
+from ..database import get_async_db
+from ..models.board import Board
+from ..schemas.board import BoardCreate, BoardMemberCreate, BoardOpOut, BoardOpsIn, BoardOut, BoardSyncOut
+from ..services.board_service import (
+    add_board_member,
+    append_ops,
+    create_board,
+    get_board_membership,
+    list_boards_for_user,
+    sync_board,
+)
+from ..services.room_hub import hub
+
+router = APIRouter(prefix="/boards", tags=["boards"])
+
+async def _get_member_board(db: AsyncSession, board_id: int, user_id: int, write: bool = False):
+    membership = await get_board_membership(db, board_id, user_id)
+    if not membership:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Board not found"
+        )
+    if write and membership.role == "viewer":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Read-only access to this board"
+        )
+    return await db.get(Board, board_id), membership
+
+@router.post("", response_model=BoardOut, status_code=status.HTTP_201_CREATED)
+async def create_new_board(board: BoardCreate, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return await create_board(db, board.name, current_user["id"])
+
+@router.get("", response_model=List[BoardOut])
+async def list_my_boards(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return await list_boards_for_user(db, current_user["id"])
+
+@router.post("/{board_id}/members", status_code=status.HTTP_204_NO_CONTENT)
+async def add_member(board_id: int, member: BoardMemberCreate, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    _, membership = await _get_member_board(db, board_id, current_user["id"])
+    if membership.role != "owner":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only the board owner can add members"
+        )
+    if member.user_id == current_user["id"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Owner is already a member"
+        )
+    try:
+        await add_board_member(db, board_id, member.user_id, member.role)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+@router.post("/{board_id}/ops", response_model=List[BoardOpOut])
+async def post_ops(board_id: int, body: BoardOpsIn, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """เพิ่ม op ต่อท้าย log แล้วกระจายให้คนในห้องของ board ผ่าน websocket"""
+    await _get_member_board(db, board_id, current_user["id"], write=True)
+    ops = await append_ops(db, board_id, current_user["id"], body.ops)
+    await hub.publish(str(board_id), {"type": "ops", "ops": [op.model_dump() for op in ops]})
+    return ops
+
+@router.get("/{board_id}/sync", response_model=BoardSyncOut)
+async def sync(
+    board_id: int,
+    since: int = Query(0, ge=0, description="seq ล่าสุดที่ client มีอยู่"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """ส่งเฉพาะ op ที่ client ยังไม่มี หรือ snapshot ล่าสุด + op ที่ตามมาถ้าช่องว่างใหญ่"""
+    board, _ = await _get_member_board(db, board_id, current_user["id"])
+    return await sync_board(db, board, since)
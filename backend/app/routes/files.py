@@ -0,0 +1,154 @@
+import os
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from typing import List, Optional
+from dotenv import load_dotenv
+from ..core.jwt_auth import get_current_user
+from ..database import get_async_db
+from ..models.file import FileUpload
+from ..schemas.file import FileUploadCreate, FileUploadOut, SharedFileOut
+from ..services.board_service import get_board_membership
+from ..services.file_service import (
+    UploadInProgress,
+    UploadOffsetMismatch,
+    UploadTooLarge,
+    abort_upload,
+    append_chunk,
+    blob_path,
+    complete_upload,
+    create_upload,
+    get_accessible_file,
+    list_accessible_files,
+    upload_offset,
+)
+
+load_dotenv()
+
+# ถ้าตั้งไว้ (เช่น "/protected-files/") จะตอบด้วย X-Accel-Redirect ให้ nginx ส่งไฟล์ด้วย sendfile เอง
+FILE_ACCEL_REDIRECT_PREFIX = os.getenv("FILE_ACCEL_REDIRECT_PREFIX")
+
+router = APIRouter(prefix="/files", tags=["files"])
+
+def _upload_out(upload: FileUpload, offset: int) -> FileUploadOut:
+    return FileUploadOut(id=upload.id, name=upload.name, size=upload.size, offset=offset)
+
+async def _get_own_upload(db: AsyncSession, upload_id: str, user_id: int) -> FileUpload:
+    upload = await db.get(FileUpload, upload_id)
+    if not upload or upload.owner_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return upload
+
+@router.post("/uploads", response_model=FileUploadOut, status_code=status.HTTP_201_CREATED)
+async def start_upload(upload: FileUploadCreate, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """เริ่ม upload แบบ resume ได้ แล้วส่งเนื้อไฟล์ด้วย PATCH /files/uploads/{id}"""
+    if upload.board_id is not None:
+        membership = await get_board_membership(db, upload.board_id, current_user["id"])
+        if not membership or membership.role == "viewer":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot share files on this board"
+            )
+    try:
+        db_upload = await create_upload(db, current_user["id"], upload)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File is too large"
+        )
+    return _upload_out(db_upload, 0)
+
+@router.get("/uploads/{upload_id}", response_model=FileUploadOut)
+async def get_upload(upload_id: str, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """offset ปัจจุบัน ใช้ตอน resume"""
+    upload = await _get_own_upload(db, upload_id, current_user["id"])
+    return _upload_out(upload, upload_offset(upload.id))
+
+@router.patch("/uploads/{upload_id}", response_model=FileUploadOut)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset_header: int = Header(..., alias="Upload-Offset", ge=0),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """ส่งเนื้อไฟล์ต่อจาก Upload-Offset (body แบบ stream) เมื่อครบขนาดจะสร้างไฟล์ให้ทันที"""
+    upload = await _get_own_upload(db, upload_id, current_user["id"])
+    try:
+        offset = await append_chunk(upload, upload_offset_header, request.stream())
+    except UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload-Offset does not match",
+            headers={"Upload-Offset": str(e.offset)}
+        )
+    except UploadInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another request is uploading to this file"
+        )
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Body exceeds the declared upload size"
+        )
+
+    result = _upload_out(upload, offset)
+    if offset == upload.size:
+        shared_file = await complete_upload(db, upload)
+        result.complete = True
+        result.file_id = shared_file.id
+    return result
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def cancel_upload(upload_id: str, current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    upload = await _get_own_upload(db, upload_id, current_user["id"])
+    await abort_upload(db, upload)
+
+@router.get("", response_model=List[SharedFileOut])
+async def list_files(board_id: Optional[int] = Query(None), current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return await list_accessible_files(db, current_user["id"], board_id)
+
+@router.get("/{file_id}")
+async def download_file(
+    file_id: int,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    ดาวน์โหลดไฟล์ (เจ้าของหรือสมาชิกของ board)
+    ETag คือ sha256 ของเนื้อไฟล์ รองรับ If-None-Match และ Range (จาก FileResponse)
+    """
+    shared_file = await get_accessible_file(db, file_id, current_user["id"])
+    if not shared_file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    await db.close()
+
+    etag = f'"{shared_file.sha256}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if FILE_ACCEL_REDIRECT_PREFIX:
+        sha256 = shared_file.sha256
+        headers["X-Accel-Redirect"] = f"{FILE_ACCEL_REDIRECT_PREFIX.rstrip('/')}/blobs/{sha256[:2]}/{sha256}"
+        headers["Content-Type"] = shared_file.content_type
+        headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(shared_file.name)}"
+        return Response(headers=headers)
+
+    return FileResponse(
+        blob_path(shared_file.sha256),
+        media_type=shared_file.content_type,
+        filename=shared_file.name,
+        headers=headers,
+    )
@@ -0,0 +1,94 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..core.instrumentation import render_request_metrics
+from ..database import replica_stats
+from ..core.metrics import render_stats
+from ..core.sessions import session_store
+from ..core.security import hash_pool
+from ..core.jwt_auth import token_cache
+from ..services.user_cache import user_cache
+from ..services.room_hub import hub
+from ..services.message_service import message_writer
+from ..services.activity_log import activity_writer
+from ..services.avatar_service import avatar_cache
+from ..services.auth_service import password_rehash_writer
+from ..services import token_revocation
+from ..services.oidc_metadata import oidc_cache
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """metrics ทั้งหมดในรูปแบบ Prometheus text (ต่อ route + ตัวเลขจาก endpoint JSON ด้านล่าง)"""
+    lines = []
+    render_request_metrics(lines)
+    render_stats(lines, "password_hash", hash_pool.stats())
+    render_stats(lines, "token_cache", token_cache.stats())
+    render_stats(lines, "user_cache", user_cache.stats())
+    render_stats(lines, "rooms", hub.stats())
+    render_stats(lines, "message_writer", message_writer.stats())
+    render_stats(lines, "password_rehash", password_rehash_writer.stats())
+    render_stats(lines, "activity_writer", activity_writer.stats())
+    render_stats(lines, "session_store", session_store.stats())
+    render_stats(lines, "token_revocations", token_revocation.revocations.stats())
+    render_stats(lines, "token_revocation_writer", token_revocation.revocation_writer.stats())
+    render_stats(lines, "db_replicas", replica_stats())
+    render_stats(lines, "avatar_cache", avatar_cache.stats())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/hashing")
+async def hashing_metrics():
+    """queue depth และ latency ของ password hashing pool"""
+    return {**hash_pool.stats(), "rehash": password_rehash_writer.stats()}
+
+@router.get("/token-cache")
+async def token_cache_metrics():
+    """hit/miss ของ cache token ที่ verify แล้ว"""
+    return token_cache.stats()
+
+@router.get("/user-cache")
+async def user_cache_metrics():
+    """hit/miss ของ user profile cache"""
+    return user_cache.stats()
+
+@router.get("/rooms")
+async def room_metrics():
+    """จำนวนห้อง/connection และ frame ที่ถูกทิ้งเพราะ client ช้า"""
+    return hub.stats()
+
+@router.get("/message-writer")
+async def message_writer_metrics():
+    """ข้อความที่รอเขียน, ที่ถูกทิ้งเพราะ buffer เต็ม และเวลา flush"""
+    return message_writer.stats()
+
+@router.get("/revocations")
+async def revocation_metrics():
+    """ขนาดรายการเพิกถอน refresh token และสัดส่วนที่ bloom filter ตอบได้ทันที"""
+    return token_revocation.stats()
+
+@router.get("/sessions")
+async def session_metrics():
+    """hit/miss และขนาดของ server-side session store"""
+    return session_store.stats()
+
+@router.get("/oidc")
+async def oidc_metrics():
+    """อายุของ metadata/JWKS ที่ cache ไว้ต่อ provider และจำนวนครั้งที่ fetch/ล้มเหลว"""
+    return oidc_cache.stats()
+
+@router.get("/replicas")
+async def replica_metrics():
+    """lag ของ read replica แต่ละตัว (null = ต่อไม่ได้) และจำนวน user ที่ถูกบังคับอ่านจาก primary"""
+    return replica_stats()
+
+@router.get("/activity")
+async def activity_metrics():
+    """ขนาด buffer ของ activity log, จำนวนที่ถูกทิ้งเมื่อ buffer เต็ม และเวลา flush ต่อ batch"""
+    return activity_writer.stats()
+
+@router.get("/avatars")
+async def avatar_metrics():
+    """ขนาด disk cache ของ avatar, hit/miss และจำนวน fetch ที่ถูกรวมกับ request อื่น"""
+    return avatar_cache.stats()
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import re
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.jwt_auth import get_current_user, verify_token
+from ..database import get_async_db
+from ..schemas.message import MessageCreate, MessagePage
+from ..services.board_service import get_board_membership, member_board_ids
+from ..services.message_service import InvalidCursor, enqueue_message, get_message_page
+from ..services.room_hub import RoomConnection, hub
+
+router = APIRouter(tags=["rooms"])
+
+# ชื่อ channel ของ LISTEN/NOTIFY ยาวได้ไม่เกิน 63 bytes ("room:" + room_id)
+ROOM_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,48}$")
+# event ที่ client ส่งเองได้ (join/leave/ops/resync/batch มาจาก server เท่านั้น)
+CLIENT_EVENT_TYPES = {"chat", "cursor", "move"}
+
+def _authenticate_websocket(websocket: WebSocket):
+    """ตรวจ access_token cookie แบบเดียวกับ get_current_user คืน None ถ้าไม่ผ่าน"""
+    token = websocket.cookies.get("access_token")
+    if not token:
+        return None
+    try:
+        payload = verify_token(token, "access")
+        user_id = int(payload.get("sub"))
+    except (HTTPException, ValueError, TypeError):
+        return None
+    return {
+        "id": user_id,
+        "email": payload.get("email"),
+        "display_name": payload.get("display_name")
+    }
+
+def _accept_chat(room_id: str, user_id: int, event: dict) -> bool:
+    """ข้อความแชทในห้องของ board ถูกเก็บลง history (ผ่าน buffer ที่เขียนเป็น batch)"""
+    body = event.get("body")
+    if not isinstance(body, str) or not 0 < len(body) <= 4000:
+        return False
+    if room_id.isdigit():
+        row = enqueue_message(int(room_id), user_id, body)
+        if row is None:
+            return False
+        event["created_at"] = row["created_at"].isoformat()
+    return True
+
+@router.websocket("/ws/rooms/{room_id}")
+async def room_socket(websocket: WebSocket, room_id: str, db: AsyncSession = Depends(get_async_db)):
+    user = _authenticate_websocket(websocket)
+    if user is None or not ROOM_ID_PATTERN.match(room_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    # ห้องที่เป็นตัวเลขคือห้องของ board เข้าได้เฉพาะสมาชิก
+    if room_id.isdigit() and not await get_board_membership(db, int(room_id), user["id"]):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    # ไม่ต้องถือ connection ของฐานข้อมูลไว้ตลอดอายุของ socket
+    await db.close()
+
+    await websocket.accept()
+    connection = RoomConnection(websocket, user)
+    await hub.join(room_id, connection)
+    writer = asyncio.create_task(connection.run_writer())
+    await hub.publish(room_id, {"type": "join", "user_id": user["id"], "display_name": user["display_name"]})
+
+    try:
+        while True:
+            try:
+                event = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(event, dict) or event.get("type") not in CLIENT_EVENT_TYPES:
+                continue
+            # ไม่เชื่อตัวตนจาก client ใช้ค่าจาก token เสมอ
+            event["user_id"] = user["id"]
+            event["display_name"] = user["display_name"]
+            if event["type"] == "chat":
+                if not _accept_chat(room_id, user["id"], event):
+                    continue
+            await hub.publish(room_id, event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        writer.cancel()
+        await hub.publish(room_id, {"type": "leave", "user_id": user["id"]})
+        await hub.leave(room_id, connection)
+
+async def _require_member(db: AsyncSession, room_id: int, user_id: int):
+    if not await get_board_membership(db, room_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room not found"
+        )
+
+@router.get("/rooms")
+async def list_rooms(current_user: dict = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """จำนวน subscriber ของห้อง board ที่ผู้ใช้เป็นสมาชิกและเปิดอยู่ใน process นี้"""
+    counts = hub.subscriber_counts()
+    allowed = await member_board_ids(db, current_user["id"], [int(room_id) for room_id in counts if room_id.isdigit()])
+    return {"rooms": {room_id: count for room_id, count in counts.items() if room_id.isdigit() and int(room_id) in allowed}}
+
+@router.get("/rooms/{room_id}/presence")
+async def room_presence(
+    room_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    await _require_member(db, room_id, current_user["id"])
+    return {
+        "room_id": str(room_id),
+        "subscribers": hub.subscriber_count(str(room_id)),
+        "user_ids": sorted(hub.online_user_ids(str(room_id))),
+    }
+
+@router.get("/rooms/{room_id}/messages", response_model=MessagePage)
+async def message_history(
+    room_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """ประวัติข้อความของห้อง ใหม่ไปเก่า ใช้ next_cursor เพื่อโหลดหน้าถัดไป"""
+    await _require_member(db, room_id, current_user["id"])
+    try:
+        return await get_message_page(db, room_id, limit, cursor)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+@router.post("/rooms/{room_id}/messages", status_code=status.HTTP_202_ACCEPTED)
+async def post_message(
+    room_id: int,
+    message: MessageCreate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """ส่งข้อความโดยไม่ผ่าน websocket: กระจายให้คนในห้องทันที และเขียนลงฐานข้อมูลแบบ batch"""
+    await _require_member(db, room_id, current_user["id"])
+    row = enqueue_message(room_id, current_user["id"], message.body)
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Message buffer is full, please retry",
+            headers={"Retry-After": "1"}
+        )
+    await hub.publish(str(room_id), {
+        "type": "chat",
+        "user_id": current_user["id"],
+        "body": message.body,
+        "created_at": row["created_at"].isoformat(),
+    })
+    return {"created_at": row["created_at"]}
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from ..core.jwt_auth import get_current_user
+from ..database import get_read_db
+from ..schemas.search import SearchPage
+from ..services.search_service import SEARCH_KINDS, InvalidSearchCursor, SearchUnavailable, search_workspace
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+@router.get("", response_model=SearchPage)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
+    types: Optional[str] = Query(None, description="board,message,file คั่นด้วย comma (ค่าเริ่มต้นทั้งหมด)"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """ค้นหาทุกอย่างใน workspace ที่เข้าถึงได้ เรียงตามความเกี่ยวข้อง ใช้ next_cursor โหลดหน้าถัดไป"""
+    kinds = SEARCH_KINDS
+    if types:
+        kinds = tuple(kind.strip() for kind in types.split(",") if kind.strip())
+        if not set(kinds) <= set(SEARCH_KINDS):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"types must be a comma-separated subset of {', '.join(SEARCH_KINDS)}"
+            )
+    try:
+        return await search_workspace(db, current_user["id"], q, limit, cursor, kinds)
+    except InvalidSearchCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    except SearchUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Search requires PostgreSQL"
+        )
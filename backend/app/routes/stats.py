@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Depends
+from ..core.jwt_auth import get_current_user
+from ..services.stats_service import get_dashboard_stats
+
+router = APIRouter(tags=["stats"])
+
+@router.get("/stats")
+async def dashboard_stats(current_user: dict = Depends(get_current_user)):
+    """ตัวเลขบน dashboard จากตัวนับในหน่วยความจำ (ไม่ query ฐานข้อมูลต่อ request)"""
+    return get_dashboard_stats()
@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from typing import List, Optional
+from ..core.jwt_auth import get_current_user, require_admin
+from ..database import get_async_db, get_read_db
+from ..schemas.user import BulkImportResult, UserSearchPage, UserSummary
+from ..services.avatar_service import AVATAR_SIZES, AvatarUnavailable, avatar_cache, nearest_size
+from ..services.bulk_import import CSV, NDJSON, import_users, iter_stream_lines
+from ..services.user_cache import get_user_profile
+from ..services.user_directory import USER_BATCH_MAX_IDS, InvalidCursor, get_users_by_ids, search_users
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+# ETag เปลี่ยนเมื่อรูปต้นทางเปลี่ยน หลังหมดอายุ browser จึงแค่ revalidate ได้ 304 โดยไม่ต้องโหลดรูปใหม่
+AVATAR_CACHE_CONTROL = "private, max-age=86400, stale-while-revalidate=604800"
+
+@router.get("", response_model=List[UserSummary])
+async def get_users(
+    ids: str = Query(..., description="user id คั่นด้วย comma เช่น 1,2,3"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """ดึง user หลายคนใน query เดียว"""
+    try:
+        user_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if len(user_ids) > USER_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {USER_BATCH_MAX_IDS} ids per request"
+        )
+    return await get_users_by_ids(db, user_ids)
+
+@router.get("/search", response_model=UserSearchPage)
+async def search(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None),
+    fuzzy: bool = Query(False),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """type-ahead ค้นหาจากต้นชื่อ (หรือ email ถ้ามี @) ใช้ next_cursor โหลดหน้าถัดไป"""
+    try:
+        return await search_users(db, q, limit, cursor, fuzzy)
+    except InvalidCursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+@router.get("/{user_id}/avatar")
+async def get_avatar(
+    user_id: int,
+    request: Request,
+    size: int = Query(AVATAR_SIZES[-1], ge=1, description="ขนาดเป็น pixel ปัดขึ้นเป็นขนาดที่มีใน AVATAR_SIZES"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """รูป avatar ที่ย่อและ cache ไว้บน server แทนการโหลดรูปเต็มจาก provider ทุกครั้ง"""
+    user = await get_user_profile(db, user_id)
+    if not user or not user.avatar_url:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Avatar not found"
+        )
+    # ไม่ต้องถือ connection ไว้ระหว่างรอ provider
+    await db.close()
+
+    try:
+        path, etag = await avatar_cache.get(user.avatar_url, nearest_size(size))
+    except AvatarUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Avatar source unavailable"
+        )
+    headers = {"ETag": etag, "Cache-Control": AVATAR_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, media_type=avatar_cache.media_type, headers=headers)
+
+@router.post("/import", response_model=BulkImportResult)
+async def bulk_import_users(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", description="csv หรือ ndjson (ค่าเริ่มต้นดูจาก Content-Type)"),
+    current_user: dict = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """นำเข้า user จำนวนมากจาก body แบบ stream (CSV มี header หรือ NDJSON) เฉพาะผู้ดูแลใน ADMIN_USER_IDS"""
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = NDJSON if "ndjson" in content_type or "jsonl" in content_type else CSV
+    if fmt not in (CSV, NDJSON):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be 'csv' or 'ndjson'"
+        )
+
+    return await import_users(db, iter_stream_lines(request.stream()), fmt)
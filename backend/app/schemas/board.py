@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+from datetime import datetime
+
+class BoardCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=200)
+
+class BoardOut(BaseModel):
+    id: int
+    name: str
+    owner_id: int
+    head_seq: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class BoardMemberCreate(BaseModel):
+    user_id: int
+    role: Literal["editor", "viewer"] = "editor"
+
+class BoardOp(BaseModel):
+    op: Literal["upsert", "delete"]
+    element_id: str = Field(min_length=1, max_length=64)
+    data: Optional[dict] = None  # upsert: field ที่เปลี่ยน (merge เข้ากับ element เดิม)
+
+class BoardOpsIn(BaseModel):
+    ops: List[BoardOp] = Field(min_length=1, max_length=500)
+
+class BoardOpOut(BaseModel):
+    seq: int
+    user_id: Optional[int] = None
+    op: dict
+
+class BoardSnapshotOut(BaseModel):
+    seq: int
+    elements: Dict[str, dict]
+
+class BoardSyncOut(BaseModel):
+    board_id: int
+    head_seq: int
+    snapshot: Optional[BoardSnapshotOut] = None  # มีเมื่อช่องว่างใหญ่เกินกว่าจะส่ง op ทั้งหมด
+    ops: List[BoardOpOut]  # ไม่เกิน BOARD_SYNC_MAX_OPS ถ้า seq สุดท้าย < head_seq ให้ sync ต่อจาก seq นั้น
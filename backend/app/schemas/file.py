@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+class FileUploadCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    size: int = Field(ge=0)
+    content_type: str = "application/octet-stream"
+    board_id: Optional[int] = None
+
+class FileUploadOut(BaseModel):
+    id: str
+    name: str
+    size: int
+    offset: int
+    complete: bool = False
+    file_id: Optional[int] = None
+
+class SharedFileOut(BaseModel):
+    id: int
+    owner_id: int
+    board_id: Optional[int] = None
+    name: str
+    content_type: str
+    sha256: str
+    size: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
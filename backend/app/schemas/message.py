@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class MessageCreate(BaseModel):
+    body: str = Field(min_length=1, max_length=4000)
+
+class MessageOut(BaseModel):
+    id: int
+    room_id: int
+    user_id: Optional[int] = None
+    body: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class MessagePage(BaseModel):
+    messages: List[MessageOut]
+    next_cursor: Optional[str] = None  # ส่งกลับมาเป็น ?cursor= เพื่อโหลดข้อความที่เก่ากว่า
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class SearchHit(BaseModel):
+    kind: str                     # board, message หรือ file
+    id: int
+    board_id: Optional[int] = None
+    title: Optional[str] = None   # ชื่อ board/ไฟล์ (ข้อความแชทไม่มี)
+    snippet: str                  # HTML ที่ escape แล้ว คำที่ตรงกับคำค้นอยู่ใน <b>...</b> (แท็กเดียวที่มีได้)
+    rank: float
+    created_at: Optional[datetime] = None
+
+class SearchPage(BaseModel):
+    results: List[SearchHit]
+    next_cursor: Optional[str] = None
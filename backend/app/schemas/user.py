@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr 
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -33,4 +33,28 @@ class OAuthUserCreate(BaseModel):
 
 class LoginRequest(BaseModel):
     email: EmailStr
-    password: str
\ No newline at end of file
+    password: str
+
+class BulkImportError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    error: str
+
+class BulkImportResult(BaseModel):
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    errors: List[BulkImportError] = []
+
+class UserSummary(BaseModel):
+    id: int
+    email: EmailStr
+    display_name: str
+    avatar_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class UserSearchPage(BaseModel):
+    users: List[UserSummary]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,67 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import List
+from dotenv import load_dotenv
+from sqlalchemy import bindparam, insert, or_, update
+from ..database import AsyncSessionLocal, get_async_engine
+from ..models.activity import UserActivity
+from ..models.user import User
+from .write_buffer import BatchWriter
+
+load_dotenv()
+
+ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "500"))
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "1"))
+ACTIVITY_MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "50000"))
+
+ACTIVITY_LOGIN = "login"
+ACTIVITY_REFRESH = "refresh"
+ACTIVITY_LOGOUT = "logout"
+
+
+async def _persist_activity(items: List[tuple]):
+    # ทุกเหตุการณ์เป็น INSERT หลายแถวคำสั่งเดียว ส่วน last_login_at เหลือค่าล่าสุดต่อ user แถวละหนึ่ง UPDATE
+    rows = [
+        {"user_id": user_id, "kind": kind, "created_at": datetime.fromtimestamp(at, tz=timezone.utc)}
+        for user_id, kind, at in items
+    ]
+    last_login = {}
+    for user_id, kind, at in items:
+        if kind == ACTIVITY_LOGIN and at > last_login.get(user_id, 0):
+            last_login[user_id] = at
+    users = User.__table__
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(UserActivity), rows)
+        if last_login:
+            # ไม่ย้อนเวลา: batch ที่ flush ช้ากว่า (เช่นจาก worker อื่น) จะไม่ทับค่าที่ใหม่กว่า
+            stmt = (
+                update(users)
+                .where(
+                    users.c.id == bindparam("b_id"),
+                    or_(users.c.last_login_at.is_(None), users.c.last_login_at < bindparam("b_at")),
+                )
+                # ไม่ใช่การแก้ profile: คง updated_at เดิม (ไม่อย่างนั้น onupdate จะตั้งเป็น now())
+                .values(last_login_at=bindparam("b_at"), updated_at=users.c.updated_at)
+            )
+            await db.execute(stmt, [
+                {"b_id": user_id, "b_at": datetime.fromtimestamp(at, tz=timezone.utc)}
+                for user_id, at in last_login.items()
+            ])
+        await db.commit()
+    # ไม่ต้องล้าง user cache: UserOut ไม่มี last_login_at และ updated_at คงเดิม profile ที่ cache ไว้จึงยังถูกต้อง
+
+
+activity_writer = BatchWriter(
+    "user-activity",
+    _persist_activity,
+    batch_size=ACTIVITY_BATCH_SIZE,
+    interval=ACTIVITY_FLUSH_INTERVAL,
+    max_pending=ACTIVITY_MAX_PENDING,
+)
+
+
+def record_activity(user_id: int, kind: str) -> bool:
+    """บันทึกเหตุการณ์ของ user โดยไม่แตะฐานข้อมูลใน request (คืน False ถ้า buffer เต็มและรายการถูกทิ้ง)"""
+    return activity_writer.add((user_id, kind, time.time()))
@@ -1,7 +1,22 @@
+import os
+from typing import List
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from ..database import AsyncSessionLocal, dialect_insert, get_async_engine
 from ..models.user import User
 from ..schemas.user import UserCreate,OAuthUserCreate
-from ..core.security import hash_password
+from ..core.security import hash_password, hash_password_async
+from .token_revocation import revoke_user_tokens
+from .user_cache import invalidate_user
+from .write_buffer import BatchWriter
+
+load_dotenv()
+
+PASSWORD_REHASH_BATCH = int(os.getenv("PASSWORD_REHASH_BATCH", "100"))
+PASSWORD_REHASH_INTERVAL = float(os.getenv("PASSWORD_REHASH_INTERVAL", "1"))
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
@@ -39,3 +54,125 @@ def create_oauth_user(db: Session, user: OAuthUserCreate):
     db.commit()
     db.refresh(db_user)
     return db_user
+
+
+# เวอร์ชัน async สำหรับ route handlers (AsyncSession + asyncpg)
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def get_user_by_id_async(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
+
+async def create_user_async(db: AsyncSession, user: UserCreate):
+    hashed_password = await hash_password_async(user.password)
+    db_user = User(
+        email=user.email,
+        password=hashed_password,
+        oauth_provider=user.oauth_provider,
+        oauth_id=user.oauth_id,
+        display_name=user.display_name,
+        avatar_url=user.avatar_url
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    await invalidate_user(db_user.id)
+    return db_user
+
+async def get_user_by_oauth_id_async(db: AsyncSession, provider: str, oauth_id: str):
+    result = await db.execute(
+        select(User).where(
+            User.oauth_provider == provider,
+            User.oauth_id == oauth_id
+        )
+    )
+    return result.scalars().first()
+
+async def create_oauth_user_async(db: AsyncSession, user: OAuthUserCreate):
+    db_user = User(
+        email=user.email,
+        display_name=user.display_name,
+        avatar_url=user.avatar_url,
+        oauth_provider=user.oauth_provider,
+        oauth_id=user.oauth_id
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    await invalidate_user(db_user.id)
+    return db_user
+
+async def upsert_oauth_user_async(db: AsyncSession, user: OAuthUserCreate):
+    """
+    หา user จาก (oauth_provider, oauth_id) หรือสร้างใหม่ใน round trip เดียว
+    INSERT ... ON CONFLICT DO UPDATE ... RETURNING ไม่ race เมื่อ callback ของ user ใหม่มาพร้อมกัน
+    """
+    stmt = dialect_insert(db, User).values(
+        email=user.email,
+        display_name=user.display_name,
+        avatar_url=user.avatar_url,
+        oauth_provider=user.oauth_provider,
+        oauth_id=user.oauth_id
+    )
+    # update แบบไม่เปลี่ยนค่า เพื่อให้ RETURNING คืนแถวเดิมเมื่อมี user อยู่แล้ว
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.oauth_provider, User.oauth_id],
+        set_={"oauth_id": stmt.excluded.oauth_id},
+    ).returning(User)
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    db_user = result.scalars().one()
+    await db.commit()
+    return db_user
+
+
+async def deactivate_user_async(db: AsyncSession, user_id: int):
+    """ปิดบัญชี: refresh token เดิมทุกตัวใช้ไม่ได้ทันทีในทุก worker โดยไม่ต้องตรวจฐานข้อมูลตอน refresh"""
+    await db.execute(update(User).where(User.id == user_id).values(is_active=False))
+    await db.commit()
+    await invalidate_user(user_id)
+    await revoke_user_tokens(user_id)
+
+
+async def _rehash_passwords(items: List[tuple]):
+    # hash ใหม่ถูกคำนวณตอน login แล้ว (buffer ไม่มี password จริง) ที่นี่แค่ UPDATE เป็น executemany เดียว
+    # เงื่อนไข password = hash เดิม กันไม่ให้ทับ password ที่ถูกเปลี่ยนระหว่างรอ flush
+    latest = {user_id: (old_hash, new_hash) for user_id, old_hash, new_hash in items}
+    rows = [
+        {"b_id": user_id, "b_old": old_hash, "b_new": new_hash}
+        for user_id, (old_hash, new_hash) in latest.items()
+    ]
+    users = User.__table__
+    stmt = (
+        update(users)
+        .where(users.c.id == bindparam("b_id"), users.c.password == bindparam("b_old"))
+        # hash เดิมกับใหม่คือ password เดียวกัน: คง updated_at เดิม (onupdate จะตั้งเป็น now() ถ้าไม่ระบุ)
+        .values(password=bindparam("b_new"), updated_at=users.c.updated_at)
+    )
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        await db.execute(stmt, rows)
+        await db.commit()
+
+
+password_rehash_writer = BatchWriter(
+    "password-rehash",
+    _rehash_passwords,
+    batch_size=PASSWORD_REHASH_BATCH,
+    interval=PASSWORD_REHASH_INTERVAL,
+    max_pending=PASSWORD_REHASH_BATCH * 10,
+)
+
+
+async def schedule_rehash(user_id: int, old_hash: str, plain_password: str) -> bool:
+    """
+    rehash password ด้วย scheme/cost ปัจจุบันหลัง login สำเร็จ: hash ใหม่ใน hash_pool แล้วเข้าคิวแค่ hash
+    (password จริงไม่ค้างใน buffer) ส่วน UPDATE เป็น batch ใน background
+    pool หรือ buffer เต็มก็ข้ามไป login ไม่ล้ม แล้ว rehash ใน login ครั้งหน้า
+    """
+    try:
+        new_hash = await hash_password_async(plain_password)
+    except HTTPException:
+        return False
+    return password_rehash_writer.add((user_id, old_hash, new_hash))
@@ -0,0 +1,278 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+import httpx
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+from starlette.concurrency import run_in_threadpool
+from ..core.metrics import Histogram
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AVATAR_CACHE_DIR = os.path.abspath(os.getenv("AVATAR_CACHE_DIR", "storage/avatars"))
+AVATAR_CACHE_MAX_BYTES = int(os.getenv("AVATAR_CACHE_MAX_BYTES", str(256 * 1024 ** 2)))
+AVATAR_SIZES = sorted({int(size) for size in os.getenv("AVATAR_SIZES", "32,64,128,256").split(",") if size.strip()})
+# รูปต้นทางที่โหลดแล้วใช้ซ้ำได้นานเท่านี้ก่อนโหลดใหม่ (provider อาจเปลี่ยนรูปโดยใช้ URL เดิม)
+AVATAR_SOURCE_TTL = float(os.getenv("AVATAR_SOURCE_TTL", str(7 * 24 * 3600)))
+AVATAR_MAX_SOURCE_BYTES = int(os.getenv("AVATAR_MAX_SOURCE_BYTES", str(5 * 1024 ** 2)))
+AVATAR_FETCH_TIMEOUT = float(os.getenv("AVATAR_FETCH_TIMEOUT", "5"))
+# avatar_url มาจาก user ได้ (signup) จึงโหลดเฉพาะ host ที่อนุญาต (ตรงตัวหรือ subdomain) กัน SSRF
+AVATAR_ALLOWED_HOSTS = [
+    host.strip().lower() for host in os.getenv("AVATAR_ALLOWED_HOSTS", "googleusercontent.com").split(",") if host.strip()
+]
+AVATAR_FORMAT = os.getenv("AVATAR_FORMAT", "webp").lower()
+
+_MEDIA_TYPES = {"webp": "image/webp", "png": "image/png", "jpeg": "image/jpeg"}
+
+
+class AvatarUnavailable(Exception):
+    pass
+
+
+def nearest_size(size: int) -> int:
+    """ขนาดที่เล็กที่สุดใน AVATAR_SIZES ที่ไม่เล็กกว่าที่ขอ (ขอใหญ่เกินได้ขนาดใหญ่สุด)"""
+    for candidate in AVATAR_SIZES:
+        if candidate >= size:
+            return candidate
+    return AVATAR_SIZES[-1]
+
+
+def _host_allowed(url: str) -> bool:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        return False
+    return any(host == allowed or host.endswith("." + allowed) for allowed in AVATAR_ALLOWED_HOSTS)
+
+
+def _render_variants(source: bytes, sizes: List[int], fmt: str) -> Dict[int, bytes]:
+    """ตัดเป็นสี่เหลี่ยมจัตุรัสกลางรูปแล้วย่อเป็นทุกขนาดจากการ decode ครั้งเดียว"""
+    image = Image.open(io.BytesIO(source))
+    # JPEG decode ที่ความละเอียดต่ำลงได้เลย (เร็วกว่าและใช้หน่วยความจำน้อยกว่า decode เต็มแล้วค่อยย่อ)
+    image.draft("RGB", (sizes[-1], sizes[-1]))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha and fmt != "jpeg" else "RGB")
+    variants = {}
+    for size in sorted(sizes, reverse=True):
+        resized = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        output = io.BytesIO()
+        resized.save(output, format=fmt.upper(), quality=85)
+        variants[size] = output.getvalue()
+    return variants
+
+
+class DiskLRU:
+    """
+    ไฟล์ใน directory ที่จำกัดขนาดรวมไม่เกิน max_bytes ไล่ไฟล์ที่ไม่ได้ใช้นานสุดออกก่อน
+    ลำดับการใช้งานอยู่ในหน่วยความจำ (ตอน start เรียงตาม mtime) แต่ละ worker นับขนาดของตัวเอง
+    ไฟล์จึงอาจหายไปเพราะ worker อื่นไล่ออก get ถือว่าเป็น miss ให้ผู้เรียกสร้างใหม่
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name[:2], name)
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            found = []
+            for root, _, files in os.walk(self.directory):
+                for file_name in files:
+                    if file_name.endswith(".tmp"):
+                        continue
+                    stat = os.stat(os.path.join(root, file_name))
+                    found.append((stat.st_mtime, file_name, stat.st_size))
+            for _, file_name, size in sorted(found):
+                self._entries[file_name] = size
+                self.total_bytes += size
+            self._loaded = True
+
+    def get(self, name: str) -> Optional[str]:
+        """
+        path ของไฟล์ถ้ายังอยู่บน disk (ดูที่ disk ไม่ใช่แค่ index: worker อื่นที่ใช้ directory เดียวกัน
+        อาจไล่ไฟล์ออกไปแล้ว หรือเขียนไฟล์ใหม่ที่ index ของ worker นี้ยังไม่รู้จัก)
+        """
+        path = self._path(name)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.total_bytes -= self._entries.pop(name, 0)
+            return None
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+        return path
+
+    def put(self, name: str, data: bytes) -> str:
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # เขียนไฟล์ชั่วคราวแล้ว rename จะได้ไม่มีใครอ่านไฟล์ที่เขียนไม่ครบ
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            evicted = []
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_name, old_size = self._entries.popitem(last=False)
+                self.total_bytes -= old_size
+                self.evictions += 1
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.remove(self._path(old_name))
+            except FileNotFoundError:
+                pass
+        return path
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AvatarCache:
+    """
+    proxy ของรูป avatar จาก provider: โหลดต้นทางครั้งเดียวต่อ URL แล้วเก็บทุกขนาดไว้บน disk
+    - ไฟล์ตั้งชื่อตาม sha256 ของรูปต้นทาง + ขนาด (content-addressed) จึงใช้เป็น ETag แบบ strong ได้
+    - URL -> sha256 ของต้นทางเก็บใน refs/ (mtime = เวลาที่โหลด) worker ที่ start ใหม่จึงไม่ต้องโหลดซ้ำ
+    - request พร้อมกันของ URL เดียวกันรอ fetch เดียวกัน (future ต่อ URL)
+    """
+
+    def __init__(self, directory: str = AVATAR_CACHE_DIR, max_bytes: int = AVATAR_CACHE_MAX_BYTES, transport=None):
+        self.directory = directory
+        self.files = DiskLRU(os.path.join(directory, "variants"), max_bytes)
+        self.transport = transport
+        self.media_type = _MEDIA_TYPES[AVATAR_FORMAT]
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.deduplicated = 0
+        self.failures = 0
+        self.fetch_seconds = Histogram()
+        self.resize_seconds = Histogram()
+
+    def _ref_path(self, url_key: str) -> str:
+        return os.path.join(self.directory, "refs", url_key[:2], url_key)
+
+    @staticmethod
+    def _variant_name(digest: str, size: int) -> str:
+        return f"{digest}-{size}.{AVATAR_FORMAT}"
+
+    def _lookup(self, url_key: str, size: int) -> Optional[tuple]:
+        ref_path = self._ref_path(url_key)
+        try:
+            if time.time() - os.path.getmtime(ref_path) > AVATAR_SOURCE_TTL:
+                return None
+            with open(ref_path) as file:
+                digest = file.read().strip()
+        except FileNotFoundError:
+            return None
+        path = self.files.get(self._variant_name(digest, size))
+        return (path, digest) if path else None
+
+    async def _fetch_source(self, url: str) -> bytes:
+        start = time.perf_counter()
+        async with httpx.AsyncClient(timeout=AVATAR_FETCH_TIMEOUT, transport=self.transport) as client:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                chunks, received = [], 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > AVATAR_MAX_SOURCE_BYTES:
+                        raise AvatarUnavailable("avatar source is too large")
+                    chunks.append(chunk)
+        self.fetch_seconds.observe(time.perf_counter() - start)
+        return b"".join(chunks)
+
+    def _store(self, url_key: str, source: bytes) -> str:
+        digest = hashlib.sha256(source).hexdigest()
+        start = time.perf_counter()
+        variants = _render_variants(source, AVATAR_SIZES, AVATAR_FORMAT)
+        self.resize_seconds.observe(time.perf_counter() - start)
+        for size, data in variants.items():
+            self.files.put(self._variant_name(digest, size), data)
+        ref_path = self._ref_path(url_key)
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        with open(ref_path, "w") as file:
+            file.write(digest)
+        return digest
+
+    async def _refresh(self, url_key: str, url: str) -> str:
+        self.fetches += 1
+        try:
+            source = await self._fetch_source(url)
+            return await run_in_threadpool(self._store, url_key, source)
+        except AvatarUnavailable:
+            self.failures += 1
+            raise
+        except (httpx.HTTPError, OSError, Image.DecompressionBombError) as e:
+            self.failures += 1
+            logger.warning("avatar fetch from %s failed: %s", url, e)
+            raise AvatarUnavailable(str(e)) from e
+
+    async def get(self, url: str, size: int) -> tuple:
+        """คืน (path ของไฟล์, ETag) ของ avatar ขนาด size (ต้องอยู่ใน AVATAR_SIZES)"""
+        if not _host_allowed(url):
+            raise AvatarUnavailable("avatar host is not allowed")
+        await run_in_threadpool(self.files.load)
+        url_key = hashlib.sha256(url.encode()).hexdigest()
+        found = await run_in_threadpool(self._lookup, url_key, size)
+        if found is None:
+            self.misses += 1
+            future = self._inflight.get(url_key)
+            if future is None:
+                future = asyncio.ensure_future(self._refresh(url_key, url))
+                self._inflight[url_key] = future
+                future.add_done_callback(lambda done: self._inflight.pop(url_key, None))
+            else:
+                self.deduplicated += 1
+            # shield: request ที่ถูกยกเลิกไม่ยกเลิก fetch ที่ request อื่นรออยู่
+            digest = await asyncio.shield(future)
+            path = await run_in_threadpool(self.files.get, self._variant_name(digest, size))
+            if path is None:
+                raise AvatarUnavailable("avatar variant was evicted")
+        else:
+            self.hits += 1
+            path, digest = found
+        return path, f'"{self._variant_name(digest, size)}"'
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self.files),
+            "bytes": self.files.total_bytes,
+            "max_bytes": self.files.max_bytes,
+            "evictions": self.files.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "deduplicated": self.deduplicated,
+            "failures": self.failures,
+            "inflight": len(self._inflight),
+            "fetch_seconds": self.fetch_seconds.snapshot(),
+            "resize_seconds": self.resize_seconds.snapshot(),
+        }
+
+
+avatar_cache = AvatarCache()
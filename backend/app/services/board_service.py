@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from ..core.tasks import SupervisedTask
+from ..database import AsyncSessionLocal, dialect_insert, get_async_engine
+from ..models.board import Board, BoardMember, BoardOperation, BoardSnapshot
+from ..schemas.board import BoardOp, BoardOpOut, BoardSnapshotOut, BoardSyncOut
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ถ้า client ตามหลังไม่เกินนี้ ส่งเฉพาะ op ที่ขาด ไม่เช่นนั้นส่ง snapshot + op หลัง snapshot
+BOARD_SYNC_MAX_OPS = int(os.getenv("BOARD_SYNC_MAX_OPS", "1000"))
+# compact เมื่อมี op ใหม่หลัง snapshot ล่าสุดถึงจำนวนนี้
+BOARD_SNAPSHOT_EVERY = int(os.getenv("BOARD_SNAPSHOT_EVERY", "500"))
+BOARD_SNAPSHOT_KEEP = max(1, int(os.getenv("BOARD_SNAPSHOT_KEEP", "2")))
+BOARD_COMPACTION_INTERVAL = float(os.getenv("BOARD_COMPACTION_INTERVAL", "30"))
+# จำนวน op ที่อ่านต่อรอบตอน compact (ไม่โหลดทั้ง log เข้าหน่วยความจำ)
+BOARD_COMPACTION_CHUNK = 5000
+
+# board ที่ sync เจอว่ายังไม่มี snapshot ที่ใช้ได้: ให้ compaction loop ทำรอบถัดไปทันทีไม่ต้องรอ interval
+_compaction_requested = set()
+_compaction_wakeup = asyncio.Event()
+
+
+def apply_op(elements: dict, op: dict):
+    """ใช้ op หนึ่งตัวกับ state ของ board (แก้ dict เดิม)"""
+    element_id = op["element_id"]
+    if op["op"] == "delete":
+        elements.pop(element_id, None)
+    else:
+        elements[element_id] = {**elements.get(element_id, {}), **(op.get("data") or {})}
+
+
+def _apply_ops(elements: dict, ops: List[dict]):
+    for op in ops:
+        apply_op(elements, op)
+
+
+def request_compaction(board_id: int):
+    """ขอให้ background loop compact board นี้ (ไม่ replay op log ใน request)"""
+    _compaction_requested.add(board_id)
+    _compaction_wakeup.set()
+
+
+async def create_board(db: AsyncSession, name: str, owner_id: int) -> Board:
+    board = Board(name=name, owner_id=owner_id)
+    db.add(board)
+    await db.flush()
+    db.add(BoardMember(board_id=board.id, user_id=owner_id, role="owner"))
+    await db.commit()
+    await db.refresh(board)
+    return board
+
+
+async def list_boards_for_user(db: AsyncSession, user_id: int) -> List[Board]:
+    result = await db.execute(
+        select(Board)
+        .join(BoardMember, BoardMember.board_id == Board.id)
+        .where(BoardMember.user_id == user_id)
+        .order_by(Board.id)
+    )
+    return list(result.scalars())
+
+
+async def get_board_membership(db: AsyncSession, board_id: int, user_id: int) -> Optional[BoardMember]:
+    return await db.get(BoardMember, (board_id, user_id))
+
+
+async def member_board_ids(db: AsyncSession, user_id: int, board_ids: List[int]) -> set:
+    """board_ids ที่ user เป็นสมาชิก (query เดียว)"""
+    if not board_ids:
+        return set()
+    result = await db.execute(
+        select(BoardMember.board_id).where(BoardMember.user_id == user_id, BoardMember.board_id.in_(board_ids))
+    )
+    return set(result.scalars())
+
+
+async def add_board_member(db: AsyncSession, board_id: int, user_id: int, role: str) -> BoardMember:
+    stmt = dialect_insert(db, BoardMember).values(board_id=board_id, user_id=user_id, role=role)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BoardMember.board_id, BoardMember.user_id],
+        set_={"role": stmt.excluded.role},
+    )
+    await db.execute(stmt)
+    await db.commit()
+    return await db.get(BoardMember, (board_id, user_id), populate_existing=True)
+
+
+async def append_ops(db: AsyncSession, board_id: int, user_id: int, ops: List[BoardOp]) -> List[BoardOpOut]:
+    """
+    จอง seq ด้วย UPDATE ... RETURNING (row lock ของ board ทำให้ผู้เขียนพร้อมกันได้ seq ไม่ซ้ำ)
+    แล้ว insert op ทั้งหมดใน statement เดียว
+    """
+    result = await db.execute(
+        update(Board)
+        .where(Board.id == board_id)
+        .values(head_seq=Board.head_seq + len(ops))
+        .returning(Board.head_seq)
+    )
+    head_seq = result.scalar_one()
+    first_seq = head_seq - len(ops) + 1
+
+    rows = [
+        {"board_id": board_id, "seq": first_seq + i, "user_id": user_id, "op": op.model_dump(exclude_none=True)}
+        for i, op in enumerate(ops)
+    ]
+    await db.execute(dialect_insert(db, BoardOperation).values(rows))
+    await db.commit()
+    return [BoardOpOut(seq=row["seq"], user_id=user_id, op=row["op"]) for row in rows]
+
+
+async def _ops_after(db: AsyncSession, board_id: int, after_seq: int) -> List[BoardOpOut]:
+    # จำกัดจำนวนเสมอ: ถ้ามี op เข้ามาระหว่าง sync client จะเห็น seq สุดท้าย < head_seq แล้ว sync ต่อ
+    result = await db.execute(
+        select(BoardOperation.seq, BoardOperation.user_id, BoardOperation.op)
+        .where(BoardOperation.board_id == board_id, BoardOperation.seq > after_seq)
+        .order_by(BoardOperation.seq)
+        .limit(BOARD_SYNC_MAX_OPS)
+    )
+    return [BoardOpOut(seq=seq, user_id=user_id, op=op) for seq, user_id, op in result]
+
+
+async def _latest_snapshot(db: AsyncSession, board_id: int) -> Optional[BoardSnapshot]:
+    result = await db.execute(
+        select(BoardSnapshot)
+        .where(BoardSnapshot.board_id == board_id)
+        .order_by(BoardSnapshot.seq.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def sync_board(db: AsyncSession, board: Board, since_seq: int) -> BoardSyncOut:
+    """
+    คืนเฉพาะสิ่งที่ client ยังไม่มี ไม่เกิน BOARD_SYNC_MAX_OPS op ต่อครั้ง
+    - ตามหลังไม่เกิน BOARD_SYNC_MAX_OPS: op ที่ seq > since_seq
+    - ตามหลังมากกว่านั้น: snapshot ล่าสุด + op หลัง snapshot
+    - ยังไม่มี snapshot ที่ช่วยได้: op หน้าแรกหลัง since_seq (client sync ต่อเป็นหน้า ๆ)
+      และขอให้ compaction loop สร้าง snapshot ให้ sync ครั้งถัดไป
+    """
+    head_seq = board.head_seq
+    if since_seq < 0 or since_seq > head_seq:
+        since_seq = 0
+    if since_seq == head_seq:
+        return BoardSyncOut(board_id=board.id, head_seq=head_seq, ops=[])
+
+    if head_seq - since_seq > BOARD_SYNC_MAX_OPS:
+        snapshot = await _latest_snapshot(db, board.id)
+        if snapshot is None or head_seq - snapshot.seq > BOARD_SYNC_MAX_OPS:
+            request_compaction(board.id)
+        if snapshot is not None and snapshot.seq > since_seq:
+            return BoardSyncOut(
+                board_id=board.id,
+                head_seq=head_seq,
+                snapshot=BoardSnapshotOut(seq=snapshot.seq, elements=snapshot.elements),
+                ops=await _ops_after(db, board.id, snapshot.seq),
+            )
+
+    return BoardSyncOut(board_id=board.id, head_seq=head_seq, ops=await _ops_after(db, board.id, since_seq))
+
+
+async def compact_board(db: AsyncSession, board_id: int) -> Optional[int]:
+    """สร้าง snapshot ใหม่จาก snapshot ล่าสุด + op ที่ตามมา คืน seq ของ snapshot ใหม่"""
+    snapshot = await _latest_snapshot(db, board_id)
+    elements = dict(snapshot.elements) if snapshot else {}
+    seq = snapshot.seq if snapshot else 0
+
+    while True:
+        result = await db.execute(
+            select(BoardOperation.seq, BoardOperation.op)
+            .where(BoardOperation.board_id == board_id, BoardOperation.seq > seq)
+            .order_by(BoardOperation.seq)
+            .limit(BOARD_COMPACTION_CHUNK)
+        )
+        rows = result.all()
+        if rows:
+            # replay เป็น CPU ล้วน: ทำใน thread จะได้ไม่ block request อื่นบน event loop
+            await run_in_threadpool(_apply_ops, elements, [op for _, op in rows])
+            seq = rows[-1].seq
+        if len(rows) < BOARD_COMPACTION_CHUNK:
+            break
+
+    if snapshot is not None and seq == snapshot.seq:
+        return None
+
+    # หลาย worker อาจ compact board เดียวกันพร้อมกัน: snapshot ที่ seq ซ้ำถือว่าเหมือนกัน
+    await db.execute(
+        dialect_insert(db, BoardSnapshot)
+        .values(board_id=board_id, seq=seq, elements=elements)
+        .on_conflict_do_nothing(index_elements=[BoardSnapshot.board_id, BoardSnapshot.seq])
+    )
+    await db.execute(
+        update(Board).where(Board.id == board_id, Board.snapshot_seq < seq).values(snapshot_seq=seq)
+    )
+    # เก็บ snapshot ล่าสุดไว้ BOARD_SNAPSHOT_KEEP อัน (op log ไม่ถูกลบ)
+    result = await db.execute(
+        select(BoardSnapshot.seq)
+        .where(BoardSnapshot.board_id == board_id)
+        .order_by(BoardSnapshot.seq.desc())
+        .offset(BOARD_SNAPSHOT_KEEP - 1)
+        .limit(1)
+    )
+    oldest_kept = result.scalar()
+    if oldest_kept is not None:
+        await db.execute(
+            delete(BoardSnapshot).where(BoardSnapshot.board_id == board_id, BoardSnapshot.seq < oldest_kept)
+        )
+    await db.commit()
+    return seq
+
+
+async def compact_due_boards() -> int:
+    """compact board ที่มี op สะสมถึงเกณฑ์และที่ถูกขอผ่าน request_compaction คืนจำนวนที่ compact สำเร็จ"""
+    requested = list(_compaction_requested)
+    _compaction_requested.clear()
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Board.id).where(Board.head_seq - Board.snapshot_seq >= BOARD_SNAPSHOT_EVERY)
+        )
+        board_ids = list(dict.fromkeys(requested + list(result.scalars())))
+        compacted = 0
+        for board_id in board_ids:
+            # board ที่ล้ม (ข้อมูลเสีย/lock timeout) ไม่ทำให้ board ที่เหลือในรอบนี้ไม่ได้ compact
+            try:
+                await compact_board(db, board_id)
+                compacted += 1
+            except Exception:
+                await db.rollback()
+                logger.exception("Compaction of board %s failed", board_id)
+    return compacted
+
+
+async def run_compaction_loop():
+    """
+    background task (เริ่มใน lifespan): compact board ที่มี op สะสมถึงเกณฑ์ทุก BOARD_COMPACTION_INTERVAL
+    หรือเร็วกว่านั้นเมื่อ sync ขอผ่าน request_compaction
+    """
+    while True:
+        try:
+            await asyncio.wait_for(_compaction_wakeup.wait(), timeout=BOARD_COMPACTION_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _compaction_wakeup.clear()
+        try:
+            await compact_due_boards()
+        except Exception:
+            # ฐานข้อมูลมีปัญหาชั่วคราว: ลองใหม่รอบถัดไป
+            logger.exception("Board compaction failed")
+
+
+# lifespan start/stop: loop ที่ล้มจะถูก log และ start ใหม่
+compaction_task = SupervisedTask("board-compaction", run_compaction_loop)
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+from typing import Callable, Dict
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from ..database import get_async_database_url, get_async_engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# memory = process เดียว (dev), postgres = LISTEN/NOTIFY แชร์ระหว่างหลาย worker/instance
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory")
+BROADCAST_RECONNECT_SECONDS = float(os.getenv("BROADCAST_RECONNECT_SECONDS", "1"))
+# ต่อไม่ติดซ้ำ ๆ จะรอนานขึ้นเท่าตัวทุกครั้งแต่ไม่เกินค่านี้
+BROADCAST_RECONNECT_MAX_SECONDS = float(os.getenv("BROADCAST_RECONNECT_MAX_SECONDS", "30"))
+
+
+class BroadcastBackend:
+    """
+    interface ของ pub/sub ระหว่าง worker
+    แต่ละ worker subscribe channel ละครั้ง แล้วกระจาย message ต่อให้ socket ใน process เอง
+    """
+
+    # ขนาด message สูงสุด (bytes) ที่ publish ได้ในครั้งเดียว None = ไม่จำกัด
+    max_message_size = None
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def subscribe(self, channel: str, callback: Callable[[str], None]):
+        raise NotImplementedError
+
+    async def unsubscribe(self, channel: str):
+        raise NotImplementedError
+
+    async def publish(self, channel: str, message: str):
+        raise NotImplementedError
+
+
+class MemoryBroadcast(BroadcastBackend):
+    def __init__(self):
+        self._callbacks: Dict[str, Callable[[str], None]] = {}
+
+    async def subscribe(self, channel: str, callback: Callable[[str], None]):
+        self._callbacks[channel] = callback
+
+    async def unsubscribe(self, channel: str):
+        self._callbacks.pop(channel, None)
+
+    async def publish(self, channel: str, message: str):
+        callback = self._callbacks.get(channel)
+        if callback is not None:
+            callback(message)
+
+
+class PostgresBroadcast(BroadcastBackend):
+    """
+    ใช้ LISTEN/NOTIFY ของ PostgreSQL ตัวเดียวกับ DATABASE_URL
+    - listen ผ่าน asyncpg connection เฉพาะหนึ่งเส้นต่อ worker (ไม่กิน connection ใน pool ของ engine)
+    - publish ด้วย pg_notify ผ่าน pool ของ async engine เดิม จึง publish หลายห้องพร้อมกันได้
+    - ถ้า connection ที่ listen หลุดจะต่อใหม่และ LISTEN ทุก channel เดิมซ้ำ
+    """
+
+    # payload ของ NOTIFY ต้องน้อยกว่า 8000 bytes
+    max_message_size = 7999
+
+    def __init__(self, dsn: str = None):
+        self.dsn = dsn
+        self._conn = None
+        self._callbacks: Dict[str, Callable[[str], None]] = {}
+        self._reconnect_task = None
+        self._closing = False
+
+    async def connect(self):
+        import asyncpg
+
+        self._closing = False
+        conn = await asyncpg.connect(self.dsn or _asyncpg_dsn())
+        try:
+            for channel in list(self._callbacks):
+                await conn.add_listener(channel, self._on_notify)
+        except BaseException:
+            # LISTEN ไม่ครบ: ปิดเส้นนี้ทิ้งแล้วให้ผู้เรียก (เช่น _reconnect) ลองใหม่ทั้งหมด
+            await conn.close()
+            raise
+        conn.add_termination_listener(self._on_terminated)
+        self._conn = conn
+
+    async def disconnect(self):
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        callback = self._callbacks.get(channel)
+        if callback is not None:
+            callback(payload)
+
+    def _on_terminated(self, connection):
+        if not self._closing and self._reconnect_task is None:
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        import asyncpg
+
+        self._conn = None
+        delay = BROADCAST_RECONNECT_SECONDS
+        try:
+            while not self._closing:
+                try:
+                    await self.connect()
+                    return
+                except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                    # InterfaceError รวม ConnectionDoesNotExistError (หลุดระหว่าง LISTEN)
+                    # PostgresError รวม CannotConnectNowError ตอนฐานข้อมูลกำลัง start/failover
+                    logger.warning("broadcast reconnect failed, retrying in %.1fs: %s", delay, e)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, BROADCAST_RECONNECT_MAX_SECONDS)
+        finally:
+            self._reconnect_task = None
+
+    async def subscribe(self, channel: str, callback: Callable[[str], None]):
+        self._callbacks[channel] = callback
+        if self._conn is not None:
+            await self._conn.add_listener(channel, self._on_notify)
+
+    async def unsubscribe(self, channel: str):
+        if self._callbacks.pop(channel, None) is not None and self._conn is not None:
+            await self._conn.remove_listener(channel, self._on_notify)
+
+    async def publish(self, channel: str, message: str):
+        # NOTIFY ถูกส่งตอน commit
+        async with get_async_engine().connect() as conn:
+            await conn.execute(text("SELECT pg_notify(:channel, :message)"), {"channel": channel, "message": message})
+            await conn.commit()
+
+
+def _asyncpg_dsn() -> str:
+    # asyncpg.connect รับ URL แบบ postgresql:// ที่ไม่มีชื่อ driver
+    url = make_url(get_async_database_url()).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def create_broadcast_backend() -> BroadcastBackend:
+    if BROADCAST_BACKEND == "memory":
+        return MemoryBroadcast()
+    if BROADCAST_BACKEND == "postgres":
+        return PostgresBroadcast()
+    raise ValueError(f"Unsupported BROADCAST_BACKEND: {BROADCAST_BACKEND}")
+
+
+broadcast = create_broadcast_backend()
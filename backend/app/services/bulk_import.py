@@ -0,0 +1,184 @@
+import codecs
+import csv
+import json
+import os
+from collections import deque
+from typing import AsyncIterator, Iterable, List, Tuple
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.security import hash_password, hash_pool, validate_password
+from ..database import dialect_insert
+from ..models.user import User
+from ..schemas.user import BulkImportError, BulkImportResult, UserCreate
+
+load_dotenv()
+
+# multi-row INSERT ละไม่เกิน batch นี้ (asyncpg จำกัด parameter ไว้ที่ 32767 ต่อ statement)
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+# เก็บรายละเอียด error ไม่เกินจำนวนนี้ (นับจำนวน failed ครบเสมอ)
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "10000"))
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+
+async def iter_stream_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """แปลง byte stream (เช่น request.stream()) เป็นทีละบรรทัด โดยไม่โหลดทั้งไฟล์เข้าหน่วยความจำ"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+def _add_error(result: BulkImportResult, line: int, email, error: str):
+    result.failed += 1
+    if len(result.errors) < BULK_IMPORT_MAX_ERRORS:
+        result.errors.append(BulkImportError(line=line, email=email, error=error))
+
+
+def _add_skipped(result: BulkImportResult, line: int, email, error: str):
+    result.skipped += 1
+    if len(result.errors) < BULK_IMPORT_MAX_ERRORS:
+        result.errors.append(BulkImportError(line=line, email=email, error=error))
+
+
+class _LineFeed:
+    """iterator ของบรรทัดที่เติมทีละบรรทัด ให้ csv.reader ตัวเดียวอ่านต่อเนื่องได้ทั้งไฟล์"""
+
+    def __init__(self):
+        self.lines = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.lines.popleft()
+
+
+async def _parse_records(lines: AsyncIterator[str], fmt: str, result: BulkImportResult):
+    header = None
+    line_no = 0
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    # record ของ CSV อาจยาวหลายบรรทัด (field ในเครื่องหมายคำพูดมีขึ้นบรรทัดใหม่ได้)
+    # จึงส่งให้ reader เมื่อจำนวน " ที่สะสมเป็นเลขคู่ (ปิด quote ครบ) reader จะไม่อ่านเกินบรรทัดที่มี
+    record_line, quotes = 0, 0
+    async for line in lines:
+        line_no += 1
+        line = line.rstrip("\r")
+
+        if fmt == CSV:
+            if not feed.lines and not line.strip():
+                continue
+            if not feed.lines:
+                record_line = line_no
+            feed.lines.append(line + "\n")
+            quotes += line.count('"')
+            if quotes % 2:
+                continue
+            quotes = 0
+            values = next(reader)
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                _add_error(result, record_line, None, f"Expected {len(header)} columns, got {len(values)}")
+                continue
+            yield record_line, {key: value or None for key, value in zip(header, values)}
+        else:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                _add_error(result, line_no, None, f"Invalid JSON: {e.msg}")
+                continue
+            if not isinstance(record, dict):
+                _add_error(result, line_no, None, "Expected a JSON object")
+                continue
+            yield line_no, record
+
+    if feed.lines:
+        _add_error(result, record_line, None, "Unterminated quoted field")
+
+
+async def _insert_batch(db: AsyncSession, batch: List[Tuple[int, UserCreate]], result: BulkImportResult):
+    hashed = await hash_pool.map(hash_password, [(user.password,) for _, user in batch])
+    rows = [
+        {
+            "email": user.email,
+            "password": password,
+            "display_name": user.display_name,
+            "avatar_url": user.avatar_url,
+            "is_active": True,
+        }
+        for (_, user), password in zip(batch, hashed)
+    ]
+    stmt = (
+        dialect_insert(db, User)
+        .values(rows)
+        # ไม่ระบุ target: แถวที่ชน unique ใด ๆ ถูกข้ามเป็นราย row แทนที่จะทำให้ทั้ง batch ล้ม
+        .on_conflict_do_nothing()
+        .returning(User.email)
+    )
+    inserted = set((await db.execute(stmt)).scalars())
+    await db.commit()
+
+    result.created += len(inserted)
+    for line_no, user in batch:
+        if user.email not in inserted:
+            _add_skipped(result, line_no, user.email, "Email already registered")
+
+
+async def import_users(db: AsyncSession, lines: AsyncIterator[str], fmt: str = CSV) -> BulkImportResult:
+    """
+    นำเข้า user จำนวนมากจาก CSV (มี header) หรือ NDJSON ทีละบรรทัด
+    - validate ด้วย UserCreate + validate_password, row ที่ผิดถูกรายงานโดยไม่หยุดทั้ง batch
+    - hash password แบบขนานใน hash_pool
+    - insert ครั้งละ BULK_IMPORT_BATCH_SIZE แถวด้วย INSERT ... ON CONFLICT DO NOTHING
+    - ไม่รับ oauth_provider/oauth_id (ผูกบัญชี OAuth ได้จาก callback ของ provider เท่านั้น)
+    """
+    if fmt not in (CSV, NDJSON):
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    result = BulkImportResult()
+    seen_emails = set()
+    batch = []
+
+    async for line_no, record in _parse_records(lines, fmt, result):
+        record.pop("oauth_provider", None)
+        record.pop("oauth_id", None)
+        try:
+            user = UserCreate.model_validate(record)
+        except ValidationError as e:
+            _add_error(result, line_no, record.get("email"), "; ".join(err["msg"] for err in e.errors()))
+            continue
+        if not user.password or not validate_password(user.password):
+            _add_error(result, line_no, user.email, "Password does not meet strength requirements")
+            continue
+        if user.email in seen_emails:
+            _add_skipped(result, line_no, user.email, "Duplicate email in import")
+            continue
+        seen_emails.add(user.email)
+
+        batch.append((line_no, user))
+        if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+            await _insert_batch(db, batch, result)
+            batch = []
+
+    if batch:
+        await _insert_batch(db, batch, result)
+    return result
+
+
+async def iter_file_lines(lines: Iterable[str]) -> AsyncIterator[str]:
+    """ห่อ iterable แบบ sync (เช่นไฟล์ที่เปิดไว้) ให้ใช้กับ import_users ได้"""
+    for line in lines:
+        yield line.rstrip("\n")
@@ -0,0 +1,206 @@
+import hashlib
+import os
+import uuid
+from typing import AsyncIterator, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from ..core.cache import TTLCache
+from ..database import dialect_insert
+from ..models.board import BoardMember
+from ..models.file import FileBlob, FileUpload, SharedFile
+from ..schemas.file import FileUploadCreate
+from .stats_service import counters
+
+load_dotenv()
+
+FILE_STORAGE_DIR = os.path.abspath(os.getenv("FILE_STORAGE_DIR", "storage/files"))
+FILE_MAX_SIZE = int(os.getenv("FILE_MAX_SIZE", str(5 * 1024 ** 3)))
+# เขียนลง disk ทีละก้อนขนาดนี้ หน่วยความจำต่อ upload จึงคงที่ไม่ว่าไฟล์จะใหญ่แค่ไหน
+FILE_WRITE_BUFFER = 1024 * 1024
+
+# sha256 ที่คำนวณค้างไว้ของ upload ที่กำลังส่ง: upload_id -> (offset, hasher)
+# ถ้าไม่มี (resume หลัง restart หรือคนละ worker) จะอ่านไฟล์ .part ที่มีอยู่มา hash ต่อ
+_upload_hashers = TTLCache(maxsize=1024, ttl=24 * 3600)
+# upload ที่กำลังรับ chunk อยู่ใน process นี้ (กัน request ซ้อนกันเขียนไฟล์เดียวกัน)
+_active_uploads = set()
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset: int):
+        self.offset = offset
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadInProgress(Exception):
+    pass
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(FILE_STORAGE_DIR, "blobs", sha256[:2], sha256)
+
+
+def _part_path(upload_id: str) -> str:
+    return os.path.join(FILE_STORAGE_DIR, "uploads", f"{upload_id}.part")
+
+
+def upload_offset(upload_id: str) -> int:
+    try:
+        return os.path.getsize(_part_path(upload_id))
+    except FileNotFoundError:
+        return 0
+
+
+def _hash_existing(path: str, offset: int):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        remaining = offset
+        while remaining:
+            chunk = file.read(min(FILE_WRITE_BUFFER, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def _write_and_hash(file, hasher, data: bytes):
+    file.write(data)
+    hasher.update(data)
+
+
+async def create_upload(db: AsyncSession, owner_id: int, upload: FileUploadCreate) -> FileUpload:
+    if upload.size > FILE_MAX_SIZE:
+        raise UploadTooLarge()
+    db_upload = FileUpload(
+        id=uuid.uuid4().hex,
+        owner_id=owner_id,
+        board_id=upload.board_id,
+        name=upload.name,
+        content_type=upload.content_type,
+        size=upload.size,
+    )
+    db.add(db_upload)
+    await db.commit()
+    os.makedirs(os.path.dirname(_part_path(db_upload.id)), exist_ok=True)
+    open(_part_path(db_upload.id), "ab").close()
+    return db_upload
+
+
+async def append_chunk(upload: FileUpload, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    """
+    เขียน body ต่อท้ายไฟล์ .part ที่ offset ที่ client ส่งมา (ต้องตรงกับขนาดปัจจุบัน)
+    hash ไปพร้อมกับเขียน คืน offset ใหม่
+    """
+    if upload.id in _active_uploads:
+        raise UploadInProgress()
+    _active_uploads.add(upload.id)
+    try:
+        return await _append_chunk(upload, offset, chunks)
+    finally:
+        _active_uploads.discard(upload.id)
+
+
+async def _append_chunk(upload: FileUpload, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    path = _part_path(upload.id)
+    current = upload_offset(upload.id)
+    if offset != current:
+        raise UploadOffsetMismatch(current)
+
+    cached = _upload_hashers.get(upload.id)
+    if cached is not None and cached[0] == current:
+        hasher = cached[1]
+    else:
+        hasher = await run_in_threadpool(_hash_existing, path, current)
+
+    buffer = bytearray()
+    with open(path, "ab") as file:
+        async for chunk in chunks:
+            if current + len(buffer) + len(chunk) > upload.size:
+                # เก็บส่วนที่เขียนไปแล้วไว้ client resume ต่อได้
+                await run_in_threadpool(_write_and_hash, file, hasher, bytes(buffer))
+                _upload_hashers.set(upload.id, (current + len(buffer), hasher))
+                raise UploadTooLarge()
+            buffer += chunk
+            if len(buffer) >= FILE_WRITE_BUFFER:
+                await run_in_threadpool(_write_and_hash, file, hasher, bytes(buffer))
+                current += len(buffer)
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(_write_and_hash, file, hasher, bytes(buffer))
+            current += len(buffer)
+
+    _upload_hashers.set(upload.id, (current, hasher))
+    return current
+
+
+async def complete_upload(db: AsyncSession, upload: FileUpload) -> SharedFile:
+    """ย้ายไฟล์ .part ไปเป็น blob ตาม sha256 (ถ้ามี blob เดิมอยู่แล้วก็ลบ .part ทิ้ง) แล้วสร้าง SharedFile"""
+    path = _part_path(upload.id)
+    cached = _upload_hashers.get(upload.id)
+    if cached is not None and cached[0] == upload.size:
+        sha256 = cached[1].hexdigest()
+    else:
+        sha256 = (await run_in_threadpool(_hash_existing, path, upload.size)).hexdigest()
+
+    target = blob_path(sha256)
+    if os.path.exists(target):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+
+    await db.execute(
+        dialect_insert(db, FileBlob)
+        .values(sha256=sha256, size=upload.size)
+        .on_conflict_do_nothing(index_elements=[FileBlob.sha256])
+    )
+    shared_file = SharedFile(
+        owner_id=upload.owner_id,
+        board_id=upload.board_id,
+        name=upload.name,
+        content_type=upload.content_type,
+        sha256=sha256,
+        size=upload.size,
+    )
+    db.add(shared_file)
+    await db.delete(upload)
+    await db.commit()
+    await db.refresh(shared_file)
+    _upload_hashers.delete(upload.id)
+    counters.record_file()
+    return shared_file
+
+
+async def abort_upload(db: AsyncSession, upload: FileUpload):
+    await db.delete(upload)
+    await db.commit()
+    _upload_hashers.delete(upload.id)
+    try:
+        os.remove(_part_path(upload.id))
+    except FileNotFoundError:
+        pass
+
+
+def _accessible_files(user_id: int):
+    member_boards = select(BoardMember.board_id).where(BoardMember.user_id == user_id)
+    return select(SharedFile).where(
+        or_(SharedFile.owner_id == user_id, SharedFile.board_id.in_(member_boards))
+    )
+
+
+async def get_accessible_file(db: AsyncSession, file_id: int, user_id: int) -> Optional[SharedFile]:
+    result = await db.execute(_accessible_files(user_id).where(SharedFile.id == file_id))
+    return result.scalars().first()
+
+
+async def list_accessible_files(db: AsyncSession, user_id: int, board_id: Optional[int] = None) -> List[SharedFile]:
+    query = _accessible_files(user_id)
+    if board_id is not None:
+        query = query.where(SharedFile.board_id == board_id)
+    result = await db.execute(query.order_by(SharedFile.id.desc()).limit(500))
+    return list(result.scalars())
@@ -0,0 +1,88 @@
+import base64
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import AsyncSessionLocal, get_async_engine
+from ..models.message import Message
+from ..schemas.message import MessageOut, MessagePage
+from .stats_service import counters
+from .write_buffer import BatchWriter
+
+load_dotenv()
+
+MESSAGE_PAGE_MAX = 100
+MESSAGE_FLUSH_BATCH = int(os.getenv("MESSAGE_FLUSH_BATCH", "500"))
+MESSAGE_FLUSH_INTERVAL_MS = int(os.getenv("MESSAGE_FLUSH_INTERVAL_MS", "100"))
+MESSAGE_BUFFER_MAX = int(os.getenv("MESSAGE_BUFFER_MAX", "50000"))
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(created_at: datetime, message_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor()
+
+
+async def _insert_messages(rows: List[dict]):
+    # multi-row INSERT เดียวต่อ batch แทนการ commit ทีละข้อความ
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Message), rows)
+        await db.commit()
+    counters.record_messages(len(rows))
+
+
+message_writer = BatchWriter(
+    "messages",
+    _insert_messages,
+    batch_size=MESSAGE_FLUSH_BATCH,
+    interval=MESSAGE_FLUSH_INTERVAL_MS / 1000,
+    max_pending=MESSAGE_BUFFER_MAX,
+)
+
+
+def enqueue_message(room_id: int, user_id: int, body: str) -> Optional[dict]:
+    """
+    ใส่ข้อความลง buffer ให้ background task เขียนเป็น batch
+    created_at ถูกกำหนดตอนรับข้อความ ลำดับใน history จึงตรงกับลำดับที่ส่ง ไม่ใช่ลำดับที่ flush
+    คืน None ถ้า buffer เต็ม
+    """
+    row = {"room_id": room_id, "user_id": user_id, "body": body, "created_at": datetime.now(timezone.utc)}
+    if not message_writer.add(row):
+        return None
+    return row
+
+
+async def get_message_page(db: AsyncSession, room_id: int, limit: int, cursor: Optional[str] = None) -> MessagePage:
+    """
+    ข้อความล่าสุดก่อน แบ่งหน้าด้วย keyset (created_at, id) แทน OFFSET
+    ทุกหน้าเป็น index range scan ขนาด limit ไม่ว่าจะเลื่อนลึกแค่ไหน
+    """
+    limit = max(1, min(limit, MESSAGE_PAGE_MAX))
+    query = select(Message).where(Message.room_id == room_id)
+    if cursor:
+        created_at, message_id = decode_cursor(cursor)
+        query = query.where(tuple_(Message.created_at, Message.id) < tuple_(created_at, message_id))
+    query = query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1)
+
+    messages = list((await db.execute(query)).scalars())
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        last = messages[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return MessagePage(messages=[MessageOut.model_validate(m) for m in messages], next_cursor=next_cursor)
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Dict, Optional
+import httpx
+from dotenv import load_dotenv
+from ..core.tasks import SupervisedTask
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# อายุของ metadata/JWKS เมื่อ provider ไม่ส่ง Cache-Control: max-age มา
+OIDC_DEFAULT_TTL = float(os.getenv("OIDC_DEFAULT_TTL", "3600"))
+# refresh ใน background เมื่อผ่านไปสัดส่วนนี้ของอายุ (ก่อนหมดอายุจริง)
+OIDC_REFRESH_AT = float(os.getenv("OIDC_REFRESH_AT", "0.8"))
+# kid ที่ไม่รู้จักบังคับโหลด JWKS ใหม่ได้ไม่ถี่กว่านี้ (กัน token ปลอมทำให้ยิงไปหา provider รัว ๆ)
+OIDC_FORCE_REFRESH_INTERVAL = float(os.getenv("OIDC_FORCE_REFRESH_INTERVAL", "60"))
+OIDC_RETRY_SECONDS = float(os.getenv("OIDC_RETRY_SECONDS", "30"))
+OIDC_HTTP_TIMEOUT = float(os.getenv("OIDC_HTTP_TIMEOUT", "5"))
+OIDC_PREFETCH = os.getenv("OIDC_PREFETCH", "true").lower() == "true"
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class _CachedDocument:
+    __slots__ = ("value", "fetched_at", "expires_at")
+
+    def __init__(self, value: dict, ttl: float):
+        self.value = value
+        self.fetched_at = time.time()
+        self.expires_at = self.fetched_at + ttl
+
+    @property
+    def refresh_at(self) -> float:
+        return self.fetched_at + (self.expires_at - self.fetched_at) * OIDC_REFRESH_AT
+
+
+class OIDCProvider:
+    def __init__(self, name: str, metadata_url: str):
+        self.name = name
+        self.metadata_url = metadata_url
+        self.metadata: Optional[_CachedDocument] = None
+        self.jwks: Optional[_CachedDocument] = None
+        self.last_forced = 0.0
+        self.retry_at = 0.0
+        self.fetches = 0
+        self.failures = 0
+        self.lock = asyncio.Lock()
+
+
+class OIDCMetadataCache:
+    """
+    cache ของ discovery metadata และ JWKS ที่ใช้ร่วมกันทุก provider
+    - prefetch ตอน start และ refresh ใน background ก่อนหมดอายุ request จึงไม่ต้องรอ HTTP ไปหา provider
+    - ถ้า refresh ไม่สำเร็จจะใช้ค่าเดิมต่อ (stale) แล้วลองใหม่ทุก OIDC_RETRY_SECONDS
+    - fetch พร้อมกันของ provider เดียวกันรวมเป็นครั้งเดียว (lock ต่อ provider)
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport = None):
+        self.providers: Dict[str, OIDCProvider] = {}
+        self.transport = transport
+
+    def register(self, name: str, metadata_url: str) -> OIDCProvider:
+        provider = OIDCProvider(name, metadata_url)
+        self.providers[name] = provider
+        return provider
+
+    async def _fetch(self, url: str):
+        async with httpx.AsyncClient(timeout=OIDC_HTTP_TIMEOUT, transport=self.transport) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+        match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+        ttl = float(match.group(1)) if match else OIDC_DEFAULT_TTL
+        return response.json(), ttl
+
+    async def _load_metadata(self, provider: OIDCProvider) -> dict:
+        document, ttl = await self._fetch(provider.metadata_url)
+        provider.metadata = _CachedDocument(document, ttl)
+        provider.fetches += 1
+        return document
+
+    async def _load_jwks(self, provider: OIDCProvider, metadata: dict) -> dict:
+        document, ttl = await self._fetch(metadata["jwks_uri"])
+        provider.jwks = _CachedDocument(document, ttl)
+        provider.fetches += 1
+        return document
+
+    async def get_metadata(self, name: str) -> dict:
+        provider = self.providers[name]
+        cached = provider.metadata
+        if cached is not None and cached.expires_at > time.time():
+            return cached.value
+        async with provider.lock:
+            cached = provider.metadata
+            if cached is not None and cached.expires_at > time.time():
+                return cached.value
+            try:
+                return await self._load_metadata(provider)
+            except httpx.HTTPError:
+                provider.failures += 1
+                if cached is None:
+                    raise
+                logger.warning("OIDC metadata refresh for %s failed; serving stale copy", name)
+                return cached.value
+
+    async def get_jwks(self, name: str, force: bool = False) -> dict:
+        """JWKS ของ provider force=True ใช้เมื่อเจอ kid ที่ไม่รู้จัก (provider หมุน key)"""
+        provider = self.providers[name]
+        now = time.time()
+        if force and now - provider.last_forced < OIDC_FORCE_REFRESH_INTERVAL:
+            force = False
+        cached = provider.jwks
+        if not force and cached is not None and cached.expires_at > now:
+            return cached.value
+        metadata = await self.get_metadata(name)
+        async with provider.lock:
+            # อีก request อาจโหลดให้แล้วระหว่างรอ lock
+            if provider.jwks is not cached and provider.jwks is not None:
+                return provider.jwks.value
+            if force:
+                provider.last_forced = now
+            try:
+                return await self._load_jwks(provider, metadata)
+            except httpx.HTTPError:
+                provider.failures += 1
+                if cached is None:
+                    raise
+                logger.warning("OIDC JWKS refresh for %s failed; serving stale copy", name)
+                return cached.value
+
+    async def refresh(self, name: str):
+        provider = self.providers[name]
+        async with provider.lock:
+            metadata = await self._load_metadata(provider)
+            await self._load_jwks(provider, metadata)
+
+    async def prefetch(self):
+        """โหลดทุก provider พร้อมกันตอน start ถ้าไม่สำเร็จ request แรกจะโหลดเอง (ไม่ทำให้ start ล้ม)"""
+        results = await asyncio.gather(*(self.refresh(name) for name in self.providers), return_exceptions=True)
+        for name, result in zip(self.providers, results):
+            if isinstance(result, Exception):
+                self.providers[name].failures += 1
+                logger.warning("OIDC prefetch for %s failed: %s", name, result)
+
+    def _next_refresh(self, provider: OIDCProvider) -> Optional[float]:
+        documents = [document for document in (provider.metadata, provider.jwks) if document is not None]
+        if not documents:
+            return None
+        return max(min(document.refresh_at for document in documents), provider.retry_at)
+
+    async def run_refresh_loop(self, prefetch: bool = OIDC_PREFETCH):
+        """
+        prefetch ทุก provider (ไม่ block การ start ของ app) แล้ว refresh ตัวที่ใกล้หมดอายุตลอดอายุของ process
+        refresh เฉพาะ provider ที่เคยโหลดสำเร็จแล้ว
+        """
+        if prefetch:
+            await self.prefetch()
+        while True:
+            now = time.time()
+            due = [provider for provider in self.providers.values() if (self._next_refresh(provider) or float("inf")) <= now]
+            for provider in due:
+                try:
+                    await self.refresh(provider.name)
+                except Exception as e:
+                    provider.failures += 1
+                    # ลองใหม่หลัง OIDC_RETRY_SECONDS ระหว่างนี้ใช้ค่าเดิม
+                    provider.retry_at = time.time() + OIDC_RETRY_SECONDS
+                    logger.warning("OIDC refresh for %s failed: %s", provider.name, e)
+            upcoming = [self._next_refresh(provider) for provider in self.providers.values()]
+            upcoming = [at for at in upcoming if at is not None]
+            delay = min(upcoming) - time.time() if upcoming else OIDC_RETRY_SECONDS
+            await asyncio.sleep(min(max(delay, 1.0), OIDC_DEFAULT_TTL))
+
+    def attach(self, name: str, client):
+        """
+        ให้ authlib client อ่าน metadata/JWKS จาก cache นี้แทนการ fetch เอง
+        authlib เรียก fetch_jwk_set(force=True) เองเมื่อ kid ใน id_token ไม่อยู่ใน JWKS
+        """
+        cache = self
+
+        async def load_server_metadata():
+            metadata = await cache.get_metadata(name)
+            client.server_metadata.update(metadata)
+            client.server_metadata["_loaded_at"] = cache.providers[name].metadata.fetched_at
+            return client.server_metadata
+
+        async def fetch_jwk_set(force: bool = False):
+            jwks = await cache.get_jwks(name, force=force)
+            client.server_metadata["jwks"] = jwks
+            return jwks
+
+        client.load_server_metadata = load_server_metadata
+        client.fetch_jwk_set = fetch_jwk_set
+        return client
+
+    def stats(self) -> dict:
+        now = time.time()
+        return {
+            name: {
+                "metadata_age": now - provider.metadata.fetched_at if provider.metadata else None,
+                "jwks_age": now - provider.jwks.fetched_at if provider.jwks else None,
+                "jwks_expires_in": provider.jwks.expires_at - now if provider.jwks else None,
+                "fetches": provider.fetches,
+                "failures": provider.failures,
+            }
+            for name, provider in self.providers.items()
+        }
+
+
+oidc_cache = OIDCMetadataCache()
+# lifespan start/stop: loop ที่ล้มจะถูก log และ start ใหม่
+oidc_refresh_task = SupervisedTask("oidc-refresh", oidc_cache.run_refresh_loop)
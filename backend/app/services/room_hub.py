@@ -0,0 +1,273 @@
+import asyncio
+import itertools
+import json
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from .broadcast import broadcast
+
+load_dotenv()
+
+# รวม event ของแต่ละห้องแล้วส่งออกเป็น batch ทุก ๆ tick
+ROOM_TICK_MS = int(os.getenv("ROOM_TICK_MS", "50"))
+# frame ที่ค้างส่งได้ต่อ connection ก่อนจะถือว่า client ช้าเกินไป
+ROOM_MAX_PENDING_FRAMES = int(os.getenv("ROOM_MAX_PENDING_FRAMES", "32"))
+
+# event ที่เก็บเฉพาะค่าล่าสุดภายใน tick เดียวกัน: type -> field ที่ใช้เป็น key
+COALESCE_FIELDS = {
+    "cursor": "user_id",
+    "move": "element_id",
+}
+
+# ส่งให้ client ที่ตามไม่ทันแทน frame ที่ถูกทิ้ง เพื่อให้โหลด state ใหม่
+RESYNC_FRAME = json.dumps({"type": "resync"})
+
+
+def _coalesce_key(event: dict):
+    field = COALESCE_FIELDS.get(event.get("type"))
+    if field is None or event.get(field) is None:
+        return None
+    return (event["type"], event[field])
+
+
+class RoomConnection:
+    """
+    websocket หนึ่งตัวในห้อง มีคิว frame ขาออกแบบจำกัดขนาด
+    ถ้าคิวเต็ม (client รับไม่ทัน) จะทิ้ง frame ที่ค้างทั้งหมดแล้วส่ง resync แทน
+    """
+
+    def __init__(self, websocket, user: dict):
+        self.websocket = websocket
+        self.user = user
+        self.dropped_frames = 0
+        self._frames = deque()
+        self._wakeup = asyncio.Event()
+
+    def enqueue(self, frame: str):
+        if len(self._frames) >= ROOM_MAX_PENDING_FRAMES:
+            self.dropped_frames += len(self._frames)
+            self._frames.clear()
+            frame = RESYNC_FRAME
+        self._frames.append(frame)
+        self._wakeup.set()
+
+    async def run_writer(self):
+        while True:
+            while not self._frames:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            await self.websocket.send_text(self._frames.popleft())
+
+
+class Room:
+    def __init__(self, room_id: str, backend):
+        self.room_id = room_id
+        self.channel = f"room:{room_id}"
+        self.backend = backend
+        self.connections = set()
+        self.published = 0
+        self.batches = 0
+        self.oversized = 0
+        self.publish_errors = 0
+        self._pending = {}
+        self._sequence = itertools.count()
+        self._task = None
+
+    def publish(self, event: dict):
+        key = _coalesce_key(event)
+        if key is None:
+            key = next(self._sequence)
+        else:
+            # ย้าย event ที่ถูกแทนไปไว้ท้ายสุด เพื่อคงลำดับเทียบกับ event อื่นใน tick
+            self._pending.pop(key, None)
+        self._pending[key] = event
+        self.published += 1
+
+    def deliver(self, frame: str):
+        """callback จาก broadcast backend: ส่ง frame เดียวกันให้ทุก connection ใน process นี้"""
+        self.batches += 1
+        for connection in list(self.connections):
+            connection.enqueue(frame)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _encode_event(self, event: dict, max_size: int):
+        """
+        serialize event ให้แต่ละชิ้นไม่เกิน max_size bytes
+        event "ops" ที่ใหญ่เกินถูกแบ่ง ops เป็นหลาย event ส่วน event อื่นที่ใหญ่เกิน (หรือ op เดียวที่ใหญ่เกิน)
+        ส่ง resync แทน client จะ sync จาก HTTP เอง ไม่ทิ้งเงียบ ๆ จน state ของแต่ละคนไม่ตรงกัน
+        """
+        encoded = json.dumps(event)
+        if len(encoded.encode()) + 2 <= max_size:
+            yield encoded
+            return
+        self.oversized += 1
+        ops = event.get("ops") if event.get("type") == "ops" else None
+        if isinstance(ops, list) and len(ops) > 1:
+            middle = len(ops) // 2
+            yield from self._encode_event({**event, "ops": ops[:middle]}, max_size)
+            yield from self._encode_event({**event, "ops": ops[middle:]}, max_size)
+            return
+        notice = {"type": "resync"}
+        if ops and isinstance(ops[-1], dict) and "seq" in ops[-1]:
+            notice["head_seq"] = ops[-1]["seq"]
+        yield json.dumps(notice)
+
+    def _encode_frames(self, events: list):
+        # serialize ครั้งเดียวต่อ tick และแบ่งเป็นหลาย frame ถ้าเกินขนาดที่ backend รับได้
+        prefix = '{"type": "batch", "room_id": %s, "events": [' % json.dumps(self.room_id)
+        suffix = "]}"
+        limit = self.backend.max_message_size
+        overhead = len(prefix.encode()) + len(suffix)
+
+        chunk, size = [], overhead
+        for event in events:
+            if limit is None:
+                encoded_events = [json.dumps(event)]
+            else:
+                encoded_events = self._encode_event(event, limit - overhead)
+            for encoded in encoded_events:
+                encoded_size = len(encoded.encode()) + 2
+                if chunk and limit is not None and size + encoded_size > limit:
+                    yield prefix + ", ".join(chunk) + suffix
+                    chunk, size = [], overhead
+                chunk.append(encoded)
+                size += encoded_size
+        if chunk:
+            yield prefix + ", ".join(chunk) + suffix
+
+    async def flush(self):
+        if not self._pending:
+            return
+        events = list(self._pending.values())
+        self._pending = {}
+        for frame in self._encode_frames(events):
+            await self.backend.publish(self.channel, frame)
+
+    async def _run(self):
+        tick = ROOM_TICK_MS / 1000
+        while True:
+            await asyncio.sleep(tick)
+            try:
+                await self.flush()
+            except Exception:
+                # backend ล่มชั่วคราว: ทิ้ง batch นี้ client จะได้ event ถัดไปตามปกติ
+                self.publish_errors += 1
+
+
+class RoomHub:
+    """
+    registry ของห้องใน process นี้ ห้องจะถูกสร้างเมื่อมีคนแรกเข้าและลบเมื่อคนสุดท้ายออก
+    แต่ละห้อง subscribe broadcast backend ครั้งเดียวต่อ process แล้วกระจายต่อให้ socket ใน process เอง
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.rooms = {}
+        self.remote_published = 0
+        self.remote_publish_errors = 0
+        # room_id -> [lock, จำนวนคนที่ถือหรือรอ lock] ลบทิ้งเมื่อไม่มีใครใช้
+        self._locks = {}
+
+    @asynccontextmanager
+    async def _room_lock(self, room_id: str):
+        # join/leave ของห้องเดียวกันต้องไม่สลับกันระหว่าง await (subscribe/unsubscribe/flush)
+        # ไม่อย่างนั้น leave ที่ยังค้างอยู่จะ unsubscribe channel ที่ join ใหม่เพิ่ง subscribe ไป
+        entry = self._locks.setdefault(room_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[room_id]
+
+    async def join(self, room_id: str, connection: RoomConnection) -> Room:
+        async with self._room_lock(room_id):
+            room = self.rooms.get(room_id)
+            if room is None:
+                room = Room(room_id, self.backend)
+                await self.backend.subscribe(room.channel, room.deliver)
+                room.start()
+                self.rooms[room_id] = room
+            room.connections.add(connection)
+        return room
+
+    async def leave(self, room_id: str, connection: RoomConnection):
+        async with self._room_lock(room_id):
+            room = self.rooms.get(room_id)
+            if room is None:
+                return
+            room.connections.discard(connection)
+            if not room.connections:
+                del self.rooms[room_id]
+                await room.stop()
+                await room.flush()
+                await self.backend.unsubscribe(room.channel)
+
+    async def publish(self, room_id: str, event: dict):
+        """
+        ส่ง event เข้าห้องผ่าน broadcast backend เสมอ (socket ของห้องอาจอยู่ใน worker อื่นทั้งหมด)
+        socket ใน process นี้ได้รับผ่าน callback ของ backend เหมือน worker อื่น ไม่ส่งตรง
+        """
+        room = self.rooms.get(room_id)
+        if room is not None:
+            # ห้องที่เปิดอยู่ใน process นี้รวม event เป็น batch ต่อ tick แล้วค่อย publish
+            room.publish(event)
+            return
+        # ไม่มีใครในห้องบน worker นี้ (เช่นเรียกจาก HTTP route): publish ทันทีเป็น batch เดียว
+        self.remote_published += 1
+        try:
+            transient = Room(room_id, self.backend)
+            transient.publish(event)
+            await transient.flush()
+        except Exception:
+            # เหมือน Room._run: backend ล่มชั่วคราวไม่ทำให้ request ที่บันทึกข้อมูลแล้วล้ม
+            self.remote_publish_errors += 1
+
+    def subscriber_count(self, room_id: str) -> int:
+        room = self.rooms.get(room_id)
+        return len(room.connections) if room else 0
+
+    def subscriber_counts(self) -> dict:
+        return {room_id: len(room.connections) for room_id, room in self.rooms.items()}
+
+    def online_user_ids(self, room_id: str = None) -> set:
+        if room_id is None:
+            rooms = self.rooms.values()
+        else:
+            rooms = [self.rooms[room_id]] if room_id in self.rooms else []
+        return {connection.user["id"] for room in rooms for connection in room.connections}
+
+    def stats(self) -> dict:
+        rooms = self.rooms.values()
+        return {
+            "backend": type(self.backend).__name__,
+            "rooms": len(self.rooms),
+            "connections": sum(len(room.connections) for room in rooms),
+            "published": sum(room.published for room in rooms),
+            "batches": sum(room.batches for room in rooms),
+            "oversized": sum(room.oversized for room in rooms),
+            "publish_errors": sum(room.publish_errors for room in rooms),
+            "remote_published": self.remote_published,
+            "remote_publish_errors": self.remote_publish_errors,
+            "dropped_frames": sum(
+                connection.dropped_frames for room in rooms for connection in room.connections
+            ),
+        }
+
+
+hub = RoomHub(broadcast)
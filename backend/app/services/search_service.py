@@ -0,0 +1,173 @@
+import base64
+import html
+import json
+import os
+from typing import Optional, Sequence
+from dotenv import load_dotenv
+from sqlalchemy import Float, and_, bindparam, func, literal_column, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.cache import TTLCache
+from ..models.board import Board, BoardMember
+from ..models.file import SharedFile
+from ..models.message import Message
+from ..schemas.search import SearchHit, SearchPage
+
+load_dotenv()
+
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "10"))
+SEARCH_MAX_LIMIT = 50
+# ต้องตรงกับ config ใน generated column (POSTGRES_UPGRADES) ไม่อย่างนั้น GIN index จะไม่ตรงกับ query
+# เขียนเป็น literal ::regconfig เพราะ bind parameter (varchar) ไม่ถูก cast เป็น regconfig ให้เอง
+SEARCH_TEXT_CONFIG = literal_column("'simple'::regconfig")
+# snippet มาจากข้อความของ user: ให้ ts_headline ครอบคำที่ตรงด้วยอักขระ private-use (ไม่ใช่ HTML)
+# แล้ว escape ทั้งก้อนใน Python ก่อนแทน marker ด้วย <b>...</b> จึงมี HTML ได้แค่แท็กที่เราใส่เอง
+_HIGHLIGHT_START = "\ue000"
+_HIGHLIGHT_STOP = "\ue001"
+SEARCH_HEADLINE_OPTIONS = (
+    f"MaxFragments=1, MaxWords=20, MinWords=5, StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_STOP}"
+)
+
+SEARCH_KINDS = ("board", "file", "message")
+
+# ผลค้นหาต่อ (user, คำค้น, หน้า) ผลจึงอาจช้ากว่าข้อมูลจริงได้ไม่เกิน SEARCH_CACHE_TTL
+search_cache = TTLCache(maxsize=4096, ttl=SEARCH_CACHE_TTL)
+
+
+class InvalidSearchCursor(Exception):
+    pass
+
+
+class SearchUnavailable(Exception):
+    """full-text search ใช้ tsvector ของ PostgreSQL (ฐานข้อมูลอื่นไม่มี search_vector)"""
+
+
+def _search_vector(table):
+    # generated column จาก POSTGRES_UPGRADES ไม่อยู่ใน model เพราะ SQLite สร้าง tsvector ไม่ได้
+    return literal_column(f"{table.name}.search_vector")
+
+
+def _encode_cursor(rank: float, kind: str, item_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([rank, kind, item_id]).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        rank, kind, item_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(rank), str(kind), int(item_id)
+    except (ValueError, TypeError):
+        raise InvalidSearchCursor()
+
+
+def _render_snippet(headline: str) -> str:
+    return (
+        html.escape(headline, quote=False)
+        .replace(_HIGHLIGHT_START, "<b>")
+        .replace(_HIGHLIGHT_STOP, "</b>")
+    )
+
+
+def _ranked(kind: str, table, id_column, board_column, text_column, created_column, query, *where):
+    vector = _search_vector(table.__table__)
+    return select(
+        literal_column(f"'{kind}'").label("kind"),
+        id_column.label("id"),
+        board_column.label("board_id"),
+        text_column.label("text"),
+        created_column.label("created_at"),
+        func.ts_rank_cd(vector, query).label("rank"),
+    ).where(vector.op("@@")(query), *where)
+
+
+async def search_workspace(
+    db: AsyncSession,
+    user_id: int,
+    q: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    kinds: Sequence[str] = SEARCH_KINDS,
+) -> SearchPage:
+    """
+    ค้นหา board, ข้อความแชท และชื่อไฟล์ที่ user เข้าถึงได้ (สมาชิก board หรือเจ้าของไฟล์)
+    เรียงตามความเกี่ยวข้องแบบ keyset บน (rank DESC, kind, id) รองรับรูปแบบคำค้นแบบ web ("วลี", OR, -คำ)
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        raise SearchUnavailable()
+    q = q.strip().lower()
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    kinds = tuple(kind for kind in SEARCH_KINDS if kind in kinds)
+    cache_key = (user_id, q, limit, cursor, kinds)
+    page = search_cache.get(cache_key)
+    if page is not None:
+        return page
+
+    query = func.websearch_to_tsquery(SEARCH_TEXT_CONFIG, q)
+    member_boards = select(BoardMember.board_id).where(BoardMember.user_id == user_id)
+    ranked = []
+    if "board" in kinds:
+        ranked.append(_ranked(
+            "board", Board, Board.id, Board.id, Board.name, Board.created_at, query,
+            Board.id.in_(member_boards),
+        ))
+    if "file" in kinds:
+        ranked.append(_ranked(
+            "file", SharedFile, SharedFile.id, SharedFile.board_id, SharedFile.name, SharedFile.created_at, query,
+            or_(SharedFile.owner_id == user_id, SharedFile.board_id.in_(member_boards)),
+        ))
+    if "message" in kinds:
+        ranked.append(_ranked(
+            "message", Message, Message.id, Message.room_id, Message.body, Message.created_at, query,
+            Message.room_id.in_(member_boards),
+        ))
+    if not ranked:
+        return SearchPage(results=[])
+
+    hits = union_all(*ranked).subquery("hits")
+    order = (hits.c.rank.desc(), hits.c.kind, hits.c.id)
+    stmt = select(hits)
+    if cursor:
+        after_rank, after_kind, after_id = _decode_cursor(cursor)
+        after_rank = bindparam("after_rank", after_rank, type_=Float)
+        stmt = stmt.where(or_(
+            hits.c.rank < after_rank,
+            and_(hits.c.rank == after_rank, or_(
+                hits.c.kind > after_kind,
+                and_(hits.c.kind == after_kind, hits.c.id > after_id),
+            )),
+        ))
+    top = stmt.order_by(*order).limit(limit + 1).subquery("top")
+    # ts_headline อ่านข้อความทั้งก้อน (แพง) จึงทำเฉพาะแถวในหน้านี้
+    rows = (await db.execute(
+        select(
+            top.c.kind, top.c.id, top.c.board_id, top.c.created_at, top.c.rank,
+            func.ts_headline(
+                SEARCH_TEXT_CONFIG,
+                # ลบ marker ที่อาจอยู่ในข้อความเดิมออกก่อน ไม่อย่างนั้นจะกลายเป็น <b> ที่ไม่ใช่คำที่ตรง
+                func.translate(top.c.text, _HIGHLIGHT_START + _HIGHLIGHT_STOP, ""),
+                query,
+                SEARCH_HEADLINE_OPTIONS,
+            ).label("snippet"),
+            func.left(top.c.text, 255).label("title"),
+        ).order_by(top.c.rank.desc(), top.c.kind, top.c.id)
+    )).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].rank, rows[-1].kind, rows[-1].id)
+    page = SearchPage(
+        results=[
+            SearchHit(
+                kind=row.kind,
+                id=row.id,
+                board_id=row.board_id,
+                title=row.title if row.kind != "message" else None,
+                snippet=_render_snippet(row.snippet),
+                rank=row.rank,
+                created_at=row.created_at,
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
+    search_cache.set(cache_key, page)
+    return page
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+import time
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+from ..core.cache import TTLCache
+from ..core.tasks import SupervisedTask
+from ..database import AsyncSessionLocal, get_async_engine
+from ..models.file import SharedFile
+from ..models.message import Message
+from .room_hub import hub
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# dashboard หลายพันจอ poll พร้อมกันได้ response เดียวกันภายใน TTL นี้
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "2"))
+# ระยะห่างของการนับจริงจากฐานข้อมูล (COUNT รันใน background เท่านั้น)
+STATS_RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL", "300"))
+
+
+class DashboardCounters:
+    """
+    ตัวนับที่เพิ่มทีละน้อยตอนเขียนข้อมูล (ข้อความ/ไฟล์) แทนการ COUNT(*) ทุกครั้งที่เปิด dashboard
+    reconcile() ดึงค่าจริงจากฐานข้อมูลเป็นระยะ เพื่อแก้ค่าที่คลาดเคลื่อนและรวมข้อมูลจาก worker อื่น
+    """
+
+    def __init__(self):
+        self.total_messages = 0
+        self.shared_files = 0
+        self.reconciled_at = None
+        self._message_writes = 0
+        self._file_writes = 0
+
+    def record_messages(self, count: int):
+        self.total_messages += count
+        self._message_writes += count
+
+    def record_file(self):
+        self.shared_files += 1
+        self._file_writes += 1
+
+    async def reconcile(self):
+        message_mark, file_mark = self._message_writes, self._file_writes
+        get_async_engine()
+        async with AsyncSessionLocal() as db:
+            total_messages = (await db.execute(select(func.count()).select_from(Message))).scalar_one()
+            shared_files = (await db.execute(select(func.count()).select_from(SharedFile))).scalar_one()
+        # บวกส่วนที่เขียนระหว่างรอ COUNT กลับเข้าไป
+        self.total_messages = total_messages + self._message_writes - message_mark
+        self.shared_files = shared_files + self._file_writes - file_mark
+        self.reconciled_at = time.time()
+
+
+counters = DashboardCounters()
+_stats_cache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL)
+
+
+def get_dashboard_stats() -> dict:
+    """
+    total_messages/shared_files เป็นค่ารวมทั้งระบบ (reconcile จากฐานข้อมูล)
+    online_users/active_rooms นับจาก RoomHub ของ worker ที่ตอบ request นี้เท่านั้น (presence_scope = "worker")
+    ถ้ารันหลาย worker ค่าจะต่ำกว่าจริงและแต่ละ request อาจได้ค่าต่างกัน
+    """
+    stats = _stats_cache.get("stats")
+    if stats is None:
+        stats = {
+            "online_users": len(hub.online_user_ids()),
+            "active_rooms": len(hub.rooms),
+            "presence_scope": "worker",
+            "total_messages": counters.total_messages,
+            "shared_files": counters.shared_files,
+        }
+        _stats_cache.set("stats", stats)
+    return stats
+
+
+async def run_reconcile_loop():
+    """background task (เริ่มใน lifespan): นับจากฐานข้อมูลครั้งแรกทันที แล้วทุก STATS_RECONCILE_INTERVAL"""
+    while True:
+        try:
+            await counters.reconcile()
+        except Exception:
+            logger.exception("Dashboard stats reconcile failed")
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+
+
+# lifespan start/stop: loop ที่ล้มจะถูก log และ start ใหม่
+reconcile_task = SupervisedTask("stats-reconcile", run_reconcile_loop)
@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import delete, select
+from ..core.jwt_auth import REFRESH_TOKEN_EXPIRE_DAYS
+from ..core.tasks import SupervisedTask
+from ..database import AsyncSessionLocal, dialect_insert, get_async_engine
+from ..models.token import RevokedToken
+from .broadcast import broadcast
+from .write_buffer import BatchWriter
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "1000000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+REVOCATION_PURGE_INTERVAL = float(os.getenv("REVOCATION_PURGE_INTERVAL", "600"))
+REVOCATION_CHANNEL = "auth_revocations"
+
+# ผลตรวจ refresh token
+TOKEN_OK = "ok"
+TOKEN_REVOKED = "revoked"
+TOKEN_REUSED = "reused"
+
+
+class BloomFilter:
+    """bloom filter ขนาดคงที่ (double hashing จาก blake2b) ไม่มี false negative"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """
+    รายการเพิกถอนในหน่วยความจำ: bloom filter ตอบ "ไม่เคยถูกเพิกถอน" ได้ทันทีสำหรับ token ส่วนใหญ่
+    ส่วน dict เก็บค่าจริง (revoked_at, expires_at) ไว้ยืนยันเมื่อ bloom ตอบว่าอาจมี
+    ลบรายการไม่ได้จาก bloom จึง rebuild ใหม่ตอน purge() รายการที่หมดอายุ
+    """
+
+    def __init__(self, capacity: int = REVOCATION_BLOOM_CAPACITY, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._entries: Dict[str, tuple] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.bloom_negatives = 0
+        self.false_positives = 0
+
+    def add(self, key: str, revoked_at: float, expires_at: float):
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None:
+                revoked_at = max(revoked_at, current[0])
+                expires_at = max(expires_at, current[1])
+            self._entries[key] = (revoked_at, expires_at)
+            self._bloom.add(key)
+
+    def revoked_at(self, key: str) -> Optional[float]:
+        self.lookups += 1
+        if key not in self._bloom:
+            self.bloom_negatives += 1
+            return None
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            self.false_positives += 1
+            return None
+        return entry[0]
+
+    def is_revoked(self, key: str, issued_at: float) -> bool:
+        revoked_at = self.revoked_at(key)
+        return revoked_at is not None and issued_at <= revoked_at
+
+    def purge(self) -> int:
+        now = time.time()
+        with self._lock:
+            entries = {key: entry for key, entry in self._entries.items() if entry[1] > now}
+            removed = len(self._entries) - len(entries)
+            bloom = BloomFilter(max(self.capacity, len(entries) * 2), self.error_rate)
+            for key in entries:
+                bloom.add(key)
+            self._entries, self._bloom = entries, bloom
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hashes,
+            "lookups": self.lookups,
+            "bloom_negatives": self.bloom_negatives,
+            "false_positives": self.false_positives,
+        }
+
+
+revocations = RevocationList()
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def _to_timestamp(value: datetime) -> float:
+    # SQLite คืน datetime แบบไม่มี timezone (ค่าที่เขียนเป็น UTC)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+async def _persist_revocations(items: List[tuple]):
+    # batch เดียวต่อรอบ ถ้า key ซ้ำเก็บค่าล่าสุด (revoked_at มากสุด)
+    latest = {}
+    for key, revoked_at, expires_at in items:
+        current = latest.get(key)
+        if current is None or revoked_at > current[0]:
+            latest[key] = (revoked_at, expires_at)
+    rows = [
+        {"key": key, "revoked_at": _to_datetime(revoked_at), "expires_at": _to_datetime(expires_at)}
+        for key, (revoked_at, expires_at) in latest.items()
+    ]
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        stmt = dialect_insert(db, RevokedToken).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RevokedToken.key],
+            set_={"revoked_at": stmt.excluded.revoked_at, "expires_at": stmt.excluded.expires_at},
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+
+# เขียนลงฐานข้อมูลแบบ write-behind เพื่อให้ refresh ไม่ต้องรอ round trip (ใช้ตอน start worker ใหม่เท่านั้น)
+revocation_writer = BatchWriter("token-revocations", _persist_revocations, batch_size=500, interval=1.0)
+
+
+def _on_revocation_message(message: str):
+    try:
+        key, revoked_at, expires_at = json.loads(message)
+        revocations.add(key, float(revoked_at), float(expires_at))
+    except (ValueError, TypeError):
+        logger.warning("ignoring malformed revocation message: %r", message)
+
+
+def _revoke_local(key: str, expires_at: float, revoked_at: Optional[float] = None) -> list:
+    # ส่วนที่ไม่มี await: มีผลใน worker นี้ทันทีและเข้าคิวเขียนลงฐานข้อมูล
+    revoked_at = revoked_at or time.time()
+    revocations.add(key, revoked_at, expires_at)
+    revocation_writer.add((key, revoked_at, expires_at))
+    return [key, revoked_at, expires_at]
+
+
+async def _announce(entry: list):
+    try:
+        await broadcast.publish(REVOCATION_CHANNEL, json.dumps(entry))
+    except Exception:
+        # worker อื่นจะได้รายการนี้จากฐานข้อมูลตอน start ใหม่ ส่วน worker นี้เพิกถอนไปแล้ว
+        logger.exception("failed to broadcast revocation %s", entry[0])
+
+
+async def revoke(key: str, expires_at: float, revoked_at: Optional[float] = None):
+    """เพิกถอนใน worker นี้ทันที แล้วกระจายให้ worker อื่นและบันทึกลงฐานข้อมูลใน background"""
+    await _announce(_revoke_local(key, expires_at, revoked_at))
+
+
+def refresh_token_state(payload: dict) -> str:
+    """
+    ตรวจ refresh token ที่ verify signature แล้ว โดยไม่ต้อง query ฐานข้อมูล
+    TOKEN_REUSED = jti นี้ถูกใช้ rotate ไปแล้ว (น่าจะถูกขโมย) ผู้เรียกควรเพิกถอนทั้ง family
+    """
+    issued_at = float(payload.get("iat") or 0)
+    if revocations.is_revoked(f"user:{payload.get('sub')}", issued_at):
+        return TOKEN_REVOKED
+    family = payload.get("fam")
+    if family and revocations.is_revoked(f"family:{family}", issued_at):
+        return TOKEN_REVOKED
+    jti = payload.get("jti")
+    if jti and revocations.is_revoked(f"jti:{jti}", issued_at):
+        return TOKEN_REUSED
+    return TOKEN_OK
+
+
+def claim_refresh_token(payload: dict):
+    """
+    ตรวจและทำให้ refresh token ใช้ซ้ำไม่ได้ในขั้นเดียว (ไม่มี await คั่น) คืน (state, entry)
+    refresh พร้อมกันสองครั้งด้วย token เดียวกันใน worker นี้ ครั้งที่สองจะได้ TOKEN_REUSED เสมอ
+    entry ที่ไม่ใช่ None ต้องส่งต่อให้ announce_claim เพื่อกระจายให้ worker อื่น
+    """
+    state = refresh_token_state(payload)
+    jti = payload.get("jti")
+    if state != TOKEN_OK or not jti:
+        return state, None
+    return state, _revoke_local(f"jti:{jti}", float(payload["exp"]))
+
+
+async def announce_claim(entry: Optional[list]):
+    if entry is not None:
+        await _announce(entry)
+
+
+async def consume_refresh_token(payload: dict):
+    """ทำให้ refresh token ใช้ซ้ำไม่ได้หลัง rotate (token เก่าที่ไม่มี jti ข้าม)"""
+    jti = payload.get("jti")
+    if jti:
+        await revoke(f"jti:{jti}", float(payload["exp"]))
+
+
+async def revoke_refresh_family(payload: dict):
+    """เพิกถอน refresh token ทุกตัวที่ rotate ต่อกันมาจาก login เดียวกัน (logout / reuse)"""
+    family = payload.get("fam")
+    if family:
+        # token ใน family ที่ rotate ต่อไปมี exp ไม่เกิน REFRESH_TOKEN_EXPIRE_DAYS นับจากนี้
+        await revoke(f"family:{family}", time.time() + REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+    else:
+        await consume_refresh_token(payload)
+
+
+async def revoke_user_tokens(user_id: int):
+    """เพิกถอน refresh token ทุกตัวของ user ที่ออกก่อนตอนนี้ (เช่นตอนปิดบัญชี)"""
+    await revoke(f"user:{user_id}", time.time() + REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+
+
+async def load_revocations():
+    """โหลดรายการที่ยังไม่หมดอายุจากฐานข้อมูลตอน start (worker ใหม่ยังไม่เคยได้รับ broadcast)"""
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(RevokedToken.key, RevokedToken.revoked_at, RevokedToken.expires_at)
+            .where(RevokedToken.expires_at > datetime.now(timezone.utc))
+        )
+        async for key, revoked_at, expires_at in result:
+            revocations.add(key, _to_timestamp(revoked_at), _to_timestamp(expires_at))
+
+
+async def purge_expired_revocations():
+    removed = revocations.purge()
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc)))
+        await db.commit()
+    return removed
+
+
+async def run_revocation_purge_loop():
+    while True:
+        await asyncio.sleep(REVOCATION_PURGE_INTERVAL)
+        try:
+            await purge_expired_revocations()
+        except Exception:
+            logger.exception("revocation purge failed")
+
+
+purge_task = SupervisedTask("revocation-purge", run_revocation_purge_loop)
+
+
+async def start_revocations():
+    await load_revocations()
+    await broadcast.subscribe(REVOCATION_CHANNEL, _on_revocation_message)
+    revocation_writer.start()
+    purge_task.start()
+
+
+async def stop_revocations():
+    await purge_task.stop()
+    await revocation_writer.stop()
+    await broadcast.unsubscribe(REVOCATION_CHANNEL)
+
+
+def stats() -> dict:
+    return {**revocations.stats(), "writer": revocation_writer.stats()}
@@ -0,0 +1,91 @@
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.cache import TTLCache, get_redis_client
+from ..database import is_replica_session
+from ..models.user import User
+from ..schemas.user import UserOut
+
+load_dotenv()
+
+# memory = cache ใน process (ค่าเริ่มต้น), redis = แชร์ระหว่างหลาย uvicorn worker
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+
+class MemoryUserCacheBackend:
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, user_id: int) -> Optional[UserOut]:
+        return self._cache.get(user_id)
+
+    async def set(self, user_id: int, profile: UserOut):
+        self._cache.set(user_id, profile)
+
+    async def delete(self, user_id: int):
+        self._cache.delete(user_id)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisUserCacheBackend:
+    def __init__(self, ttl: int, prefix: str = "collabboard:user:"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: int) -> Optional[UserOut]:
+        raw = await get_redis_client().get(f"{self.prefix}{user_id}")
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return UserOut.model_validate_json(raw)
+
+    async def set(self, user_id: int, profile: UserOut):
+        await get_redis_client().set(f"{self.prefix}{user_id}", profile.model_dump_json(), ex=self.ttl)
+
+    async def delete(self, user_id: int):
+        await get_redis_client().delete(f"{self.prefix}{user_id}")
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def _create_backend():
+    if USER_CACHE_BACKEND == "redis":
+        return RedisUserCacheBackend(ttl=USER_CACHE_TTL)
+    if USER_CACHE_BACKEND == "memory":
+        return MemoryUserCacheBackend(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+    raise ValueError(f"Unsupported USER_CACHE_BACKEND: {USER_CACHE_BACKEND}")
+
+
+user_cache = _create_backend()
+
+
+async def get_user_profile(db: AsyncSession, user_id: int) -> Optional[UserOut]:
+    """อ่าน profile จาก cache ก่อน ถ้าไม่มีค่อย query ฐานข้อมูลแล้วเก็บลง cache"""
+    profile = await user_cache.get(user_id)
+    if profile is not None:
+        return profile
+
+    user = await db.get(User, user_id)
+    if not user:
+        return None
+
+    profile = UserOut.model_validate(user)
+    # replica อาจตามหลัง primary: ถ้าเก็บค่าจาก replica ลง cache ค่าเก่าจะค้างอยู่จนหมด TTL
+    # แม้ invalidate_user จะถูกเรียกหลังเขียนไปแล้ว
+    if not is_replica_session(db):
+        await user_cache.set(user_id, profile)
+    return profile
+
+
+async def invalidate_user(user_id: int):
+    """เรียกทุกครั้งหลังเขียนข้อมูล user (สร้าง/แก้ไข profile)"""
+    await user_cache.delete(user_id)
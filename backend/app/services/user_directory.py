@@ -0,0 +1,111 @@
+import base64
+import json
+import os
+from typing import List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.cache import TTLCache
+from ..models.user import User
+from ..schemas.user import UserSearchPage, UserSummary
+
+load_dotenv()
+
+USER_SEARCH_CACHE_TTL = float(os.getenv("USER_SEARCH_CACHE_TTL", "10"))
+USER_SEARCH_MAX_LIMIT = 50
+USER_BATCH_MAX_IDS = 100
+
+# ผลค้นหาล่าสุด (type-ahead พิมพ์ซ้ำ/ถอยกลับบ่อย)
+search_cache = TTLCache(maxsize=4096, ttl=USER_SEARCH_CACHE_TTL)
+
+_SUMMARY_COLUMNS = (User.id, User.email, User.display_name, User.avatar_url)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _sort_key(db: AsyncSession, column):
+    # ต้องตรงกับ index ix_users_*_prefix บน PostgreSQL (COLLATE "C") เพื่อให้ใช้ลำดับจาก index
+    collation = "C" if db.get_bind().dialect.name == "postgresql" else "BINARY"
+    return func.lower(column).collate(collation)
+
+
+def _encode_cursor(key: str, user_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([key, user_id]).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        key, user_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(key), int(user_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+
+
+async def search_users(db: AsyncSession, q: str, limit: int, cursor: Optional[str] = None, fuzzy: bool = False) -> UserSearchPage:
+    """
+    prefix search (ค่าเริ่มต้น): display_name หรือ email ถ้า q มี "@" เรียงตาม (key, id) แบบ keyset
+    fuzzy: ชื่อที่ใกล้เคียงที่สุดด้วย trigram คืนหน้าเดียว
+           (ฐานข้อมูลอื่นไม่มี pg_trgm: ใช้ชื่อที่มี q อยู่ตรงไหนก็ได้แทน เรียงตามชื่อ)
+    """
+    q = q.strip().lower()
+    limit = max(1, min(limit, USER_SEARCH_MAX_LIMIT))
+    cache_key = (q, limit, cursor, fuzzy)
+    page = search_cache.get(cache_key)
+    if page is not None:
+        return page
+
+    if fuzzy:
+        if db.get_bind().dialect.name == "postgresql":
+            match = User.display_name.op("%")(q)
+            order = (User.display_name.op("<->")(q),)
+        else:
+            key = _sort_key(db, User.display_name)
+            match = key.like("%" + _escape_like(q) + "%", escape="\\")
+            order = (key, User.id)
+        stmt = (
+            select(*_SUMMARY_COLUMNS)
+            .where(User.is_active.is_(True), match)
+            .order_by(*order)
+            .limit(limit)
+        )
+        rows = (await db.execute(stmt)).all()
+        page = UserSearchPage(users=[UserSummary.model_validate(row._mapping) for row in rows])
+    else:
+        key = _sort_key(db, User.email if "@" in q else User.display_name)
+        stmt = select(*_SUMMARY_COLUMNS, key.label("sort_key")).where(
+            User.is_active.is_(True),
+            key.like(_escape_like(q) + "%", escape="\\"),
+        )
+        if cursor:
+            after_key, after_id = _decode_cursor(cursor)
+            stmt = stmt.where(tuple_(key, User.id) > tuple_(after_key, after_id))
+        stmt = stmt.order_by(key, User.id).limit(limit + 1)
+
+        rows = (await db.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1].sort_key, rows[-1].id)
+        page = UserSearchPage(
+            users=[UserSummary.model_validate(row._mapping) for row in rows],
+            next_cursor=next_cursor,
+        )
+
+    search_cache.set(cache_key, page)
+    return page
+
+
+async def get_users_by_ids(db: AsyncSession, user_ids: List[int]) -> List[UserSummary]:
+    """resolve หลาย id ใน query เดียว (ลำดับตาม id ที่ขอ ข้าม id ที่ไม่มี)"""
+    unique_ids = list(dict.fromkeys(user_ids))[:USER_BATCH_MAX_IDS]
+    if not unique_ids:
+        return []
+    rows = (await db.execute(select(*_SUMMARY_COLUMNS).where(User.id.in_(unique_ids)))).all()
+    by_id = {row.id: UserSummary.model_validate(row._mapping) for row in rows}
+    return [by_id[user_id] for user_id in unique_ids if user_id in by_id]
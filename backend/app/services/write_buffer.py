@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, List
+from ..core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# batch ที่ flush ไม่สำเร็จถูกใส่คืนหน้าคิวแล้วลองใหม่ (รอนานขึ้นเท่าตัวทุกครั้ง) ก่อนจะยอมทิ้ง
+WRITE_BUFFER_MAX_RETRIES = int(os.getenv("WRITE_BUFFER_MAX_RETRIES", "5"))
+WRITE_BUFFER_RETRY_DELAY = float(os.getenv("WRITE_BUFFER_RETRY_DELAY", "0.5"))
+WRITE_BUFFER_RETRY_MAX_DELAY = float(os.getenv("WRITE_BUFFER_RETRY_MAX_DELAY", "10"))
+
+
+class BatchWriter:
+    """
+    buffer ในหน่วยความจำสำหรับงานเขียนที่ไม่ต้องทำใน request (write-behind)
+    - flush เป็น batch จาก background task ทุก interval วินาที หรือเร็วกว่านั้นเมื่อครบ batch_size
+    - จำกัดขนาดไว้ที่ max_pending ถ้าเต็มจะทิ้งรายการใหม่และนับใน dropped
+    - flush_fn ล้ม (เช่นฐานข้อมูลหลุดชั่วคราว): batch กลับไปหน้าคิวแล้วลองใหม่แบบ backoff
+      ทิ้ง (นับใน failed) ก็ต่อเมื่อล้มติดกันเกิน max_retries ครั้ง
+    - stop() ให้ loop flush ส่วนที่เหลือทั้งหมดแล้วจบเอง ก่อนคืนค่า (เรียกตอน shutdown)
+      ไม่ cancel task เพราะ cancel ระหว่าง flush_fn จะทำให้ batch ที่ _take ออกมาแล้วหายไป
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[List], Awaitable[None]],
+        batch_size: int = 500,
+        interval: float = 0.1,
+        max_pending: int = 50000,
+        max_retries: int = WRITE_BUFFER_MAX_RETRIES,
+        retry_delay: float = WRITE_BUFFER_RETRY_DELAY,
+    ):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried = 0
+        self._consecutive_failures = 0
+        self.flush_seconds = Histogram()
+        self._items = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._stopping = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._items)
+
+    def add(self, item) -> bool:
+        if len(self._items) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._items.append(item)
+        if len(self._items) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _take(self) -> List:
+        items = self._items[:self.batch_size]
+        del self._items[:self.batch_size]
+        return items
+
+    async def _flush_batch(self, items: List) -> bool:
+        """คืน False ถ้าล้มและ batch ถูกใส่คืนหน้าคิวเพื่อรอลองใหม่"""
+        start = time.perf_counter()
+        try:
+            await self.flush_fn(items)
+        except Exception:
+            self._consecutive_failures += 1
+            if self._consecutive_failures > self.max_retries:
+                self._consecutive_failures = 0
+                self.failed += len(items)
+                logger.exception("%s: dropping %d items after %d retries", self.name, len(items), self.max_retries)
+                return True
+            self.retried += len(items)
+            self._items[:0] = items
+            logger.warning(
+                "%s: failed to flush %d items (attempt %d), will retry",
+                self.name, len(items), self._consecutive_failures, exc_info=True,
+            )
+            return False
+        self._consecutive_failures = 0
+        self.flushed += len(items)
+        self.flush_seconds.observe(time.perf_counter() - start)
+        return True
+
+    async def flush(self) -> bool:
+        """flush จนคิวว่าง คืน False ถ้าหยุดเพราะ batch ล้มและรอลองใหม่"""
+        while self._items:
+            if not await self._flush_batch(self._take()):
+                return False
+        return True
+
+    async def _drain(self):
+        # flush จนคิวว่าง รอ backoff ระหว่างรอบที่ล้ม (ไม่วนถี่ใส่ฐานข้อมูลที่ล่มอยู่)
+        while not await self.flush():
+            delay = self.retry_delay * 2 ** (self._consecutive_failures - 1)
+            await asyncio.sleep(min(delay, WRITE_BUFFER_RETRY_MAX_DELAY))
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._drain()
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            # รอ flush ที่ค้างอยู่ (ถ้ามี) ให้เสร็จ loop จะออกเองในรอบถัดไป
+            await self._task
+            self._task = None
+        # รายการที่ถูก add ระหว่างรอ หรือ writer ที่ไม่เคย start
+        await self._drain()
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retried": self.retried,
+            "flush_seconds": self.flush_seconds.snapshot(),
+        }
@@ -0,0 +1,87 @@
+"""
+วัดขนาด payload และเวลา reconnect sync เมื่อ op log ของ board โตถึงหลักล้าน op
+ใช้ฐานข้อมูลจาก DATABASE_URL สร้าง user/board ชั่วคราวแล้วลบทิ้งเมื่อจบ
+
+    cd backend && python -m benchmarks.bench_board_sync --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, text
+
+from app.database import AsyncSessionLocal, dispose_engines, get_async_engine, init_db
+from app.models.board import Board
+from app.models.user import User
+from app.services.board_service import compact_board, create_board, sync_board
+
+# element ที่ถูกแก้ซ้ำไปมา state จึงคงที่แม้ log ยาวขึ้น
+ELEMENTS = 500
+
+
+async def grow_log(db, board_id, start, stop):
+    await db.execute(
+        text(
+            "INSERT INTO board_operations (board_id, seq, user_id, op) "
+            "SELECT :board_id, n, NULL, jsonb_build_object("
+            " 'op', 'upsert', 'element_id', 'el-' || (n % :elements),"
+            " 'data', jsonb_build_object('x', n % 1000, 'y', n % 700)) "
+            "FROM generate_series(:start, :stop) AS n"
+        ),
+        {"board_id": board_id, "start": start, "stop": stop, "elements": ELEMENTS},
+    )
+    await db.execute(text("UPDATE boards SET head_seq = :seq WHERE id = :id"), {"seq": stop, "id": board_id})
+    await db.commit()
+
+
+async def measure(db, board_id, since):
+    board = await db.get(Board, board_id, populate_existing=True)
+    start = time.perf_counter()
+    result = await sync_board(db, board, since)
+    elapsed = time.perf_counter() - start
+    return len(result.model_dump_json()), elapsed, len(result.ops), result.snapshot is not None
+
+
+async def run(sizes, gaps):
+    get_async_engine()
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex}@example.com", display_name="Board bench")
+        db.add(user)
+        await db.commit()
+        board = await create_board(db, "sync benchmark", user.id)
+
+        try:
+            print(f"{'log size':>10} {'gap':>10} {'bytes':>12} {'ms':>8} {'ops':>7} {'snapshot':>9}")
+            head = 0
+            for size in sorted(sizes):
+                await grow_log(db, board.id, head + 1, size)
+                head = size
+                compact_start = time.perf_counter()
+                await compact_board(db, board.id)
+                compact_ms = (time.perf_counter() - compact_start) * 1000
+
+                for gap in gaps + [head]:
+                    since = max(0, head - gap)
+                    size_bytes, elapsed, ops, has_snapshot = await measure(db, board.id, since)
+                    label = "full" if since == 0 else gap
+                    print(f"{head:>10,} {label:>10} {size_bytes:>12,} {elapsed * 1000:>8.1f} {ops:>7} {str(has_snapshot):>9}")
+                print(f"{'':>10} compaction {compact_ms:.0f} ms")
+        finally:
+            await db.execute(delete(Board).where(Board.id == board.id))
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+    await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--gaps", type=int, nargs="+", default=[10, 500, 50_000])
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.gaps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+วัด latency และ messages/sec ของ broadcast backend เมื่อจำนวน worker process เพิ่มจาก 1 ถึง N
+ทุก process subscribe channel เดียวกัน (เหมือน worker ที่มีคนอยู่ในห้องเดียวกัน) และ process แรกเป็นผู้ publish
+
+    cd backend && BROADCAST_BACKEND=postgres python -m benchmarks.bench_broadcast_scaling --max-workers 8
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+
+CHANNEL = "room:bench-scaling"
+
+
+async def worker(index, messages, rate, ready, start, results):
+    from app.database import dispose_engines
+    from app.services.broadcast import create_broadcast_backend
+
+    backend = create_broadcast_backend()
+    await backend.connect()
+    latencies = []
+    done = asyncio.Event()
+
+    def on_message(raw):
+        payload = json.loads(raw)
+        latencies.append(time.time() - payload["sent_at"])
+        if payload["seq"] == messages - 1:
+            done.set()
+
+    await backend.subscribe(CHANNEL, on_message)
+    ready.put(index)
+    while not start.is_set():
+        await asyncio.sleep(0.01)
+
+    if index == 0:
+        interval = 1 / rate if rate else 0
+        for seq in range(messages):
+            await backend.publish(CHANNEL, json.dumps({"seq": seq, "sent_at": time.time()}))
+            if interval:
+                await asyncio.sleep(interval)
+
+    try:
+        await asyncio.wait_for(done.wait(), timeout=30)
+    except asyncio.TimeoutError:
+        pass
+    await backend.disconnect()
+    await dispose_engines()
+    results.put(latencies)
+
+
+def run_worker(*args):
+    asyncio.run(worker(*args))
+
+
+def run_round(workers, messages, rate):
+    ready, results = multiprocessing.Queue(), multiprocessing.Queue()
+    start = multiprocessing.Event()
+    procs = [
+        multiprocessing.Process(target=run_worker, args=(i, messages, rate, ready, start, results))
+        for i in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for _ in procs:
+        ready.get()
+
+    begin = time.perf_counter()
+    start.set()
+    latencies = []
+    for _ in procs:
+        latencies.extend(results.get())
+    elapsed = time.perf_counter() - begin
+    for proc in procs:
+        proc.join()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else float("nan")
+    expected = workers * messages
+    print(
+        f"{workers:>8} {len(latencies):>10}/{expected:<10} {len(latencies) / elapsed:>12,.0f} "
+        f"{p50 * 1000:>10.2f} {p99 * 1000:>10.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=0, help="publish rate per second (0 = as fast as possible)")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'delivered':>21} {'msgs/s':>12} {'p50 ms':>10} {'p99 ms':>10}")
+    workers = 1
+    while workers <= args.max_workers:
+        run_round(workers, args.messages, args.rate)
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
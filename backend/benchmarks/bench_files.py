@@ -0,0 +1,110 @@
+"""
+Benchmark ของ upload/download ไฟล์กับ server ที่รันอยู่
+
+    cd backend && uvicorn app.main:app --port 8000 &
+    cd backend && python -m benchmarks.bench_files --user-id 1 --server-pid $! --upload-gb 2 --downloads 500
+
+- upload: ส่งไฟล์ขนาด --upload-gb แบบ stream (สร้างข้อมูลทีละก้อน ไม่อ่านจาก disk) แล้วดู RSS ของ server ระหว่างส่ง
+- download: ยิง GET /files/{id} พร้อมกัน --downloads request แล้ววัดเวลา/throughput
+
+ต้องใช้ JWT_SECRET_KEY เดียวกับ server และ --user-id ต้องมีอยู่จริงในตาราง users
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from app.core.jwt_auth import create_access_token
+
+CHUNK = 1024 * 1024
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+async def body(total: int):
+    block = os.urandom(CHUNK)
+    sent = 0
+    while sent < total:
+        size = min(CHUNK, total - sent)
+        # เปลี่ยนไบต์แรกของทุกก้อน ไม่ให้ไฟล์ซ้ำกับรอบก่อน (ไม่โดน dedup)
+        yield sent.to_bytes(8, "little") + block[8:size] if size > 8 else block[:size]
+        sent += size
+
+
+async def sample_rss(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(rss_mb(pid))
+        await asyncio.sleep(0.2)
+
+
+async def upload(client, size, pid):
+    created = (await client.post("/files/uploads", json={"name": "bench.bin", "size": size})).json()
+    samples, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, samples, stop)) if pid else None
+
+    start = time.perf_counter()
+    resp = await client.patch(
+        f"/files/uploads/{created['id']}",
+        content=body(size),
+        headers={"Upload-Offset": "0", "Content-Type": "application/octet-stream"},
+        timeout=None,
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    if sampler:
+        await sampler
+    resp.raise_for_status()
+    result = resp.json()
+
+    print(f"upload    {size / 1024 ** 3:.2f} GB in {elapsed:.1f}s ({size / elapsed / 1024 ** 2:,.0f} MB/s)")
+    if samples:
+        print(f"server RSS min {min(samples):.0f} MB  max {max(samples):.0f} MB  ({len(samples)} samples)")
+    return result["file_id"]
+
+
+async def download(client, file_id, count):
+    async def one():
+        start = time.perf_counter()
+        size = 0
+        async with client.stream("GET", f"/files/{file_id}", headers={"Range": f"bytes=0-{CHUNK * 8 - 1}"}) as resp:
+            async for chunk in resp.aiter_bytes():
+                size += len(chunk)
+        return time.perf_counter() - start, size
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(count)))
+    elapsed = time.perf_counter() - start
+    timings = sorted(t for t, _ in results)
+    total = sum(size for _, size in results)
+    print(f"download  {count} concurrent ranged GETs in {elapsed:.2f}s ({total / elapsed / 1024 ** 2:,.0f} MB/s)")
+    print(f"latency   p50 {timings[len(timings) // 2] * 1000:.0f} ms  p99 {timings[int(len(timings) * 0.99) - 1] * 1000:.0f} ms")
+
+
+async def run(args):
+    token = create_access_token({"sub": args.user_id, "email": "bench@example.com", "display_name": "Bench"})
+    limits = httpx.Limits(max_connections=args.downloads)
+    async with httpx.AsyncClient(base_url=args.url, cookies={"access_token": token}, limits=limits, timeout=120) as client:
+        file_id = await upload(client, int(args.upload_gb * 1024 ** 3), args.server_pid)
+        await download(client, file_id, args.downloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--server-pid", type=int, default=None)
+    parser.add_argument("--upload-gb", type=float, default=2)
+    parser.add_argument("--downloads", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
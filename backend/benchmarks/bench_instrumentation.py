@@ -0,0 +1,81 @@
+"""
+วัด overhead ของ MetricsMiddleware + SQLAlchemy event listener ต่อ request
+app ทดสอบมี route เดียวที่รัน query N ครั้งบน SQLite in-memory เทียบแบบไม่มี/มี instrumentation
+
+    cd backend && python -m benchmarks.bench_instrumentation --requests 5000 --queries 5
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core.instrumentation import MetricsMiddleware, instrument_engine, render_request_metrics
+
+
+def build_app(queries: int, instrumented: bool):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    if instrumented:
+        instrument_engine(engine)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(queries):
+                conn.execute(text("SELECT :id"), {"id": item_id}).scalar()
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def measure(app, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(50):
+            await client.get(f"/items/{i}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                response = await client.get(f"/items/{i}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - start
+
+
+async def run(requests: int, queries: int, concurrency: int, rounds: int):
+    results = {}
+    for label, instrumented in (("baseline", False), ("instrumented", True)):
+        app = build_app(queries, instrumented)
+        timings = sorted([await measure(app, requests, concurrency) for _ in range(rounds)])
+        results[label] = timings[len(timings) // 2] / requests * 1e6
+        print(f"{label:<13} {results[label]:>8.1f} us/request")
+
+    overhead = results["instrumented"] - results["baseline"]
+    print(f"overhead      {overhead:>8.1f} us/request ({overhead / results['baseline'] * 100:.1f}%)")
+    lines = []
+    render_request_metrics(lines)
+    print(f"exported      {len(lines)} lines")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.queries, args.concurrency, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
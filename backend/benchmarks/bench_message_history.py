@@ -0,0 +1,105 @@
+"""
+โหลดข้อความ 10M แถวลงห้องเดียว แล้วเทียบ latency ของหน้าแรกกับหน้าลึก ๆ (keyset vs OFFSET)
+ใช้ฐานข้อมูลจาก DATABASE_URL สร้าง user/board ชั่วคราวแล้วลบทิ้งเมื่อจบ
+
+    cd backend && python -m benchmarks.bench_message_history --messages 10000000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, select, text
+
+from app.database import AsyncSessionLocal, dispose_engines, get_async_engine, init_db
+from app.models.board import Board
+from app.models.message import Message
+from app.models.user import User
+from app.services.board_service import create_board
+from app.services.message_service import encode_cursor, get_message_page
+
+PAGE = 50
+LOAD_CHUNK = 1_000_000
+
+
+async def load(db, room_id, user_id, total):
+    for start in range(1, total + 1, LOAD_CHUNK):
+        stop = min(total, start + LOAD_CHUNK - 1)
+        await db.execute(
+            text(
+                "INSERT INTO messages (room_id, user_id, body, created_at) "
+                "SELECT :room_id, :user_id, 'message ' || n, now() - make_interval(secs => :total - n) "
+                "FROM generate_series(:start, :stop) AS n"
+            ),
+            {"room_id": room_id, "user_id": user_id, "start": start, "stop": stop, "total": total},
+        )
+        await db.commit()
+        print(f"loaded {stop:,}")
+    await db.execute(text("ANALYZE messages"))
+    await db.commit()
+
+
+async def timed(fn, repeat=20):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+async def run(total, depths):
+    get_async_engine()
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex}@example.com", display_name="Message bench")
+        db.add(user)
+        await db.commit()
+        board = await create_board(db, "history benchmark", user.id)
+        try:
+            await load(db, board.id, user.id, total)
+            print(f"{'page':>10} {'keyset ms':>10} {'offset ms':>10}")
+            for depth in depths:
+                offset = depth * PAGE
+                if offset >= total:
+                    continue
+                # หา cursor ของหน้าที่ depth (ไม่นับเวลา) แล้ววัด keyset query จาก cursor นั้น
+                cursor = None
+                if depth:
+                    row = (await db.execute(
+                        select(Message.created_at, Message.id)
+                        .where(Message.room_id == board.id)
+                        .order_by(Message.created_at.desc(), Message.id.desc())
+                        .offset(offset - 1)
+                        .limit(1)
+                    )).one()
+                    cursor = encode_cursor(row.created_at, row.id)
+
+                keyset_ms = await timed(lambda: get_message_page(db, board.id, PAGE, cursor))
+                offset_ms = await timed(lambda: db.execute(
+                    select(Message)
+                    .where(Message.room_id == board.id)
+                    .order_by(Message.created_at.desc(), Message.id.desc())
+                    .offset(offset)
+                    .limit(PAGE)
+                ), repeat=3)
+                print(f"{depth:>10,} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+        finally:
+            await db.execute(delete(Message).where(Message.room_id == board.id))
+            await db.execute(delete(Board).where(Board.id == board.id))
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+    await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 10, 1_000, 50_000, 190_000])
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.depths))
+
+
+if __name__ == "__main__":
+    main()
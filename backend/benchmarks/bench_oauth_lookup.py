@@ -0,0 +1,64 @@
+"""
+วัด latency ของ lookup ด้วย (oauth_provider, oauth_id) เมื่อ table โตขึ้นเป็นล้านแถว
+ใช้ temp table ที่มี unique index แบบเดียวกับ users บน PostgreSQL จาก DATABASE_URL
+
+    cd backend && python -m benchmarks.bench_oauth_lookup --sizes 10000 100000 1000000 3000000
+    cd backend && python -m benchmarks.bench_oauth_lookup --no-index --sizes 10000 100000   # เทียบกับ seq scan
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+
+from app.database import get_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--no-index", action="store_true")
+    args = parser.parse_args()
+
+    with get_engine().connect() as conn:
+        conn.execute(text(
+            "CREATE TEMP TABLE bench_users ("
+            " id serial PRIMARY KEY, oauth_provider varchar(20), oauth_id varchar(100),"
+            " email varchar(255) NOT NULL, display_name varchar(100) NOT NULL)"
+        ))
+        if not args.no_index:
+            conn.execute(text("CREATE UNIQUE INDEX ON bench_users (oauth_provider, oauth_id)"))
+
+        rows = 0
+        print(f"{'rows':>12} {'avg us':>10} {'p99 us':>10}")
+        for size in sorted(args.sizes):
+            conn.execute(
+                text(
+                    "INSERT INTO bench_users (oauth_provider, oauth_id, email, display_name) "
+                    "SELECT 'google', 'g' || n, 'user' || n || '@example.com', 'User ' || n "
+                    "FROM generate_series(:start, :stop) AS n"
+                ),
+                {"start": rows + 1, "stop": size},
+            )
+            rows = size
+            conn.execute(text("ANALYZE bench_users"))
+
+            query = text("SELECT id FROM bench_users WHERE oauth_provider = 'google' AND oauth_id = :oauth_id")
+            timings = []
+            for _ in range(args.lookups):
+                oauth_id = f"g{random.randint(1, rows)}"
+                start = time.perf_counter()
+                conn.execute(query, {"oauth_id": oauth_id}).scalar_one()
+                timings.append(time.perf_counter() - start)
+
+            timings.sort()
+            avg = sum(timings) / len(timings)
+            p99 = timings[int(len(timings) * 0.99) - 1]
+            print(f"{rows:>12,} {avg * 1e6:>10.1f} {p99 * 1e6:>10.1f}")
+
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+โหลดเอกสารปลอม (ข้อความแชท, board, ชื่อไฟล์) หลายล้านแถวแล้ววัด p50/p95/p99 ของ full-text search
+user ที่วัดเป็นสมาชิกแค่บาง board (--member-boards) ที่เหลือเป็นของ user อื่น จึงวัดการกรองสิทธิ์ไปด้วย
+ใช้ PostgreSQL จาก DATABASE_URL แถวที่สร้างผูกกับ user โดเมน @bench.invalid และถูกลบเมื่อจบ
+
+    cd backend && python -m benchmarks.bench_search --messages 5000000 --files 500000 --boards 2000
+    cd backend && python -m benchmarks.bench_search --skip-load --keep   # วัดซ้ำบนข้อมูลเดิม
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import delete, select, text
+
+from app.database import AsyncSessionLocal, dispose_engines, get_async_engine, init_db
+from app.models.board import Board
+from app.models.file import FileBlob, SharedFile
+from app.models.message import Message
+from app.models.user import User
+from app.services.search_service import search_cache, search_workspace
+
+LOAD_CHUNK = 500_000
+BENCH_DOMAIN = "@bench.invalid"
+BLOB_SHA256 = "0" * 64
+VOCABULARY_SIZE = 5000
+WORDS_PER_MESSAGE = 12
+
+
+def vocabulary(size: int):
+    rng = random.Random(42)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+    return sorted(words)
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def _bench_user(db, name: str) -> User:
+    email = f"{name}{BENCH_DOMAIN}"
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if user is None:
+        user = User(email=email, display_name=name)
+        db.add(user)
+        await db.commit()
+    return user
+
+
+async def load(db, args, words, member, other):
+    # power(random(), 3) ทำให้คำต้น ๆ ของ vocabulary พบบ่อยมาก (ใกล้เคียงภาษาจริง) คำท้าย ๆ พบน้อย
+    pick = f"(CAST(:words AS text[]))[1 + floor(power(random(), 3) * {len(words)})::int]"
+
+    await db.execute(text(
+        "INSERT INTO boards (name, owner_id) "
+        f"SELECT {pick} || ' ' || {pick} || ' board ' || n, CASE WHEN n <= :members THEN :member ELSE :other END "
+        "FROM generate_series(1, :boards) AS n"
+    ), {"boards": args.boards, "members": args.member_boards, "member": member.id, "other": other.id, "words": words})
+    await db.execute(text(
+        "INSERT INTO board_members (board_id, user_id, role) "
+        "SELECT id, owner_id, 'owner' FROM boards WHERE owner_id IN (:member, :other)"
+    ), {"member": member.id, "other": other.id})
+    board_ids = [row.id for row in await db.execute(
+        select(Board.id).where(Board.owner_id.in_([member.id, other.id])).order_by(Board.id)
+    )]
+    await db.execute(text(
+        "INSERT INTO file_blobs (sha256, size) VALUES (:sha256, 0) ON CONFLICT DO NOTHING"
+    ), {"sha256": BLOB_SHA256})
+    await db.commit()
+    print(f"loaded {len(board_ids):,} boards ({args.member_boards:,} visible to the bench user)")
+
+    first_board, board_count = board_ids[0], len(board_ids)
+    body = " || ' ' || ".join([pick] * WORDS_PER_MESSAGE)
+    for start in range(1, args.messages + 1, LOAD_CHUNK):
+        stop = min(args.messages, start + LOAD_CHUNK - 1)
+        await db.execute(text(
+            "INSERT INTO messages (room_id, user_id, body) "
+            f"SELECT :first + n % :count, :other, {body} FROM generate_series(:start, :stop) AS n"
+        ), {"first": first_board, "count": board_count, "other": other.id, "start": start, "stop": stop, "words": words})
+        await db.commit()
+        print(f"loaded {stop:,} messages")
+    for start in range(1, args.files + 1, LOAD_CHUNK):
+        stop = min(args.files, start + LOAD_CHUNK - 1)
+        await db.execute(text(
+            "INSERT INTO shared_files (owner_id, board_id, name, content_type, sha256, size) "
+            f"SELECT :other, :first + n % :count, {pick} || '_' || {pick} || '_' || n || '.pdf', "
+            "'application/pdf', :sha256, 0 FROM generate_series(:start, :stop) AS n"
+        ), {
+            "first": first_board, "count": board_count, "other": other.id, "sha256": BLOB_SHA256,
+            "start": start, "stop": stop, "words": words,
+        })
+        await db.commit()
+        print(f"loaded {stop:,} files")
+    for table in ("boards", "board_members", "messages", "shared_files"):
+        await db.execute(text(f"ANALYZE {table}"))
+    await db.commit()
+
+
+def build_queries(words, count: int):
+    rng = random.Random(7)
+    common, rare = words[:50], words[len(words) // 2:]
+    kinds = {
+        "common": lambda: rng.choice(common),
+        "rare": lambda: rng.choice(rare),
+        "two words": lambda: f"{rng.choice(common)} {rng.choice(rare)}",
+        "phrase": lambda: f'"{rng.choice(common)} {rng.choice(common)}"',
+        "or": lambda: f"{rng.choice(rare)} or {rng.choice(rare)}",
+    }
+    return {name: [make() for _ in range(count)] for name, make in kinds.items()}
+
+
+async def measure(db, user_id, queries, limit):
+    print(f"{'query':>10} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'page2 p95':>10} {'cached p95':>11}")
+    for name, batch in queries.items():
+        first, second, cached = [], [], []
+        for q in batch:
+            search_cache.clear()
+            start = time.perf_counter()
+            page = await search_workspace(db, user_id, q, limit)
+            first.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await search_workspace(db, user_id, q, limit)
+            cached.append(time.perf_counter() - start)
+
+            if page.next_cursor:
+                start = time.perf_counter()
+                await search_workspace(db, user_id, q, limit, page.next_cursor)
+                second.append(time.perf_counter() - start)
+        first.sort()
+        second.sort()
+        cached.sort()
+        page2 = f"{percentile(second, 95) * 1000:>10.2f}" if second else f"{'-':>10}"
+        print(
+            f"{name:>10} {len(first):>5} {percentile(first, 50) * 1000:>9.2f} {percentile(first, 95) * 1000:>9.2f} "
+            f"{percentile(first, 99) * 1000:>9.2f} {page2} {percentile(cached, 95) * 1000:>11.3f}"
+        )
+
+
+async def cleanup(db, user_ids):
+    boards = select(Board.id).where(Board.owner_id.in_(user_ids))
+    await db.execute(delete(Message).where(Message.room_id.in_(boards)))
+    await db.execute(delete(SharedFile).where(SharedFile.owner_id.in_(user_ids)))
+    await db.execute(delete(Board).where(Board.owner_id.in_(user_ids)))
+    await db.execute(delete(User).where(User.id.in_(user_ids)))
+    await db.execute(delete(FileBlob).where(FileBlob.sha256 == BLOB_SHA256))
+    await db.commit()
+
+
+async def run(args):
+    get_async_engine()
+    await init_db()
+    words = vocabulary(VOCABULARY_SIZE)
+    async with AsyncSessionLocal() as db:
+        member = await _bench_user(db, "search-bench-member")
+        other = await _bench_user(db, "search-bench-other")
+        try:
+            if not args.skip_load:
+                await load(db, args, words, member, other)
+            await measure(db, member.id, build_queries(words, args.queries), args.limit)
+        finally:
+            if not args.keep:
+                await cleanup(db, [member.id, other.id])
+    await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5_000_000)
+    parser.add_argument("--files", type=int, default=500_000)
+    parser.add_argument("--boards", type=int, default=2_000)
+    parser.add_argument("--member-boards", type=int, default=200, help="จำนวน board ที่ user ที่วัดเป็นสมาชิก")
+    parser.add_argument("--queries", type=int, default=100, help="จำนวน query ต่อแบบ")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--skip-load", action="store_true", help="ใช้ข้อมูลจากรอบก่อน (ที่รันด้วย --keep)")
+    parser.add_argument("--keep", action="store_true", help="ไม่ลบข้อมูลเมื่อจบ")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
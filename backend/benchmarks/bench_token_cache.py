@@ -0,0 +1,37 @@
+"""
+Micro-benchmark: verify_token แบบมี cache เทียบกับ decode ทุกครั้ง
+
+    cd backend && python -m benchmarks.bench_token_cache --iterations 20000
+"""
+import argparse
+import time
+
+from app.core.jwt_auth import create_access_token, decode_token, token_cache, verify_token
+
+
+def run(label, fn, token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(token)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {iterations / elapsed:>12,.0f} ops/s  {elapsed / iterations * 1e6:>8.2f} us/op")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": 1, "email": "bench@example.com", "display_name": "Bench"})
+
+    uncached = run("uncached", decode_token, token, args.iterations)
+    token_cache.clear()
+    cached = run("cached", verify_token, token, args.iterations)
+
+    print(f"speedup    {uncached / cached:.1f}x")
+    print(f"cache      {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+โหลด user ปลอม 5M แถวแล้ววัด latency ของ type-ahead search (prefix/fuzzy) ทีละตัวอักษร
+ใช้ฐานข้อมูล PostgreSQL จาก DATABASE_URL แถวที่สร้างใช้ email โดเมน @bench.invalid และถูกลบเมื่อจบ
+
+    cd backend && python -m benchmarks.bench_user_search --users 5000000 --query "somchai"
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.database import AsyncSessionLocal, dispose_engines, get_async_engine, init_db
+from app.services.user_directory import search_cache, search_users
+
+LOAD_CHUNK = 500_000
+NAMES = ["somchai", "somsak", "suda", "anan", "malee", "prasert", "niran", "wichai", "kanya", "pim"]
+
+
+async def load(db, total):
+    names = "ARRAY[" + ",".join(f"'{name}'" for name in NAMES) + "]"
+    for start in range(1, total + 1, LOAD_CHUNK):
+        stop = min(total, start + LOAD_CHUNK - 1)
+        await db.execute(
+            text(
+                "INSERT INTO users (email, display_name, is_active) "
+                f"SELECT 'user' || n || '@bench.invalid', ({names})[1 + n % {len(NAMES)}] || ' ' || md5(n::text), true "
+                "FROM generate_series(:start, :stop) AS n"
+            ),
+            {"start": start, "stop": stop},
+        )
+        await db.commit()
+        print(f"loaded {stop:,}")
+    await db.execute(text("ANALYZE users"))
+    await db.commit()
+
+
+async def timed(fn, repeat=20):
+    timings = []
+    for _ in range(repeat):
+        search_cache.clear()
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+async def run(total, query, limit):
+    get_async_engine()
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        try:
+            await load(db, total)
+            print(f"{'query':>12} {'prefix ms':>10} {'page2 ms':>10} {'fuzzy ms':>10}")
+            for size in range(2, len(query) + 1):
+                prefix = query[:size]
+                first = await search_users(db, prefix, limit)
+                prefix_ms = await timed(lambda: search_users(db, prefix, limit))
+                page2_ms = 0.0
+                if first.next_cursor:
+                    page2_ms = await timed(lambda: search_users(db, prefix, limit, first.next_cursor))
+                fuzzy_ms = await timed(lambda: search_users(db, prefix, limit, fuzzy=True), repeat=5)
+                print(f"{prefix:>12} {prefix_ms:>10.2f} {page2_ms:>10.2f} {fuzzy_ms:>10.2f}")
+        finally:
+            await db.execute(text("DELETE FROM users WHERE email LIKE '%@bench.invalid'"))
+            await db.commit()
+    await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5_000_000)
+    parser.add_argument("--query", default="somchai")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.query, args.limit))
+
+
+if __name__ == "__main__":
+    main()
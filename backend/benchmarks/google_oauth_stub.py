@@ -0,0 +1,46 @@
+"""
+Google OAuth แบบ offline สำหรับ load test: แทน method ของ oauth.google ที่ต้องคุยกับ Google
+ให้ /auth/google/login redirect กลับมาที่ callback ทันที และ callback ได้ user info ที่สร้างจาก code
+
+client ส่ง header X-Stub-Google-User เพื่อเลือกว่าจะ login เป็น Google account ไหน
+"""
+from urllib.parse import urlencode
+
+from starlette.responses import RedirectResponse
+
+STUB_USER_HEADER = "x-stub-google-user"
+
+
+def stub_user_info(account: str, nonce: str) -> dict:
+    return {
+        "iss": "https://accounts.google.com",
+        "sub": f"stub-{account}",
+        "email": f"google-{account}@example.com",
+        "email_verified": True,
+        "name": f"Google {account}",
+        "picture": f"https://example.com/avatars/{account}.png",
+        "nonce": nonce,
+    }
+
+
+def install(client):
+    """แทน method ของ authlib client (เช่น oauth.google) ด้วย stub ที่ไม่ต่อ network"""
+
+    async def authorize_redirect(request, redirect_uri, **kwargs):
+        account = request.headers.get(STUB_USER_HEADER, "anonymous")
+        query = urlencode({"code": account, "state": "stub"})
+        return RedirectResponse(f"{redirect_uri}?{query}", status_code=302)
+
+    async def authorize_access_token(request, **kwargs):
+        code = request.query_params.get("code")
+        if not code:
+            return None
+        return {"access_token": f"stub-access-{code}", "token_type": "Bearer", "id_token": code}
+
+    async def parse_id_token(token, nonce, claims_options=None, **kwargs):
+        return stub_user_info(token["id_token"], nonce)
+
+    client.authorize_redirect = authorize_redirect
+    client.authorize_access_token = authorize_access_token
+    client.parse_id_token = parse_id_token
+    return client
@@ -0,0 +1,95 @@
+"""
+Load test ของ /ws/rooms/{room_id}: เปิด socket จำนวนมากแล้ววัด broadcast latency
+
+    cd backend && uvicorn app.main:app --port 8000          # อีก terminal
+    cd backend && python -m benchmarks.ws_load --sockets 2000 --rooms 20 --duration 20
+
+ต้องใช้ JWT_SECRET_KEY เดียวกับ server เพราะ script สร้าง access_token cookie เอง
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import websockets
+
+from app.core.jwt_auth import create_access_token
+
+
+async def subscriber(url, cookie, latencies, ready, stop):
+    async with websockets.connect(url, additional_headers={"Cookie": cookie}, max_queue=None) as ws:
+        ready.release()
+        while not stop.is_set():
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            now = time.time()
+            message = json.loads(raw)
+            for event in message.get("events", []):
+                if event.get("type") == "bench":
+                    latencies.append(now - event["sent_at"])
+
+
+async def publisher(url, cookie, rate, stop):
+    async with websockets.connect(url, additional_headers={"Cookie": cookie}) as ws:
+        interval = 1 / rate
+        while not stop.is_set():
+            await ws.send(json.dumps({"type": "bench", "sent_at": time.time()}))
+            await ws.send(json.dumps({"type": "cursor", "x": time.time() % 1000, "y": 0}))
+            await asyncio.sleep(interval)
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(args):
+    latencies = []
+    stop = asyncio.Event()
+    ready = asyncio.Semaphore(0)
+    tasks = []
+
+    connect_start = time.perf_counter()
+    for i in range(args.sockets):
+        room = f"load-{i % args.rooms}"
+        token = create_access_token({"sub": i + 1, "email": f"load{i}@example.com", "display_name": f"Load {i}"})
+        url = f"{args.url}/ws/rooms/{room}"
+        tasks.append(asyncio.create_task(subscriber(url, f"access_token={token}", latencies, ready, stop)))
+    for _ in range(args.sockets):
+        await ready.acquire()
+    connect_time = time.perf_counter() - connect_start
+
+    token = create_access_token({"sub": 0, "email": "publisher@example.com", "display_name": "Publisher"})
+    for r in range(args.rooms):
+        url = f"{args.url}/ws/rooms/load-{r}"
+        tasks.append(asyncio.create_task(publisher(url, f"access_token={token}", args.rate, stop)))
+
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies.sort()
+    print(f"sockets      {args.sockets} in {args.rooms} rooms (connected in {connect_time:.1f}s)")
+    print(f"deliveries   {len(latencies)} ({len(latencies) / args.duration:,.0f}/s)")
+    if latencies:
+        print(f"latency p50  {percentile(latencies, 50) * 1000:.1f} ms")
+        print(f"latency p95  {percentile(latencies, 95) * 1000:.1f} ms")
+        print(f"latency p99  {percentile(latencies, 99) * 1000:.1f} ms")
+        print(f"latency mean {statistics.mean(latencies) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000")
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--rate", type=float, default=20, help="bench events per second per room")
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+หา cost ของ password hash ที่ใช้เวลาใกล้ target (ms) ที่สุดโดยไม่เกิน บนเครื่องที่รัน script นี้
+ควรรันบนเครื่อง/instance type เดียวกับที่ deploy แล้วนำค่าที่ได้ไปตั้งใน environment
+
+    cd backend && python -m scripts.calibrate_password_hash --target-ms 250
+    cd backend && python -m scripts.calibrate_password_hash --scheme argon2 --target-ms 250 --memory-kib 65536
+
+hash เดิมที่ cost ต่ำกว่าจะถูก rehash อัตโนมัติหลัง login สำเร็จ
+"""
+import argparse
+import statistics
+import time
+
+from app.core.security import build_password_context
+
+BCRYPT_ROUNDS = range(8, 18)
+ARGON2_MAX_TIME_COST = 20
+
+
+def measure(context, samples: int) -> float:
+    """median ของเวลา hash (ms) ข้ามรอบแรกที่อาจมี overhead ตอนโหลด backend"""
+    context.hash("calibration-warmup")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("Calibrate-Password-123")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt(target_ms: float, samples: int):
+    best = None
+    for rounds in BCRYPT_ROUNDS:
+        elapsed = measure(build_password_context(["bcrypt"], bcrypt_rounds=rounds), samples)
+        print(f"bcrypt rounds={rounds:<3} {elapsed:>9.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = (rounds, elapsed)
+    if best is None:
+        return None
+    return {"PASSWORD_SCHEMES": "bcrypt", "PASSWORD_BCRYPT_ROUNDS": best[0]}, best[1]
+
+
+def calibrate_argon2(target_ms: float, samples: int, memory_kib: int, parallelism: int):
+    best = None
+    for time_cost in range(1, ARGON2_MAX_TIME_COST + 1):
+        context = build_password_context(
+            ["argon2"], argon2_time_cost=time_cost, argon2_memory_kib=memory_kib, argon2_parallelism=parallelism,
+        )
+        elapsed = measure(context, samples)
+        print(f"argon2 time_cost={time_cost:<3} memory={memory_kib}KiB parallelism={parallelism} {elapsed:>9.1f} ms")
+        if elapsed > target_ms:
+            break
+        best = (time_cost, elapsed)
+    if best is None:
+        return None
+    return {
+        # คง bcrypt ไว้เป็น scheme รองเพื่อให้ hash เดิม verify ได้และถูกย้ายเป็น argon2 ตอน login
+        "PASSWORD_SCHEMES": "argon2,bcrypt",
+        "PASSWORD_ARGON2_TIME_COST": best[0],
+        "PASSWORD_ARGON2_MEMORY_KIB": memory_kib,
+        "PASSWORD_ARGON2_PARALLELISM": parallelism,
+    }, best[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--target-ms", type=float, default=250, help="เวลาสูงสุดต่อการ hash หนึ่งครั้ง")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--memory-kib", type=int, default=65536, help="argon2 memory_cost (KiB)")
+    parser.add_argument("--parallelism", type=int, default=4, help="argon2 parallelism")
+    args = parser.parse_args()
+
+    if args.scheme == "bcrypt":
+        result = calibrate_bcrypt(args.target_ms, args.samples)
+    else:
+        result = calibrate_argon2(args.target_ms, args.samples, args.memory_kib, args.parallelism)
+
+    if result is None:
+        print(f"\neven the lowest cost is slower than {args.target_ms:.0f} ms on this machine")
+        return
+    settings, elapsed = result
+    print(f"\n# {args.scheme}: {elapsed:.1f} ms per hash (target {args.target_ms:.0f} ms)")
+    for key, value in settings.items():
+        print(f"{key}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+นำเข้า user จำนวนมากจากไฟล์ CSV (มี header) หรือ NDJSON
+
+    cd backend && python -m scripts.import_users users.csv
+    cd backend && python -m scripts.import_users users.ndjson --format ndjson
+
+คอลัมน์/field เหมือน UserCreate: email, password, display_name, avatar_url (optional)
+oauth_provider/oauth_id ถูกละทิ้ง (ผูกบัญชี OAuth ได้จาก callback ของ provider เท่านั้น)
+จำนวน thread ที่ใช้ hash ตั้งด้วย PASSWORD_HASH_WORKERS
+"""
+import argparse
+import asyncio
+import time
+
+from app.database import AsyncSessionLocal, dispose_engines, get_async_engine
+from app.core.security import hash_pool
+from app.services.bulk_import import CSV, NDJSON, import_users, iter_file_lines
+
+
+async def run(path: str, fmt: str, show_errors: int):
+    get_async_engine()
+    start = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            async with AsyncSessionLocal() as db:
+                result = await import_users(db, iter_file_lines(file), fmt)
+    finally:
+        hash_pool.shutdown()
+        await dispose_engines()
+    elapsed = time.perf_counter() - start
+
+    print(f"created {result.created}  skipped {result.skipped}  failed {result.failed}  in {elapsed:.1f}s")
+    for error in result.errors[:show_errors]:
+        print(f"  line {error.line}: {error.email or '-'}: {error.error}")
+    if len(result.errors) > show_errors:
+        print(f"  ... {len(result.errors) - show_errors} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=[CSV, NDJSON], default=None)
+    parser.add_argument("--show-errors", type=int, default=20)
+    args = parser.parse_args()
+
+    fmt = args.format or (NDJSON if args.path.endswith((".ndjson", ".jsonl")) else CSV)
+    asyncio.run(run(args.path, fmt, args.show_errors))
+
+
+if __name__ == "__main__":
+    main()
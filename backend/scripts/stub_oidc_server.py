@@ -0,0 +1,203 @@
+"""
+OIDC provider จำลองสำหรับทดสอบ login และ metadata/JWKS cache แบบ offline
+
+    cd backend && python -m scripts.stub_oidc_server --port 9000
+    OIDC_GOOGLE_METADATA_URL=http://localhost:9000/.well-known/openid-configuration \\
+        GOOGLE_CLIENT_ID=stub-client GOOGLE_CLIENT_SECRET=stub-secret uvicorn app.main:app
+
+endpoint:
+    GET  /.well-known/openid-configuration   discovery metadata (Cache-Control: max-age=--max-age)
+    GET  /jwks                                public key ปัจจุบัน (และ key เก่าถ้าใช้ --keep-old-keys)
+    GET  /authorize                           redirect กลับ redirect_uri ทันทีพร้อม code
+    POST /token                               แลก code เป็น id_token (RS256) ของ user ตาม login_hint
+    POST /rotate                              สร้าง signing key ใหม่ (kid ใหม่) เพื่อทดสอบการ refresh JWKS
+    GET  /avatars/<account>.png               รูป PNG สีทึบขนาด --avatar-size (ค่า picture ใน id_token ชี้มาที่นี่)
+    GET  /stats                               จำนวน request ต่อ endpoint
+
+ทดสอบ avatar proxy ให้ใส่ AVATAR_ALLOWED_HOSTS=localhost แล้วดูจำนวน fetch จริงที่ /stats
+"""
+import argparse
+import base64
+import hashlib
+import json
+import secrets
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+
+def _b64(number: int) -> str:
+    raw = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _png(width: int, height: int, rgb: bytes) -> bytes:
+    """PNG สีทึบ (RGB 8 bit) สร้างด้วย zlib ไม่ต้องใช้ Pillow"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + rgb * width for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+class SigningKeys:
+    def __init__(self, keep_old: bool):
+        self.keep_old = keep_old
+        self.keys = []
+        self.lock = threading.Lock()
+        self.rotate()
+
+    def rotate(self) -> str:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        numbers = private_key.public_key().public_numbers()
+        kid = secrets.token_hex(8)
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ).decode()
+        public = {"kty": "RSA", "use": "sig", "alg": "RS256", "kid": kid, "n": _b64(numbers.n), "e": _b64(numbers.e)}
+        with self.lock:
+            self.keys = ([*self.keys, (kid, pem, public)] if self.keep_old else [(kid, pem, public)])
+        return kid
+
+    def current(self):
+        with self.lock:
+            return self.keys[-1]
+
+    def jwks(self) -> dict:
+        with self.lock:
+            return {"keys": [public for _, _, public in self.keys]}
+
+
+def make_handler(args, keys: SigningKeys):
+    issuer = f"http://{args.host}:{args.port}"
+    codes = {}
+    counts = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *log_args):
+            if args.verbose:
+                super().log_message(format, *log_args)
+
+        def _json(self, status: int, body: dict, max_age: int = None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if max_age is not None:
+                self.send_header("Cache-Control", f"public, max-age={max_age}")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            counts[url.path] += 1
+            if url.path == "/.well-known/openid-configuration":
+                self._json(200, {
+                    "issuer": issuer,
+                    "authorization_endpoint": f"{issuer}/authorize",
+                    "token_endpoint": f"{issuer}/token",
+                    "jwks_uri": f"{issuer}/jwks",
+                    "response_types_supported": ["code"],
+                    "subject_types_supported": ["public"],
+                    "id_token_signing_alg_values_supported": ["RS256"],
+                }, max_age=args.max_age)
+            elif url.path == "/jwks":
+                self._json(200, keys.jwks(), max_age=args.max_age)
+            elif url.path == "/authorize":
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                code = secrets.token_urlsafe(16)
+                codes[code] = {
+                    "nonce": query.get("nonce"),
+                    "client_id": query.get("client_id"),
+                    "account": query.get("login_hint") or secrets.token_hex(4),
+                }
+                location = f"{query['redirect_uri']}?{urlencode({'code': code, 'state': query.get('state', '')})}"
+                self.send_response(302)
+                self.send_header("Location", location)
+                self.end_headers()
+            elif url.path.startswith("/avatars/") and url.path.endswith(".png"):
+                # สีตาม account เดียวกันได้รูปเดิมทุกครั้ง (ETag ของ proxy จึงคงที่)
+                rgb = hashlib.sha256(url.path.encode()).digest()[:3]
+                payload = _png(args.avatar_size, args.avatar_size, rgb)
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            elif url.path == "/stats":
+                self._json(200, dict(counts))
+            else:
+                self._json(404, {"error": "not_found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            counts[url.path] += 1
+            length = int(self.headers.get("Content-Length") or 0)
+            form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+            if url.path == "/token":
+                grant = codes.pop(form.get("code"), None)
+                if grant is None:
+                    self._json(400, {"error": "invalid_grant"})
+                    return
+                kid, pem, _ = keys.current()
+                now = int(time.time())
+                account = grant["account"]
+                id_token = jwt.encode({
+                    "iss": issuer,
+                    "aud": grant["client_id"] or form.get("client_id"),
+                    "sub": f"stub-{account}",
+                    "email": f"{account}@stub-oidc.test",
+                    "email_verified": True,
+                    "name": f"Stub {account}",
+                    "picture": f"{issuer}/avatars/{account}.png",
+                    "nonce": grant["nonce"],
+                    "iat": now,
+                    "exp": now + 3600,
+                }, pem, algorithm="RS256", headers={"kid": kid})
+                self._json(200, {
+                    "access_token": secrets.token_urlsafe(24),
+                    "token_type": "Bearer",
+                    "expires_in": 3600,
+                    "scope": "openid email profile",
+                    "id_token": id_token,
+                })
+            elif url.path == "/rotate":
+                self._json(200, {"kid": keys.rotate()})
+            else:
+                self._json(404, {"error": "not_found"})
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--max-age", type=int, default=300, help="Cache-Control max-age ของ metadata และ JWKS")
+    parser.add_argument("--keep-old-keys", action="store_true", help="JWKS ยังมี key เก่าหลัง /rotate")
+    parser.add_argument("--avatar-size", type=int, default=512, help="ขนาด (pixel) ของรูปใน /avatars/")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    keys = SigningKeys(keep_old=args.keep_old_keys)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args, keys))
+    print(f"stub OIDC provider on http://{args.host}:{args.port} (kid {keys.current()[0]})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
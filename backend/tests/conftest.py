@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from app.database import AsyncSessionLocal, dispose_engines, init_db
+
+
+@pytest.fixture
+def run_db(tmp_path, monkeypatch):
+    """
+    รัน scenario(db) บน SQLite ไฟล์ใหม่ต่อ test (engine ถูกสร้างและ dispose ภายใน asyncio.run เดียวกัน)
+    """
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+
+    def run(scenario):
+        async def main():
+            await init_db()
+            try:
+                async with AsyncSessionLocal() as db:
+                    return await scenario(db)
+            finally:
+                await dispose_engines()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,61 @@
+import asyncio
+import io
+import os
+
+import httpx
+from PIL import Image
+
+from app.services.avatar_service import AvatarCache, DiskLRU
+
+
+def _png(color) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (300, 300), color).save(output, format="PNG")
+    return output.getvalue()
+
+
+SOURCES = {
+    "/first": _png("red"),
+    "/second": _png("blue"),
+}
+
+
+def _transport():
+    return httpx.MockTransport(lambda request: httpx.Response(200, content=SOURCES[request.url.path]))
+
+
+def test_disk_lru_treats_a_file_removed_by_another_worker_as_a_miss(tmp_path):
+    mine = DiskLRU(str(tmp_path), max_bytes=1000)
+    mine.load()
+    path = mine.put("aa-file", b"x" * 100)
+    os.remove(path)
+
+    assert mine.get("aa-file") is None
+    assert mine.total_bytes == 0 and len(mine) == 0
+
+
+def test_disk_lru_picks_up_files_written_by_another_worker(tmp_path):
+    mine, other = DiskLRU(str(tmp_path), max_bytes=1000), DiskLRU(str(tmp_path), max_bytes=1000)
+    mine.load()
+    other.put("bb-file", b"x" * 100)
+
+    assert mine.get("bb-file") == other.get("bb-file")
+    assert mine.total_bytes == 100
+
+
+def test_avatar_evicted_by_another_worker_is_fetched_again(tmp_path):
+    async def scenario():
+        # สอง worker ใช้ directory เดียวกัน แต่ละตัวมี index ของตัวเอง
+        mine = AvatarCache(str(tmp_path), max_bytes=10 ** 6, transport=_transport())
+        other = AvatarCache(str(tmp_path), max_bytes=1, transport=_transport())
+        first_path, first_etag = await mine.get("https://lh3.googleusercontent.com/first", 64)
+        # max_bytes เล็กมาก: worker อื่นไล่ไฟล์ของ mine ออกจาก disk ตอนเก็บรูปของตัวเอง
+        await other.get("https://lh3.googleusercontent.com/second", 32)
+        assert not os.path.exists(first_path)
+
+        path, etag = await mine.get("https://lh3.googleusercontent.com/first", 64)
+        return mine, first_etag, path, etag
+
+    mine, first_etag, path, etag = asyncio.run(scenario())
+    assert os.path.exists(path) and etag == first_etag
+    assert mine.fetches == 2 and mine.misses == 2
@@ -0,0 +1,89 @@
+from app.models.user import User
+from app.schemas.board import BoardOp
+from app.services import board_service
+from app.services.board_service import append_ops, compact_board, compact_due_boards, create_board, sync_board
+
+
+async def _board_with_ops(db, count: int):
+    user = User(email="owner@example.com", display_name="Owner")
+    db.add(user)
+    await db.commit()
+    board = await create_board(db, "board", user.id)
+    for start in range(0, count, 100):
+        await append_ops(db, board.id, user.id, [
+            BoardOp(op="upsert", element_id=f"el-{n % 7}", data={"n": n}) for n in range(start, min(count, start + 100))
+        ])
+    await db.refresh(board)
+    return board
+
+
+def test_small_gap_returns_only_missing_ops(run_db):
+    async def scenario(db):
+        board = await _board_with_ops(db, 30)
+        return await sync_board(db, board, 25)
+
+    result = run_db(scenario)
+    assert result.snapshot is None
+    assert [op.seq for op in result.ops] == [26, 27, 28, 29, 30]
+
+
+def test_large_gap_without_snapshot_pages_ops_and_requests_compaction(run_db, monkeypatch):
+    monkeypatch.setattr(board_service, "BOARD_SYNC_MAX_OPS", 50)
+    board_service._compaction_requested.clear()
+
+    async def scenario(db):
+        board = await _board_with_ops(db, 200)
+        first = await sync_board(db, board, 0)
+        # ไม่ compact ใน request: ยังไม่มี snapshot หลัง sync
+        assert await board_service._latest_snapshot(db, board.id) is None
+        second = await sync_board(db, board, first.ops[-1].seq)
+        return board.id, first, second
+
+    board_id, first, second = run_db(scenario)
+    assert first.snapshot is None and first.head_seq == 200
+    assert [op.seq for op in first.ops] == list(range(1, 51))
+    assert [op.seq for op in second.ops] == list(range(51, 101))
+    assert board_id in board_service._compaction_requested
+
+
+def test_snapshot_plus_tail_after_compaction(run_db, monkeypatch):
+    monkeypatch.setattr(board_service, "BOARD_SYNC_MAX_OPS", 50)
+
+    async def scenario(db):
+        board = await _board_with_ops(db, 200)
+        assert await compact_board(db, board.id) == 200
+        await append_ops(db, board.id, board.owner_id, [BoardOp(op="delete", element_id="el-0")])
+        await db.refresh(board)
+        return await sync_board(db, board, 10)
+
+    result = run_db(scenario)
+    assert result.snapshot.seq == 200
+    # element ถูกแก้ซ้ำ: snapshot เก็บค่าล่าสุดต่อ element
+    assert result.snapshot.elements["el-3"] == {"n": 199}
+    assert [op.seq for op in result.ops] == [201]
+
+
+def test_compact_due_boards_continues_after_a_failing_board(run_db, monkeypatch):
+    monkeypatch.setattr(board_service, "BOARD_SNAPSHOT_EVERY", 10)
+    real_compact = board_service.compact_board
+
+    async def scenario(db):
+        first = await _board_with_ops(db, 20)
+        db.add(User(email="second@example.com", display_name="Second"))
+        await db.commit()
+        second = await create_board(db, "second", first.owner_id)
+        await append_ops(db, second.id, first.owner_id, [BoardOp(op="upsert", element_id="a", data={})] * 10)
+
+        async def flaky_compact(session, board_id):
+            if board_id == first.id:
+                raise RuntimeError("corrupt op log")
+            return await real_compact(session, board_id)
+
+        monkeypatch.setattr(board_service, "compact_board", flaky_compact)
+        compacted = await compact_due_boards()
+        snapshot = await board_service._latest_snapshot(db, second.id)
+        return compacted, snapshot
+
+    compacted, snapshot = run_db(scenario)
+    assert compacted == 1
+    assert snapshot is not None and snapshot.seq == 10
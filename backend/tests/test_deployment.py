@@ -0,0 +1,38 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.core import deployment
+
+
+def test_process_local_backend_is_refused_with_several_workers(monkeypatch):
+    monkeypatch.setattr(deployment, "WEB_CONCURRENCY", 4)
+    with pytest.raises(deployment.DeploymentConfigError, match="BROADCAST_BACKEND=memory"):
+        deployment.require_shared_backend("BROADCAST_BACKEND", "memory", ("memory",), "revocations stay local")
+    # backend ที่แชร์กันได้ผ่านเสมอ
+    deployment.require_shared_backend("BROADCAST_BACKEND", "postgres", ("memory",), "revocations stay local")
+
+
+def test_single_worker_or_explicit_override_only_warns(monkeypatch, caplog):
+    deployment.require_shared_backend("BROADCAST_BACKEND", "memory", ("memory",), "revocations stay local")
+    monkeypatch.setattr(deployment, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(deployment, "ALLOW_PROCESS_LOCAL_STATE", True)
+    with caplog.at_level(logging.WARNING):
+        deployment.require_shared_backend("BROADCAST_BACKEND", "memory", ("memory",), "revocations stay local")
+    assert "WEB_CONCURRENCY=4" in caplog.text
+
+
+def test_lifespan_refuses_memory_sessions_with_several_workers(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(deployment, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(main, "BROADCAST_BACKEND", "postgres")
+    monkeypatch.setattr(main, "SESSION_BACKEND", "memory")
+
+    async def start():
+        async with main.lifespan(main.app):
+            pass
+
+    with pytest.raises(deployment.DeploymentConfigError, match="SESSION_BACKEND=memory"):
+        asyncio.run(start())
@@ -0,0 +1,83 @@
+import hashlib
+import os
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.file import FileBlob
+from app.models.user import User
+from app.schemas.file import FileUploadCreate
+from app.services import file_service
+from app.services.file_service import (
+    UploadOffsetMismatch, UploadTooLarge, append_chunk, blob_path, complete_upload, create_upload,
+)
+
+CONTENT = os.urandom(300_000)
+
+
+@pytest.fixture(autouse=True)
+def storage_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_service, "FILE_STORAGE_DIR", str(tmp_path / "files"))
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _owner(db):
+    user = User(email="uploader@example.com", display_name="Uploader")
+    db.add(user)
+    await db.commit()
+    return user
+
+
+async def _upload(db, owner, name):
+    return await create_upload(db, owner.id, FileUploadCreate(name=name, size=len(CONTENT)))
+
+
+def test_resumed_upload_is_hashed_correctly_even_on_another_worker(run_db):
+    async def scenario(db):
+        upload = await _upload(db, await _owner(db), "a.bin")
+        offset = await append_chunk(upload, 0, _chunks(CONTENT[:100_000], CONTENT[100_000:120_000]))
+        with pytest.raises(UploadOffsetMismatch) as mismatch:
+            await append_chunk(upload, 0, _chunks(CONTENT))
+        # resume บน worker ที่ไม่มี hasher ค้างไว้: ต้อง hash ส่วนที่อยู่ใน .part ก่อน
+        file_service._upload_hashers.delete(upload.id)
+        final = await append_chunk(upload, offset, _chunks(CONTENT[offset:]))
+        shared = await complete_upload(db, upload)
+        return offset, mismatch.value.offset, final, shared
+
+    offset, reported, final, shared = run_db(scenario)
+    assert offset == reported == 120_000
+    assert final == len(CONTENT)
+    assert shared.sha256 == hashlib.sha256(CONTENT).hexdigest()
+    with open(blob_path(shared.sha256), "rb") as file:
+        assert file.read() == CONTENT
+
+
+def test_identical_uploads_share_one_blob(run_db):
+    async def scenario(db):
+        owner = await _owner(db)
+        files = []
+        for name in ("first.bin", "second.bin"):
+            upload = await _upload(db, owner, name)
+            await append_chunk(upload, 0, _chunks(CONTENT))
+            files.append(await complete_upload(db, upload))
+        blobs = (await db.execute(select(func.count()).select_from(FileBlob))).scalar_one()
+        return files, blobs
+
+    (first, second), blobs = run_db(scenario)
+    assert first.id != second.id and first.sha256 == second.sha256
+    assert blobs == 1
+    assert os.listdir(os.path.join(file_service.FILE_STORAGE_DIR, "uploads")) == []
+
+
+def test_bytes_past_the_declared_size_are_rejected_but_the_prefix_is_kept(run_db):
+    async def scenario(db):
+        upload = await _upload(db, await _owner(db), "big.bin")
+        with pytest.raises(UploadTooLarge):
+            await append_chunk(upload, 0, _chunks(CONTENT[:200_000], CONTENT[200_000:] + b"extra"))
+        return file_service.upload_offset(upload.id)
+
+    assert run_db(scenario) == 200_000
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.message import Message
+from app.models.user import User
+from app.services.board_service import create_board
+from app.services.message_service import (
+    InvalidCursor, enqueue_message, get_message_page, message_writer,
+)
+
+
+async def _two_boards(db):
+    user = User(email="history@example.com", display_name="History")
+    db.add(user)
+    await db.commit()
+    return user, await create_board(db, "room", user.id), await create_board(db, "other", user.id)
+
+
+async def _all_pages(db, room_id, limit):
+    pages, cursor = [], None
+    while True:
+        page = await get_message_page(db, room_id, limit, cursor)
+        pages.append([message.body for message in page.messages])
+        cursor = page.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_keyset_pages_cover_every_message_once_newest_first(run_db):
+    async def scenario(db):
+        user, board, other = await _two_boards(db)
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        # created_at ซ้ำกันเป็นคู่: ลำดับในหน้าต้องตัดสินด้วย id ไม่ข้ามหรือซ้ำที่รอยต่อของหน้า
+        db.add_all([
+            Message(room_id=board.id, user_id=user.id, body=f"m{n}", created_at=start + timedelta(seconds=n // 2))
+            for n in range(7)
+        ])
+        db.add(Message(room_id=other.id, user_id=user.id, body="elsewhere", created_at=start))
+        await db.commit()
+        return await _all_pages(db, board.id, 3)
+
+    pages = run_db(scenario)
+    assert pages == [["m6", "m5", "m4"], ["m3", "m2", "m1"], ["m0"]]
+
+
+def test_invalid_cursor_is_rejected(run_db):
+    async def scenario(db):
+        _, board, _ = await _two_boards(db)
+        with pytest.raises(InvalidCursor):
+            await get_message_page(db, board.id, 10, "not-a-cursor")
+
+    run_db(scenario)
+
+
+def test_buffered_messages_keep_send_order_after_flush(run_db):
+    async def scenario(db):
+        user, board, _ = await _two_boards(db)
+        for n in range(5):
+            assert enqueue_message(board.id, user.id, f"chat {n}") is not None
+        assert await message_writer.flush()
+        return await _all_pages(db, board.id, 2)
+
+    pages = run_db(scenario)
+    assert sum(pages, []) == [f"chat {n}" for n in reversed(range(5))]
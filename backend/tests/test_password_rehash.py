@@ -0,0 +1,29 @@
+from sqlalchemy import select
+
+from app.core import security
+from app.models.user import User
+from app.services.auth_service import password_rehash_writer, schedule_rehash
+
+
+def test_rehash_queues_only_hashes_and_updates_the_stored_hash(run_db, monkeypatch):
+    monkeypatch.setattr(security, "pwd_context", security.build_password_context(bcrypt_rounds=5))
+    old_hash = security.build_password_context(bcrypt_rounds=4).hash("correct horse")
+
+    async def scenario(db):
+        user = User(email="rehash@example.com", display_name="Rehash", password=old_hash)
+        db.add(user)
+        await db.commit()
+        assert security.password_needs_update(old_hash)
+
+        assert await schedule_rehash(user.id, old_hash, "correct horse")
+        queued = list(password_rehash_writer._items)
+        await password_rehash_writer.flush()
+        stored = (await db.execute(select(User.password).where(User.id == user.id))).scalar_one()
+        return user.id, queued, stored
+
+    user_id, queued, stored = run_db(scenario)
+    # buffer ไม่มี password จริง มีแค่ hash เดิมกับ hash ใหม่
+    assert len(queued) == 1 and "correct horse" not in queued[0]
+    assert queued[0][:2] == (user_id, old_hash) and queued[0][2] == stored
+    assert security.verify_password("correct horse", stored)
+    assert not security.password_needs_update(stored)
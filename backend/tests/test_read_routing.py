@@ -0,0 +1,73 @@
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+from starlette.requests import Request
+
+from app import database
+from app.database import DB_STICKY_COOKIE, ReadYourWritesMiddleware, get_async_db, get_read_db
+from app.models.user import User
+
+
+def _test_app():
+    test_app = FastAPI()
+    test_app.add_middleware(ReadYourWritesMiddleware)
+
+    @test_app.post("/write")
+    async def write(db=Depends(get_async_db)):
+        db.add(User(email="sticky@example.com", display_name="Sticky"))
+        await db.commit()
+        return {}
+
+    @test_app.get("/read")
+    async def read(db=Depends(get_async_db)):
+        await db.execute(select(User.id))
+        return {}
+
+    return test_app
+
+
+def _request(cookie=None):
+    headers = [(b"cookie", f"{DB_STICKY_COOKIE}={cookie}".encode())] if cookie is not None else []
+    return Request({"type": "http", "headers": headers, "db_routing": {}})
+
+
+async def _read_session_replica(cookie=None):
+    dependency = get_read_db(_request(cookie))
+    db = await dependency.__anext__()
+    try:
+        return db.info["replica"]
+    finally:
+        await dependency.aclose()
+
+
+def test_write_response_carries_the_sticky_cookie_and_reads_do_not(run_db):
+    async def scenario(db):
+        transport = httpx.ASGITransport(app=_test_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/write"), await client.get("/read")
+
+    before = time.time()
+    written, read = run_db(scenario)
+    assert float(written.cookies[DB_STICKY_COOKIE]) >= before + database.DB_READ_STICKY_SECONDS - 1
+    assert DB_STICKY_COOKIE not in read.cookies
+
+
+def test_read_db_uses_primary_until_the_cookie_expires(run_db, monkeypatch):
+    replica = object()
+    monkeypatch.setattr(database, "pick_replica", lambda: replica)
+
+    async def scenario(db):
+        return (
+            await _read_session_replica(),
+            await _read_session_replica(time.time() + 60),
+            await _read_session_replica(time.time() - 1),
+            await _read_session_replica("garbage"),
+        )
+
+    no_cookie, sticky, expired, invalid = run_db(scenario)
+    assert no_cookie is replica
+    # cookie มาจาก worker ไหนก็ได้: ยังไม่หมดเวลา -> primary
+    assert sticky is None
+    assert expired is replica and invalid is replica
@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.jwt_auth import create_refresh_token
+from app.main import app
+from app.models.user import User
+from app.services import token_revocation
+from app.services.user_cache import invalidate_user
+
+
+@pytest.fixture(autouse=True)
+def fresh_revocations(monkeypatch):
+    monkeypatch.setattr(token_revocation, "revocations", token_revocation.RevocationList(capacity=1000))
+
+
+async def _refresh(client, token):
+    client.cookies.clear()
+    client.cookies.set("refresh_token", token)
+    return await client.post("/refresh")
+
+
+async def _user(db):
+    user = User(email="refresh@example.com", display_name="Refresh User")
+    db.add(user)
+    await db.commit()
+    await invalidate_user(user.id)
+    return user
+
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_rotated_token_cannot_be_reused_and_reuse_revokes_the_family(run_db):
+    async def scenario(db):
+        user = await _user(db)
+        token = create_refresh_token({"sub": user.id})
+        async with _client() as client:
+            first = await _refresh(client, token)
+            rotated = first.cookies["refresh_token"]
+            reused = await _refresh(client, token)
+            after_reuse = await _refresh(client, rotated)
+        return first, reused, after_reuse
+
+    first, reused, after_reuse = run_db(scenario)
+    assert first.status_code == 200
+    assert reused.status_code == 401 and reused.json()["detail"] == "Refresh token reuse detected"
+    # token ล่าสุดใน family เดียวกันถูกเพิกถอนไปด้วย
+    assert after_reuse.status_code == 401
+
+
+def test_concurrent_refreshes_with_the_same_token_issue_one_new_token(run_db):
+    async def scenario(db):
+        user = await _user(db)
+        token = create_refresh_token({"sub": user.id})
+        async with _client() as first, _client() as second:
+            return await asyncio.gather(_refresh(first, token), _refresh(second, token))
+
+    responses = run_db(scenario)
+    assert sorted(response.status_code for response in responses) == [200, 401]
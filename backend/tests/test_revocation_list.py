@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from app.services import token_revocation
+from app.services.token_revocation import TOKEN_OK, TOKEN_REVOKED, RevocationList
+
+
+@pytest.fixture(autouse=True)
+def fresh_revocations(monkeypatch):
+    monkeypatch.setattr(token_revocation, "revocations", RevocationList(capacity=1000))
+
+
+def test_revoked_keys_are_always_found_and_others_mostly_skip_the_dict():
+    revocations = RevocationList(capacity=1000, error_rate=0.01)
+    now = time.time()
+    for n in range(1000):
+        revocations.add(f"jti:{n}", now, now + 60)
+
+    # bloom filter ไม่มี false negative
+    assert all(revocations.revoked_at(f"jti:{n}") == now for n in range(1000))
+    for n in range(1000, 11000):
+        assert revocations.revoked_at(f"jti:{n}") is None
+    assert revocations.false_positives < 300
+    assert revocations.bloom_negatives + revocations.false_positives == 10000
+
+
+def test_only_tokens_issued_before_the_revocation_are_revoked():
+    revocations = RevocationList(capacity=100)
+    now = time.time()
+    revocations.add("user:1", now, now + 60)
+
+    assert revocations.is_revoked("user:1", now - 10)
+    assert not revocations.is_revoked("user:1", now + 10)
+    assert not revocations.is_revoked("user:2", now - 10)
+
+
+def test_purge_drops_expired_entries_and_rebuilds_the_filter():
+    revocations = RevocationList(capacity=100)
+    now = time.time()
+    revocations.add("jti:old", now - 120, now - 60)
+    revocations.add("jti:live", now, now + 60)
+
+    assert revocations.purge() == 1
+    assert len(revocations) == 1
+    assert revocations.revoked_at("jti:old") is None and revocations.bloom_negatives == 1
+    assert revocations.revoked_at("jti:live") == now
+
+
+def test_revocations_survive_a_restart_through_the_database(run_db, monkeypatch):
+    async def scenario(db):
+        await token_revocation.revoke_user_tokens(7)
+        await token_revocation.revocation_writer.flush()
+        # worker ใหม่: รายการในหน่วยความจำว่าง โหลดจากฐานข้อมูล
+        monkeypatch.setattr(token_revocation, "revocations", RevocationList(capacity=1000))
+        await token_revocation.load_revocations()
+
+    run_db(scenario)
+    assert token_revocation.refresh_token_state({"sub": "7", "iat": time.time() - 10}) == TOKEN_REVOKED
+    assert token_revocation.refresh_token_state({"sub": "7", "iat": time.time() + 10}) == TOKEN_OK
+    assert token_revocation.refresh_token_state({"sub": "8", "iat": time.time() - 10}) == TOKEN_OK
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+from app.services.broadcast import BroadcastBackend
+from app.services.room_hub import Room, RoomConnection, RoomHub
+
+
+class RecordingBackend(BroadcastBackend):
+    def __init__(self, max_message_size=None):
+        self.max_message_size = max_message_size
+        self.callbacks = {}
+        self.published = []
+
+    async def subscribe(self, channel, callback):
+        await asyncio.sleep(0.01)
+        self.callbacks[channel] = callback
+
+    async def unsubscribe(self, channel):
+        await asyncio.sleep(0.01)
+        self.callbacks.pop(channel, None)
+
+    async def publish(self, channel, message):
+        self.published.append(message)
+        callback = self.callbacks.get(channel)
+        if callback is not None:
+            callback(message)
+
+
+def _events(frames):
+    return [event for frame in frames for event in json.loads(frame)["events"]]
+
+
+def test_large_ops_event_is_split_to_fit_the_backend_limit():
+    backend = RecordingBackend(max_message_size=1000)
+    room = Room("1", backend)
+    ops = [{"seq": seq, "op": {"op": "upsert", "element_id": f"el-{seq}", "data": {"x": seq}}} for seq in range(1, 101)]
+    room.publish({"type": "ops", "ops": ops})
+    asyncio.run(room.flush())
+
+    assert len(backend.published) > 1
+    assert all(len(frame.encode()) <= 1000 for frame in backend.published)
+    delivered = [op for event in _events(backend.published) for op in event["ops"]]
+    assert delivered == ops
+
+
+def test_event_that_cannot_be_split_becomes_a_resync_notice():
+    backend = RecordingBackend(max_message_size=500)
+    room = Room("1", backend)
+    room.publish({"type": "chat", "user_id": 1, "body": "x" * 2000})
+    room.publish({"type": "ops", "ops": [{"seq": 7, "op": {"op": "upsert", "element_id": "a", "data": {"t": "y" * 2000}}}]})
+    asyncio.run(room.flush())
+
+    assert _events(backend.published) == [{"type": "resync"}, {"type": "resync", "head_seq": 7}]
+    assert room.oversized == 2
+
+
+def test_leave_racing_join_keeps_the_new_subscription():
+    class Socket:
+        async def send_text(self, text):
+            pass
+
+    async def scenario():
+        backend = RecordingBackend()
+        hub = RoomHub(backend)
+        first = RoomConnection(Socket(), {"id": 1})
+        second = RoomConnection(Socket(), {"id": 2})
+        await hub.join("r", first)
+        await asyncio.gather(hub.leave("r", first), hub.join("r", second))
+        await hub.publish("r", {"type": "chat", "user_id": 2})
+        await hub.rooms["r"].flush()
+        subscribed = "room:r" in backend.callbacks
+        await hub.leave("r", second)
+        return subscribed, second.dropped_frames, len(second._frames), hub._locks
+
+    subscribed, dropped, queued, locks = asyncio.run(scenario())
+    assert subscribed
+    assert queued == 1 and dropped == 0
+    assert locks == {}
+
+
+def test_publish_without_a_local_room_still_reaches_the_backend():
+    backend = RecordingBackend()
+    hub = RoomHub(backend)
+    asyncio.run(hub.publish("9", {"type": "ops", "ops": []}))
+    assert _events(backend.published) == [{"type": "ops", "ops": []}]
@@ -0,0 +1,106 @@
+import json
+
+import httpx
+from fastapi import WebSocketDisconnect
+
+from app.core.jwt_auth import create_access_token
+from app.main import app
+from app.models.user import User
+from app.routes import rooms
+from app.services.board_service import create_board
+
+
+class RecordingHub:
+    def __init__(self, counts=None):
+        self.events = []
+        self.counts = counts or {}
+
+    async def join(self, room_id, connection):
+        pass
+
+    async def leave(self, room_id, connection):
+        pass
+
+    async def publish(self, room_id, event):
+        self.events.append(event)
+
+    def subscriber_counts(self):
+        return dict(self.counts)
+
+    def subscriber_count(self, room_id):
+        return self.counts.get(room_id, 0)
+
+    def online_user_ids(self, room_id=None):
+        return set()
+
+
+class FakeWebSocket:
+    def __init__(self, token, messages):
+        self.cookies = {"access_token": token}
+        self.messages = list(messages)
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000):
+        raise AssertionError(f"socket closed with {code}")
+
+    async def receive_text(self):
+        if not self.messages:
+            raise WebSocketDisconnect()
+        return json.dumps(self.messages.pop(0))
+
+
+def _token(user):
+    return create_access_token({"sub": user.id, "email": user.email, "display_name": user.display_name})
+
+
+async def _users_and_board(db):
+    member = User(email="member@example.com", display_name="Member")
+    outsider = User(email="outsider@example.com", display_name="Outsider")
+    db.add_all([member, outsider])
+    await db.commit()
+    board = await create_board(db, "Board", member.id)
+    return member, outsider, board
+
+
+def test_socket_only_relays_client_event_types_with_identity_from_the_token(run_db, monkeypatch):
+    recording = RecordingHub()
+    monkeypatch.setattr(rooms, "hub", recording)
+
+    async def scenario(db):
+        member, _, _ = await _users_and_board(db)
+        websocket = FakeWebSocket(_token(member), [
+            {"type": "cursor", "x": 1, "user_id": 999, "display_name": "Someone else"},
+            {"type": "join", "user_id": 999},
+            {"type": "leave", "user_id": 999},
+            {"type": "resync"},
+            {"type": "batch", "events": []},
+            {"type": "ops", "ops": []},
+        ])
+        await rooms.room_socket(websocket, "ad-hoc", db)
+        return member
+
+    member = run_db(scenario)
+    relayed = [event for event in recording.events if event["type"] not in ("join", "leave")]
+    assert relayed == [{"type": "cursor", "x": 1, "user_id": member.id, "display_name": "Member"}]
+    # join/leave มีแค่ที่ server ส่งเองตอนเข้าและออก
+    assert [event["type"] for event in recording.events] == ["join", "cursor", "leave"]
+
+
+def test_room_listing_and_presence_require_board_membership(run_db, monkeypatch):
+    async def scenario(db):
+        member, outsider, board = await _users_and_board(db)
+        other_board = await create_board(db, "Other", outsider.id)
+        monkeypatch.setattr(rooms, "hub", RecordingHub({str(board.id): 2, str(other_board.id): 1, "ad-hoc": 3}))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            client.cookies.set("access_token", _token(member))
+            listed = await client.get("/rooms")
+            own = await client.get(f"/rooms/{board.id}/presence")
+            foreign = await client.get(f"/rooms/{other_board.id}/presence")
+        return board, listed, own, foreign
+
+    board, listed, own, foreign = run_db(scenario)
+    assert listed.json() == {"rooms": {str(board.id): 2}}
+    assert own.status_code == 200 and own.json()["subscribers"] == 2
+    assert foreign.status_code == 404
@@ -0,0 +1,29 @@
+import pytest
+
+from app.services.search_service import (
+    _HIGHLIGHT_START, _HIGHLIGHT_STOP, InvalidSearchCursor, SearchUnavailable,
+    _decode_cursor, _encode_cursor, _render_snippet, search_workspace,
+)
+
+
+def test_snippet_escapes_user_html_and_keeps_only_our_highlight_tags():
+    headline = f'<img src=x onerror="alert(1)"> say {_HIGHLIGHT_START}hello{_HIGHLIGHT_STOP} & <b>bye</b>'
+
+    assert _render_snippet(headline) == (
+        '&lt;img src=x onerror="alert(1)"&gt; say <b>hello</b> &amp; &lt;b&gt;bye&lt;/b&gt;'
+    )
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    assert _decode_cursor(_encode_cursor(0.25, "message", 42)) == (0.25, "message", 42)
+    for cursor in ("not-base64!", _encode_cursor(0.25, "message", "x")[:-2], "WzFd"):
+        with pytest.raises(InvalidSearchCursor):
+            _decode_cursor(cursor)
+
+
+def test_search_needs_postgres(run_db):
+    async def scenario(db):
+        with pytest.raises(SearchUnavailable):
+            await search_workspace(db, 1, "hello", 10)
+
+    run_db(scenario)
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.core.tasks import SupervisedTask
+
+
+def test_crashed_loop_is_restarted_and_task_can_start_again_after_stop():
+    calls = []
+
+    async def crashing_loop():
+        calls.append(1)
+        raise RuntimeError("database went away")
+
+    async def scenario():
+        task = SupervisedTask("crashing", crashing_loop, restart_delay=0)
+        task.start()
+        await asyncio.sleep(0.05)
+        await task.stop()
+        first_run = len(calls)
+        await asyncio.sleep(0.01)
+        after_stop = len(calls)
+        # lifespan ถัดไป (เช่น test อื่น) start instance เดิมได้
+        task.start()
+        await asyncio.sleep(0)
+        await task.stop()
+        return task.restarts, first_run, after_stop, len(calls)
+
+    restarts, first_run, after_stop, total = asyncio.run(scenario())
+    assert restarts >= 1 and first_run >= 2
+    assert after_stop == first_run
+    assert total == first_run + 1
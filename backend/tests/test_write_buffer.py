@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.services.write_buffer import BatchWriter
+
+
+@pytest.mark.parametrize("delay", [0, 0.02])
+def test_stop_persists_every_pending_item(delay):
+    persisted = []
+
+    async def slow_flush(items):
+        await asyncio.sleep(0.05)
+        persisted.extend(items)
+
+    async def scenario():
+        writer = BatchWriter("test", slow_flush, batch_size=10, interval=0.01)
+        writer.start()
+        for item in range(25):
+            assert writer.add(item)
+        # delay=0: stop ทันทีหลัง add, delay>0: stop ระหว่าง flush_fn กำลังเขียน batch แรก
+        await asyncio.sleep(delay)
+        await asyncio.wait_for(writer.stop(), timeout=5)
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert persisted == list(range(25))
+    assert writer.flushed == 25
+    assert writer.pending == 0
+
+
+def test_stop_without_start_flushes_pending_items():
+    persisted = []
+
+    async def flush(items):
+        persisted.extend(items)
+
+    async def scenario():
+        writer = BatchWriter("test", flush, batch_size=10)
+        for item in range(15):
+            writer.add(item)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert persisted == list(range(15))
+
+
+def test_failed_flush_is_retried_in_order():
+    persisted = []
+    failures = [RuntimeError("database is down")] * 2
+
+    async def flaky_flush(items):
+        if failures:
+            raise failures.pop()
+        persisted.extend(items)
+
+    async def scenario():
+        writer = BatchWriter("test", flaky_flush, batch_size=10, interval=0.01, retry_delay=0.001)
+        writer.start()
+        for item in range(25):
+            writer.add(item)
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(writer.stop(), timeout=5)
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert persisted == list(range(25))
+    assert writer.failed == 0
+    assert writer.retried == 20
+
+
+def test_batch_is_dropped_only_after_retries_run_out():
+    attempts = []
+
+    async def broken_flush(items):
+        attempts.append(list(items))
+        raise RuntimeError("database is down")
+
+    async def scenario():
+        writer = BatchWriter("test", broken_flush, batch_size=10, max_retries=3, retry_delay=0.001)
+        for item in range(5):
+            writer.add(item)
+        await asyncio.wait_for(writer.stop(), timeout=5)
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert attempts == [[0, 1, 2, 3, 4]] * 4
+    assert writer.failed == 5
+    assert writer.pending == 0